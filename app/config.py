@@ -0,0 +1,243 @@
+import hashlib
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_int_list(name: str, default: list) -> list:
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def _env_str(name: str, default: str) -> str:
+    value = os.getenv(name)
+    return value if value not in (None, "") else default
+
+
+class Settings:
+    def __init__(self):
+        # Models loaded by the inference workers
+        self.classifier_model = _env_str("CLASSIFIER_MODEL", "facebook/bart-large-mnli")
+        self.sentiment_model = _env_str(
+            "SENTIMENT_MODEL", "distilbert-base-uncased-finetuned-sst-2-english"
+        )
+        self.spacy_model = _env_str("SPACY_MODEL", "en_core_web_sm")
+        # "stub" swaps every model for a tiny offline stand-in (benchmarks, local runs)
+        self.model_profile = _env_str("MODEL_PROFILE", "default")
+        # Optional JSON lexicon of urgency keywords (term -> weight) merged over the defaults
+        self.urgency_keywords_path = _env_str("URGENCY_KEYWORDS_PATH", "")
+        # nlp.pipe settings for entity extraction
+        self.entity_batch_size = _env_int("ENTITY_BATCH_SIZE", 64)
+        self.entity_n_process = _env_int("ENTITY_N_PROCESS", 1)
+
+        # Long inputs are split into overlapping token windows that fit each
+        # model (CHUNK_WINDOW_TOKENS=0 uses the model's own limit) and window
+        # scores are combined per incident ("mean" or "max"). Only the first
+        # ANALYSIS_MAX_TOKENS tokens are analysed, which bounds the latency of
+        # long descriptions and attached documents (0 removes the cap).
+        self.chunk_window_tokens = _env_int("CHUNK_WINDOW_TOKENS", 0)
+        self.chunk_overlap_tokens = _env_int("CHUNK_OVERLAP_TOKENS", 32)
+        self.analysis_max_tokens = _env_int("ANALYSIS_MAX_TOKENS", 1024)
+        self.classifier_chunk_aggregation = _env_str("CLASSIFIER_CHUNK_AGGREGATION", "mean")
+        self.sentiment_chunk_aggregation = _env_str("SENTIMENT_CHUNK_AGGREGATION", "max")
+        # Analyse incident text together with the text extracted from its documents
+        self.document_analysis_enabled = _env_bool("DOCUMENT_ANALYSIS_ENABLED", True)
+
+        # Transformer inference backend: torch, torch-int8, onnx or onnx-int8,
+        # overridable per model. ONNX models are read from onnx_model_dir.
+        self.inference_backend = _env_str("INFERENCE_BACKEND", "torch")
+        self.classifier_backend = _env_str("CLASSIFIER_BACKEND", self.inference_backend)
+        self.sentiment_backend = _env_str("SENTIMENT_BACKEND", self.inference_backend)
+        self.onnx_model_dir = _env_str("ONNX_MODEL_DIR", "models/onnx")
+
+        # Micro-batching of model inference across concurrent requests
+        self.batch_max_size = _env_int("INFERENCE_BATCH_MAX_SIZE", 16)
+        self.batch_max_wait_ms = _env_float("INFERENCE_BATCH_MAX_WAIT_MS", 10.0)
+
+        # Inference worker tier (0 workers runs models in the API process)
+        self.inference_workers = _env_int("INFERENCE_WORKERS", 2)
+        self.inference_torch_threads = _env_int(
+            "INFERENCE_TORCH_THREADS",
+            max(1, (os.cpu_count() or 1) // max(1, self.inference_workers))
+        )
+        self.inference_start_method = _env_str("INFERENCE_START_METHOD", "spawn")
+
+        # Admission control in front of inference: at most ADMISSION_MAX_CONCURRENT
+        # analyses run at once (0 sizes it from the pool: workers x batch size)
+        # and ADMISSION_MAX_QUEUE more wait by priority lane before requests are
+        # answered 503. Disabled, every request is admitted and only measured.
+        self.admission_enabled = _env_bool("ADMISSION_ENABLED", True)
+        self.admission_max_concurrent = _env_int("ADMISSION_MAX_CONCURRENT", 0)
+        self.admission_max_queue = _env_int("ADMISSION_MAX_QUEUE", 256)
+
+        # Batch sizes exercised by the warmup pass before reporting ready
+        self.warmup_batch_sizes = _env_int_list(
+            "WARMUP_BATCH_SIZES", sorted({1, self.batch_max_size})
+        )
+
+        # Per-stage timeouts (seconds) in analyze_incident; stages that overrun
+        # are reported in degraded_stages instead of failing the request
+        self.stage_timeout_classification = _env_float("STAGE_TIMEOUT_CLASSIFICATION", 10.0)
+        self.stage_timeout_sentiment = _env_float("STAGE_TIMEOUT_SENTIMENT", 5.0)
+        self.stage_timeout_entities = _env_float("STAGE_TIMEOUT_ENTITIES", 2.0)
+
+        # /incidents/analyze/batch: items per batched model call, the
+        # longest accepted NDJSON input line and the largest JSON list body
+        # (a list is parsed whole, so bigger batches must be sent as NDJSON)
+        self.analysis_batch_chunk_size = _env_int("ANALYSIS_BATCH_CHUNK_SIZE", 32)
+        self.analysis_batch_max_line_bytes = _env_int("ANALYSIS_BATCH_MAX_LINE_BYTES", 1024 * 1024)
+        self.analysis_batch_max_json_bytes = _env_int("ANALYSIS_BATCH_MAX_JSON_BYTES", 8 * 1024 * 1024)
+
+        # Document uploads are streamed to upload_dir in fixed-size chunks
+        self.upload_dir = _env_str("UPLOAD_DIR", "temp_uploads")
+        self.upload_chunk_bytes = _env_int("UPLOAD_CHUNK_BYTES", 1024 * 1024)
+        self.upload_max_file_bytes = _env_int("UPLOAD_MAX_FILE_BYTES", 20 * 1024 * 1024)
+        self.upload_max_request_bytes = _env_int("UPLOAD_MAX_REQUEST_BYTES", 50 * 1024 * 1024)
+
+        # OCR of uploaded documents. PDF pages with a text layer of at least
+        # PDF_TEXT_MIN_CHARS characters are read directly instead of OCR'd.
+        self.ocr_dpi = _env_int("OCR_DPI", 200)
+        self.ocr_lang = _env_str("OCR_LANG", "eng")
+        self.ocr_max_pages = _env_int("OCR_MAX_PAGES", 50)
+        self.ocr_workers = _env_int("OCR_WORKERS", max(1, (os.cpu_count() or 1) // 2))
+        self.pdf_text_min_chars = _env_int("PDF_TEXT_MIN_CHARS", 20)
+
+        # On-disk cache of extracted text keyed by document hash and OCR
+        # settings (0 bytes disables it)
+        self.ocr_cache_dir = _env_str("OCR_CACHE_DIR", "data/ocr_cache")
+        self.ocr_cache_max_bytes = _env_int("OCR_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+
+        # SQLite database for persistent state (incidents, document extraction jobs)
+        self.database_path = _env_str("DATABASE_PATH", "data/incidents.db")
+        self.document_job_workers = _env_int("DOCUMENT_JOB_WORKERS", 2)
+        self.incident_store_threads = _env_int("INCIDENT_STORE_THREADS", 4)
+        # Concurrent creates are group-committed in one transaction
+        self.incident_write_batch_size = _env_int("INCIDENT_WRITE_BATCH_SIZE", 64)
+        self.incident_write_max_wait_ms = _env_float("INCIDENT_WRITE_MAX_WAIT_MS", 2)
+        # Full-text search over incidents and their documents' text. Index
+        # updates are written in batches after the incident, off the request
+        self.search_enabled = _env_bool("SEARCH_ENABLED", True)
+        self.search_index_batch_size = _env_int("SEARCH_INDEX_BATCH_SIZE", 256)
+        self.search_index_max_wait_ms = _env_float("SEARCH_INDEX_MAX_WAIT_MS", 50)
+        # Per-minute metric buckets older than this are pruned; hourly ones are kept
+        self.metrics_minute_retention_hours = _env_int("METRICS_MINUTE_RETENTION_HOURS", 48)
+
+        # Classifier cascade: a student distilled from the zero-shot model
+        # (python -m app.models.distill) answers incidents it is at least
+        # CLASSIFIER_CASCADE_THRESHOLD confident about and escalates the rest.
+        # Without a student file, or one trained for another teacher, every
+        # incident goes to the zero-shot model. CLASSIFIER_CASCADE_AUDIT_RATE
+        # of the student's answers are re-checked by the teacher to measure
+        # live agreement.
+        self.classifier_cascade_enabled = _env_bool("CLASSIFIER_CASCADE_ENABLED", True)
+        self.classifier_student_path = _env_str("CLASSIFIER_STUDENT_PATH", "models/classifier_student.npz")
+        self.classifier_cascade_threshold = _env_float("CLASSIFIER_CASCADE_THRESHOLD", 0.8)
+        self.classifier_cascade_audit_rate = _env_float("CLASSIFIER_CASCADE_AUDIT_RATE", 0.02)
+
+        # Embedding shortlist ahead of zero-shot classification (0 disables).
+        # Shortlisted scores are a softmax over the k candidates only, so the
+        # confidence returned (and compared against the min confidence for
+        # the full-label fallback) runs higher than with every label scored;
+        # off by default so confidence keeps its meaning unless opted into
+        self.embedding_model = _env_str(
+            "EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"
+        )
+        self.classifier_shortlist_k = _env_int("CLASSIFIER_SHORTLIST_K", 0)
+        self.classifier_shortlist_min_confidence = _env_float(
+            "CLASSIFIER_SHORTLIST_MIN_CONFIDENCE", 0.5
+        )
+
+        # Similar-incident search and duplicate flagging over incident
+        # embeddings (an empty index path keeps the index in memory only)
+        self.similarity_enabled = _env_bool("SIMILARITY_ENABLED", True)
+        self.similarity_index_path = _env_str("SIMILARITY_INDEX_PATH", "data/incident_vectors")
+        self.duplicate_threshold = _env_float("DUPLICATE_THRESHOLD", 0.92)
+        self.duplicate_max_results = _env_int("DUPLICATE_MAX_RESULTS", 3)
+        self.stage_timeout_embedding = _env_float("STAGE_TIMEOUT_EMBEDDING", 5.0)
+        # Past the threshold the index is k-means partitioned and searches
+        # probe only the nearest lists (SIMILARITY_NLIST=0 keeps search exact)
+        self.similarity_nlist = _env_int("SIMILARITY_NLIST", 1024)
+        self.similarity_nprobe = _env_int("SIMILARITY_NPROBE", 8)
+        self.similarity_train_threshold = _env_int("SIMILARITY_TRAIN_THRESHOLD", 50000)
+        # Seconds between catch-up passes in which an in-memory index (no
+        # SIMILARITY_INDEX_PATH) embeds incidents created by other processes
+        # sharing the database (0 disables; app.serve turns it on). Index
+        # files are shared by every process instead, with nothing to catch up
+        self.similarity_sync_interval_s = _env_float("SIMILARITY_SYNC_INTERVAL_S", 0.0)
+
+        # Set by app.serve in each forked API worker (0..workers-1); None when
+        # the app runs as a single process
+        self.prefork_worker = None
+
+        # Prometheus exposition at /metrics; SERVER_TIMING adds a per-request
+        # stage breakdown header to every response
+        self.metrics_enabled = _env_bool("METRICS_ENABLED", True)
+        self.server_timing_enabled = _env_bool("SERVER_TIMING", False)
+
+        # Cache of CombinedAnalysis results keyed on normalised incident text
+        # (backend: memory, redis or none; TTL of 0 disables expiry)
+        self.analysis_cache_backend = _env_str("ANALYSIS_CACHE_BACKEND", "memory")
+        self.analysis_cache_max_entries = _env_int("ANALYSIS_CACHE_MAX_ENTRIES", 10000)
+        self.analysis_cache_ttl_s = _env_float("ANALYSIS_CACHE_TTL_S", 0.0)
+        self.analysis_cache_redis_url = _env_str(
+            "ANALYSIS_CACHE_REDIS_URL", "redis://localhost:6379/0"
+        )
+
+    def classifier_fingerprint(self) -> str:
+        # The zero-shot model a distilled student was trained to imitate
+        return f"{self.model_profile}|{self.classifier_model}:{self.classifier_backend}"
+
+    def cascade_fingerprint(self) -> str:
+        if not self.classifier_cascade_enabled:
+            return ""
+        try:
+            stat = os.stat(self.classifier_student_path)
+        except OSError:
+            return ""
+        return f"cascade={self.classifier_cascade_threshold}:{int(stat.st_mtime)}:{stat.st_size}"
+
+    def keywords_fingerprint(self) -> str:
+        # Urgency and resolution-time results come from this lexicon
+        if not self.urgency_keywords_path:
+            return ""
+        try:
+            with open(self.urgency_keywords_path, "rb") as f:
+                digest = hashlib.sha1(f.read()).hexdigest()[:16]
+        except OSError:
+            return f"keywords={self.urgency_keywords_path}:missing"
+        return f"keywords={digest}"
+
+    def model_fingerprint(self) -> str:
+        # Everything that can change analysis output for the same text
+        return "|".join([
+            self.model_profile,
+            f"{self.classifier_model}:{self.classifier_backend}",
+            f"{self.sentiment_model}:{self.sentiment_backend}",
+            self.spacy_model,
+            f"chunks={self.chunk_window_tokens}:{self.chunk_overlap_tokens}:{self.analysis_max_tokens}:"
+            f"{self.classifier_chunk_aggregation}:{self.sentiment_chunk_aggregation}",
+            f"shortlist={self.classifier_shortlist_k}:{self.classifier_shortlist_min_confidence}",
+            self.embedding_model if self.classifier_shortlist_k else "",
+            self.cascade_fingerprint(),
+            self.keywords_fingerprint()
+        ])
+
+
+settings = Settings()
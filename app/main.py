@@ -1,55 +1,434 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Body, Depends
-from app.schemas.incident import IncidentInput, IncidentResponse, IncidentCreate
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Body, Depends, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import ValidationError
+from app.schemas.incident import (
+    IncidentInput,
+    IncidentResponse,
+    IncidentCreate,
+    IncidentPage,
+    IncidentSearchPage,
+    IncidentStatusUpdate,
+    SimilarIncident,
+    SimilarIncidents
+)
 from app.schemas.combined_analysis import CombinedAnalysis, Entity
-from app.models.classifier import IncidentClassifier
-from app.models.entity_extractor import EntityExtractor
-from app.models.sentiment_analyzer import SentimentAnalyzer
-from app.models.recommender import IncidentRecommender
-from app.utils.document_processor import DocumentProcessor
-from typing import List, Optional
+from app.models.classifier import CATEGORIES
+from app.models.entity_extractor import ANALYSIS_ENTITY_TYPES
+from app.models.recommender import IncidentRecommender, load_keyword_weights
+from app.utils.admission import LANES, AdmissionController, AdmissionRejected
+from app.utils.analysis_cache import build_analysis_cache
+from app.utils.document_processor import (
+    DocumentProcessor,
+    DocumentTooLargeError,
+    SavedDocument,
+    UnsupportedDocumentError
+)
+from app.utils.inference_pool import (
+    InferencePool,
+    WARMUP_TEXT,
+    classify_batch,
+    embed_batch,
+    extract_entities_batch,
+    sentiment_batch
+)
+from app.utils.incident_store import IncidentStore
+from app.utils.job_queue import DocumentJobQueue
+from app.utils.metrics import (
+    CONTENT_TYPE,
+    REGISTRY,
+    STAGE_FAILURES,
+    STAGE_SECONDS,
+    MetricsMiddleware,
+    process_memory_bytes,
+    process_rss_bytes,
+    record_timing
+)
+from app.utils.micro_batcher import MicroBatcher
+from app.utils.ocr_cache import OcrCache
+from app.utils.vector_index import VectorIndex
+from app.utils.ndjson import dumps_line, iter_lines, iter_upload_chunks
+from app.config import settings
+from typing import Any, AsyncIterator, List, Literal, Optional, Tuple
+import asyncio
+import contextlib
 import os
 import json
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 
 app = FastAPI(title="AI Incident Management API")
 
-# Initialize all analyzers
-classifier = IncidentClassifier()
-extractor = EntityExtractor()
-sentiment_analyzer = SentimentAnalyzer()
-recommender = IncidentRecommender()
-doc_processor = DocumentProcessor(upload_dir="temp_uploads")
+# Cheap analyzers stay in the API process; model inference runs in the
+# worker pool created at startup
+recommender = IncidentRecommender(
+    keyword_weights=(
+        load_keyword_weights(settings.urgency_keywords_path)
+        if settings.urgency_keywords_path else None
+    )
+)
+doc_processor = DocumentProcessor(
+    upload_dir=settings.upload_dir,
+    chunk_size=settings.upload_chunk_bytes,
+    max_file_bytes=settings.upload_max_file_bytes,
+    ocr_dpi=settings.ocr_dpi,
+    ocr_lang=settings.ocr_lang,
+    ocr_max_pages=settings.ocr_max_pages,
+    ocr_workers=settings.ocr_workers,
+    pdf_text_min_chars=settings.pdf_text_min_chars,
+    ocr_cache=(
+        OcrCache(settings.ocr_cache_dir, settings.ocr_cache_max_bytes)
+        if settings.ocr_cache_max_bytes > 0 else None
+    )
+)
+analysis_cache = build_analysis_cache(settings)
+incident_store = IncidentStore(
+    settings.database_path,
+    threads=settings.incident_store_threads,
+    minute_retention_hours=settings.metrics_minute_retention_hours
+)
+# Concurrent creates share one INSERT transaction
+incident_writer = MicroBatcher(
+    "incident_writes",
+    incident_store.add_many_sync,
+    max_batch_size=settings.incident_write_batch_size,
+    max_wait_ms=settings.incident_write_max_wait_ms,
+    runner=incident_store.run
+)
+# Search index updates are batched separately: a create does not wait for them
+search_writer = MicroBatcher(
+    "search_index",
+    incident_store.index_sync,
+    max_batch_size=settings.search_index_batch_size,
+    max_wait_ms=settings.search_index_max_wait_ms,
+    runner=incident_store.run
+)
+document_jobs = DocumentJobQueue(
+    settings.database_path,
+    doc_processor,
+    workers=settings.document_job_workers
+)
+inference_pool: Optional[InferencePool] = None
+classification_batcher: Optional[MicroBatcher] = None
+sentiment_batcher: Optional[MicroBatcher] = None
+embedding_batcher: Optional[MicroBatcher] = None
+admission: Optional[AdmissionController] = None
+# Built once the embedding model is up, since its size sets the dimension
+similarity_index: Optional[VectorIndex] = None
+
+@app.on_event("startup")
+async def start_inference_pool():
+    global inference_pool, classification_batcher, sentiment_batcher, embedding_batcher, admission
+
+    inference_pool = InferencePool(
+        workers=settings.inference_workers,
+        torch_threads=settings.inference_torch_threads,
+        start_method=settings.inference_start_method
+    )
+    # Models load and warm up in the background so the server starts
+    # answering health checks immediately
+    asyncio.get_running_loop().create_task(
+        inference_pool.start(settings.warmup_batch_sizes)
+    )
+
+    # Concurrent requests are grouped into batched pipeline calls
+    classification_batcher = MicroBatcher(
+        "classifier",
+        classify_batch,
+        max_batch_size=settings.batch_max_size,
+        max_wait_ms=settings.batch_max_wait_ms,
+        runner=inference_pool.run,
+        max_in_flight=inference_pool.size
+    )
+    sentiment_batcher = MicroBatcher(
+        "sentiment",
+        sentiment_batch,
+        max_batch_size=settings.batch_max_size,
+        max_wait_ms=settings.batch_max_wait_ms,
+        runner=inference_pool.run,
+        max_in_flight=inference_pool.size
+    )
+
+    embedding_batcher = MicroBatcher(
+        "embedding",
+        embed_batch,
+        max_batch_size=settings.batch_max_size,
+        max_wait_ms=settings.batch_max_wait_ms,
+        runner=inference_pool.run,
+        max_in_flight=inference_pool.size
+    )
+
+    # Enough concurrent analyses to fill every worker's batches; the rest
+    # queue by priority instead of piling up in the batchers
+    admission = AdmissionController(
+        max_concurrent=(
+            (settings.admission_max_concurrent or inference_pool.size * settings.batch_max_size)
+            if settings.admission_enabled else None
+        ),
+        max_queue=settings.admission_max_queue
+    )
+
+@app.on_event("startup")
+async def start_similarity_index():
+    if settings.similarity_enabled:
+        asyncio.get_running_loop().create_task(_build_similarity_index())
+
+async def _build_similarity_index():
+    """Open the vector index and embed any stored incidents it is missing."""
+    global similarity_index
+    if not await inference_pool.wait_ready():
+        return
+    try:
+        # Forked workers share the index files: each appends the incidents it
+        # creates and reads the others' rows from the same memory map
+        path = settings.similarity_index_path or None
+        probe = await embedding_batcher.submit(WARMUP_TEXT)
+        index = await asyncio.to_thread(
+            VectorIndex,
+            len(probe),
+            path=path,
+            model_name=settings.embedding_model,
+            nlist=settings.similarity_nlist,
+            nprobe=settings.similarity_nprobe,
+            train_threshold=settings.similarity_train_threshold
+        )
+        similarity_index = index
+        
+        # Stored incidents missing from a shared index are embedded by one
+        # worker only
+        cursor, backfilled = 0, 0
+        if path is None or settings.prefork_worker in (None, 0):
+            cursor, backfilled = await _sync_similarity_index(index, 0)
+        print(f"Similarity index ready: {len(index)} incidents, {backfilled} newly embedded")
+    except Exception as e:
+        print(f"Similarity index error: {str(e)}")
+        return
 
-# In-memory storage for incidents
-incidents = []
-current_id = 1
+    # An in-memory index only learns of incidents created by other processes
+    # by embedding them itself
+    while path is None and settings.similarity_sync_interval_s > 0:
+        await asyncio.sleep(settings.similarity_sync_interval_s)
+        try:
+            # Ids are allocated before their rows commit, so recent ids are
+            # rescanned in case a lower one landed after a higher one
+            cursor, _ = await _sync_similarity_index(index, max(0, cursor - SIMILARITY_SYNC_OVERLAP))
+        except Exception as e:
+            print(f"Similarity index sync error: {str(e)}")
+
+# Ids behind the highest seen that each catch-up pass looks at again
+SIMILARITY_SYNC_OVERLAP = 1024
+
+async def _sync_similarity_index(index: VectorIndex, cursor: int) -> Tuple[int, int]:
+    """Embed stored incidents after ``cursor`` that the index is missing.
+
+    Returns the highest incident id seen and the number embedded.
+    """
+    embedded = 0
+    while True:
+        rows = await incident_store.texts_after(cursor, 256)
+        if not rows:
+            return cursor, embedded
+        cursor = rows[-1][0]
+        missing = set(await asyncio.to_thread(index.missing, [incident_id for incident_id, _ in rows]))
+        rows = [(incident_id, text) for incident_id, text in rows if incident_id in missing]
+        if rows:
+            # Background work: waits behind requests but is never rejected
+            async with admission.slot("bulk", bounded=False):
+                vectors = await inference_pool.run(embed_batch, [text for _, text in rows])
+            await asyncio.to_thread(index.add, [incident_id for incident_id, _ in rows], vectors)
+            embedded += len(rows)
+
+@app.on_event("startup")
+async def start_search_index():
+    if settings.search_enabled:
+        asyncio.get_running_loop().create_task(_backfill_search_index())
+
+async def _backfill_search_index():
+    try:
+        indexed = await incident_store.run(incident_store.backfill_search_sync)
+        if indexed:
+            print(f"Search index: {indexed} stored incidents indexed")
+    except Exception as e:
+        print(f"Search index backfill error: {str(e)}")
+
+# Index writes in flight; holding them keeps the tasks from being collected
+_search_updates = set()
+
+def _index_incident(update: dict):
+    """Queue a search index update without waiting for it."""
+    if not settings.search_enabled:
+        return
+    task = asyncio.get_running_loop().create_task(search_writer.submit(update))
+    _search_updates.add(task)
+    task.add_done_callback(_search_update_done)
+
+def _search_update_done(task: asyncio.Task):
+    _search_updates.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Search index error: {str(task.exception())}")
+
+@app.on_event("startup")
+async def start_document_jobs():
+    if settings.document_analysis_enabled or settings.search_enabled:
+        document_jobs.on_complete = _documents_extracted
+    # Forked workers share the jobs table with live peers; app.serve requeues
+    # interrupted jobs once before forking instead
+    await document_jobs.start(recover_running=settings.prefork_worker is None)
+
+async def _documents_extracted(incident_id: int, texts: List[str]) -> Optional[dict]:
+    _index_incident({"id": incident_id, "documents": "\n".join(texts)})
+    if not settings.document_analysis_enabled:
+        return None
+    analysis = await _analyze_documents(incident_id, texts)
+    if analysis is not None:
+        # Entities found in the documents as well as the description
+        _index_incident({
+            "id": incident_id,
+            "entities": " ".join(entity["entity"] for entity in analysis["entities"] or [])
+        })
+    return analysis
+
+async def _analyze_documents(incident_id: int, texts: List[str]) -> Optional[dict]:
+    """Analyse an incident together with the text extracted from its documents."""
+    incident = await incident_store.get(incident_id)
+    if incident is None:
+        return None
+    # Long documents are cut at ANALYSIS_MAX_TOKENS by the models' windowing.
+    # Background work waits behind interactive requests but is never rejected
+    async with admission.slot("bulk", bounded=False):
+        analysis = await _analyze(IncidentInput(
+            title=incident["title"],
+            description="\n".join([incident["description"]] + texts)
+        ))
+    return analysis.model_dump()
+
+@app.on_event("shutdown")
+async def stop_inference_pool():
+    if inference_pool is not None:
+        inference_pool.shutdown()
+    await document_jobs.stop()
+    doc_processor.shutdown()
+    incident_store.close()
+
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    # Reject oversized document uploads from the header, before the body is
+    # parsed and spooled. Only incident creation saves documents: the batch
+    # endpoint streams its multipart NDJSON file and has no size limit
+    content_length = request.headers.get("content-length")
+    if (
+        request.url.path == "/incidents/create"
+        and request.headers.get("content-type", "").startswith("multipart/form-data")
+        and content_length is not None
+        and content_length.isdigit()
+        and int(content_length) > settings.upload_max_request_bytes
+    ):
+        return JSONResponse(
+            status_code=413,
+            content={"detail": f"Request exceeds the {settings.upload_max_request_bytes} byte upload limit"}
+        )
+    return await call_next(request)
+
+@app.middleware("http")
+async def admit_incident_creates(request: Request, call_next):
+    # FastAPI reads and spools File(...) uploads before the handler runs, so
+    # a saturated service turns creates away here, from the query string
+    if request.url.path == "/incidents/create" and admission is not None:
+        params = request.query_params
+        priority = params.get("priority")
+        lane = _priority_lane(
+            params.get("title", ""),
+            params.get("description", ""),
+            priority if priority in LANES else None
+        )
+        try:
+            admission.check(lane)
+        except AdmissionRejected as e:
+            return _admission_rejected_response(e)
+    return await call_next(request)
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected(request: Request, exc: AdmissionRejected):
+    return _admission_rejected_response(exc)
+
+def _admission_rejected_response(exc: AdmissionRejected) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "lane": exc.lane},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+Priority = Literal["urgent", "normal", "bulk"]
+
+def _priority_lane(title: str, description: str, priority: Optional[str] = None) -> str:
+    """Admission lane: the caller's priority, else urgent when impact keywords appear."""
+    if priority is not None:
+        return priority
+    # A few microseconds of keyword matching, well ahead of any model call
+    impact = recommender.keyword_matcher.score(f"{title} {description}", stop_at=1.0)
+    return "urgent" if impact >= 1 else "normal"
+
+# Added last so it wraps the upload limit too and sees its 413s
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware, server_timing=settings.server_timing_enabled)
+
+async def _save_documents(documents: List[UploadFile], incident_id: int) -> List[SavedDocument]:
+    saved_documents = []
+    remaining = settings.upload_max_request_bytes
+    try:
+        for doc in documents:
+            saved = await doc_processor.save_file(doc, incident_id, max_bytes=remaining)
+            saved_documents.append(saved)
+            remaining -= saved.size
+    except (UnsupportedDocumentError, DocumentTooLargeError) as e:
+        for saved in saved_documents:
+            doc_processor.remove(saved.path)
+        status_code = 415 if isinstance(e, UnsupportedDocumentError) else 413
+        raise HTTPException(status_code=status_code, detail=str(e))
+    except BaseException:
+        for saved in saved_documents:
+            doc_processor.remove(saved.path)
+        raise
+    return saved_documents
 
 @app.post("/incidents/create", response_model=IncidentResponse)
 async def create_incident(
     title: str,
     description: str,
-    documents: Optional[List[UploadFile]] = File(None)
+    # Plain List: FastAPI 0.104 fails to parse Optional[List[UploadFile]] form fields
+    documents: List[UploadFile] = File(None),
+    priority: Optional[Priority] = None
 ):
-    global current_id
-    
     incident = IncidentInput(title=title, description=description)
+    # Saturation was already checked by admit_incident_creates, before the
+    # uploads were read; the slot itself is taken before the id and files,
+    # so a 503 from a queue that filled up meanwhile leaves nothing behind
+    lane = _priority_lane(title, description, priority)
     
-    # First analyze the incident
-    analysis = await analyze_incident(incident)
-    
-    # Process documents if any
-    document_texts = []
-    if documents:
-        for doc in documents:
-            file_path = await doc_processor.save_file(doc, current_id)
-            extracted_text = doc_processor.extract_text(file_path)
-            document_texts.append(extracted_text)
-            # Clean up the file after extraction
-            os.remove(file_path)
+    async with admission.slot(lane):
+        # Ids come from the database so every API worker draws from one sequence
+        incident_id = await incident_store.allocate_id()
+        
+        # Save uploads first so oversized or unsupported files are rejected
+        # before any inference is spent on the incident
+        saved_documents = await _save_documents(documents or [], incident_id)
+        
+        try:
+            # First analyze the incident, embedding it for duplicate search alongside
+            analysis, embedding = await _analyze_admitted(incident, lane, embed=True, admitted=True)
+            
+            # Text extraction runs in the background; the job owns the files from here
+            document_job_id = None
+            if saved_documents:
+                document_job_id = await document_jobs.enqueue(incident_id, saved_documents, dispatch=False)
+        except BaseException:
+            # Clean up the files when the incident could not be created
+            for saved in saved_documents:
+                doc_processor.remove(saved.path)
+            raise
     
     # Create incident
     new_incident = {
-        "id": current_id,
+        "id": incident_id,
         "title": incident.title,
         "description": incident.description,
         "category": analysis.category,
@@ -57,42 +436,298 @@ async def create_incident(
         "status": "open",
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow(),
-        "document_count": len(documents) if documents else 0
+        "document_count": len(saved_documents),
+        "document_job_id": document_job_id
     }
     
-    incidents.append(new_incident)
-    current_id += 1
+    try:
+        await incident_writer.submit(new_incident)
+    except BaseException:
+        # The incident was never stored, so its documents must not be read
+        if document_job_id is not None:
+            await document_jobs.discard(document_job_id)
+        raise
+    # Started only once the incident is stored, so the job's analysis can
+    # read it back
+    if document_job_id is not None:
+        document_jobs.dispatch(document_job_id)
+    _index_incident({
+        "id": incident_id,
+        "title": incident.title,
+        "description": incident.description,
+        "entities": " ".join(entity.entity for entity in analysis.entities or [])
+    })
+    
+    if embedding is not None:
+        # The incident is already stored: an index failure must not turn it
+        # into an error the client would retry, creating a duplicate
+        try:
+            new_incident["possible_duplicates"] = await _similar_incidents(
+                embedding,
+                k=settings.duplicate_max_results,
+                min_score=settings.duplicate_threshold,
+                exclude_id=incident_id
+            )
+            await asyncio.to_thread(similarity_index.add, [incident_id], embedding)
+        except Exception as e:
+            print(f"Similarity index error for incident {incident_id}: {str(e)}")
     
     return new_incident
 
+async def _embed_incident(text: str):
+    # Similarity is best-effort: incidents are created without it on failure
+    if similarity_index is None:
+        return None
+    degraded: List[str] = []
+    return await _run_stage(
+        "embedding",
+        embedding_batcher.submit(text),
+        settings.stage_timeout_embedding,
+        degraded
+    )
+
+async def _similar_incidents(embedding, k: int, min_score: float = -1.0,
+                             exclude_id: Optional[int] = None) -> List[SimilarIncident]:
+    matches = await asyncio.to_thread(similarity_index.search, embedding, k, min_score, exclude_id)
+    stored = await incident_store.get_many([match_id for match_id, _ in matches])
+    return [
+        SimilarIncident(
+            id=match_id,
+            title=stored[match_id]["title"],
+            category=stored[match_id]["category"],
+            status=stored[match_id]["status"],
+            similarity=score
+        )
+        for match_id, score in matches
+        if match_id in stored
+    ]
+
+@app.get("/incidents", response_model=IncidentPage)
+async def list_incidents(
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+    urgency_level: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    cursor: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500)
+):
+    """List incidents newest first; follow ``next_cursor`` for further pages."""
+    return await incident_store.list(
+        status=status,
+        category=category,
+        urgency_level=urgency_level,
+        created_after=created_after,
+        created_before=created_before,
+        cursor=cursor,
+        limit=limit
+    )
+
+@app.get("/incidents/search", response_model=IncidentSearchPage)
+async def search_incidents(
+    q: str = Query(..., min_length=1, max_length=500),
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+    urgency_level: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    cursor: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500)
+):
+    """Search titles, descriptions, extracted entities and document text.
+
+    Every word and "quoted phrase" in ``q`` must match; ``word*`` matches a
+    prefix and ``-word`` excludes. Results are newest first with the same
+    filters and cursor as GET /incidents. Incidents become searchable a
+    moment after they are created.
+    """
+    if not settings.search_enabled:
+        raise HTTPException(status_code=404, detail="Search is disabled")
+    try:
+        return await incident_store.search(
+            q,
+            status=status,
+            category=category,
+            urgency_level=urgency_level,
+            created_after=created_after,
+            created_before=created_before,
+            cursor=cursor,
+            limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# The int convertor keeps fixed paths such as /incidents/metrics routable
+@app.get("/incidents/{incident_id:int}", response_model=IncidentResponse)
+async def get_incident(incident_id: int):
+    incident = await incident_store.get(incident_id)
+    if incident is None:
+        raise HTTPException(status_code=404, detail="Incident not found")
+    return incident
+
+@app.get("/incidents/{incident_id:int}/similar", response_model=SimilarIncidents)
+async def get_similar_incidents(incident_id: int, k: int = Query(5, ge=1, le=100)):
+    if similarity_index is None:
+        raise HTTPException(status_code=503, detail="Similarity index is not available yet")
+    embedding = await asyncio.to_thread(similarity_index.get, incident_id)
+    if embedding is None:
+        # Not indexed yet (e.g. still being backfilled): embed it now
+        incident = await incident_store.get(incident_id)
+        if incident is None:
+            raise HTTPException(status_code=404, detail="Incident not found")
+        async with admission.slot("normal"):
+            embedding = await _embed_incident(f"{incident['title']} {incident['description']}")
+        if embedding is None:
+            raise HTTPException(status_code=503, detail="Embedding model unavailable")
+    return SimilarIncidents(
+        incident_id=incident_id,
+        similar=await _similar_incidents(embedding, k=k, exclude_id=incident_id)
+    )
+
+@app.patch("/incidents/{incident_id:int}/status", response_model=IncidentResponse)
+async def update_incident_status(incident_id: int, update: IncidentStatusUpdate):
+    incident = await incident_store.update_status(incident_id, update.status)
+    if incident is None:
+        raise HTTPException(status_code=404, detail="Incident not found")
+    return incident
+
+def _observe_stage(name: str, mode: str, started: float):
+    elapsed = time.perf_counter() - started
+    STAGE_SECONDS.labels(name, mode).observe(elapsed)
+    record_timing(name, elapsed)
+
+async def _run_stage(name: str, coro, timeout: float, degraded: List[str], mode: str = "single"):
+    # Returns None (and records the stage as degraded) on timeout or error
+    started = time.perf_counter()
+    try:
+        return await asyncio.wait_for(coro, timeout)
+    except asyncio.TimeoutError:
+        print(f"{name} stage timed out after {timeout}s")
+        STAGE_FAILURES.labels(name, mode, "timeout").inc()
+    except Exception as e:
+        print(f"{name} stage error: {str(e)}")
+        STAGE_FAILURES.labels(name, mode, "error").inc()
+    finally:
+        _observe_stage(name, mode, started)
+    degraded.append(name)
+    return None
+
 @app.post("/incidents/analyze", response_model=CombinedAnalysis)
-async def analyze_incident(incident: IncidentInput):
+async def analyze_incident(incident: IncidentInput, priority: Optional[Priority] = None):
+    """Analyse an incident. ``priority`` overrides the admission lane picked
+    from urgency keywords when inference is saturated."""
+    lane = _priority_lane(incident.title, incident.description, priority)
+    analysis, _ = await _analyze_admitted(incident, lane)
+    return analysis
+
+async def _analyze_admitted(
+    incident: IncidentInput,
+    lane: str,
+    embed: bool = False,
+    admitted: bool = False
+) -> Tuple[CombinedAnalysis, Any]:
+    """Analysis and, with ``embed``, the incident's embedding (None when
+    similarity is unavailable); every model call holds one admission slot,
+    which ``admitted`` callers already hold."""
+    # Resubmitted incidents are answered from the cache
+    cached = None
+    if analysis_cache is not None:
+        cached = await analysis_cache.get(incident.title, incident.description)
+    embed = embed and similarity_index is not None
+    if cached is not None and not embed:
+        return cached, None
+    
+    text = f"{incident.title} {incident.description}"
+    async with (contextlib.nullcontext() if admitted else admission.slot(lane)):
+        if cached is not None:
+            return cached, await _embed_incident(text)
+        if embed:
+            analysis, embedding = await asyncio.gather(_analyze(incident), _embed_incident(text))
+        else:
+            analysis, embedding = await _analyze(incident), None
+    
+    # Degraded results are not cached so the next request retries every stage
+    if analysis_cache is not None and not analysis.degraded_stages:
+        await analysis_cache.set(incident.title, incident.description, analysis)
+    
+    return analysis, embedding
+
+async def _ensure_models_ready():
+    if not await inference_pool.wait_ready():
+        raise HTTPException(
+            status_code=503,
+            detail=f"Inference models unavailable: {inference_pool.error}"
+        )
+
+async def _analyze(incident: IncidentInput) -> CombinedAnalysis:
+    await _ensure_models_ready()
     full_text = f"{incident.title} {incident.description}"
+    degraded: List[str] = []
     
-    # Get classification
-    category, confidence = classifier.classify(incident.title, incident.description)
+    async def classify_and_recommend():
+        # Get classification, then recommendations as soon as the category is known
+        classification = await _run_stage(
+            "classification",
+            classification_batcher.submit((incident.title, incident.description)),
+            settings.stage_timeout_classification,
+            degraded
+        )
+        category, confidence = classification or ("Platform Technical Issue", 0.5)
+        started = time.perf_counter()
+        recommendations, resolution_time = recommender.get_recommendations(
+            category=category,
+            description=full_text
+        )
+        _observe_stage("recommendation", "single", started)
+        return category, confidence, recommendations, resolution_time
     
-    # Get sentiment and urgency
-    sentiment, urgency = sentiment_analyzer.analyze(full_text)
+    # Get sentiment and urgency, and extract entities, alongside classification
+    (category, confidence, recommendations, resolution_time), sentiment_result, extracted_entities = (
+        await asyncio.gather(
+            classify_and_recommend(),
+            _run_stage(
+                "sentiment",
+                sentiment_batcher.submit(full_text),
+                settings.stage_timeout_sentiment,
+                degraded
+            ),
+            _run_stage(
+                "entities",
+                inference_pool.run(extract_entities_batch, [full_text], ANALYSIS_ENTITY_TYPES),
+                settings.stage_timeout_entities,
+                degraded
+            )
+        )
+    )
+    
+    return _compose_analysis(
+        category,
+        confidence,
+        recommendations,
+        resolution_time,
+        sentiment_result,
+        extracted_entities[0] if extracted_entities else None,
+        degraded
+    )
+
+def _compose_analysis(
+    category: str,
+    confidence: float,
+    recommendations: List[str],
+    resolution_time: str,
+    sentiment_result: Optional[Tuple[str, str]],
+    extracted_entities,
+    degraded: List[str]
+) -> CombinedAnalysis:
+    sentiment, urgency = sentiment_result or ("Unknown", "Medium")
     
-    # Extract entities
     entities = []
-    try:
-        extracted_entities = extractor.extract_entities(full_text)
+    if extracted_entities:
         entities = [
             Entity(entity=e.entity, type=e.type)
             for e in extracted_entities
-            if e.type in ["Tracking ID", "Product"]
+            if e.type in ANALYSIS_ENTITY_TYPES
         ]
-    except Exception as e:
-        print(f"Entity extraction error: {str(e)}")
-    
-    # Get recommendations
-    recommendations, resolution_time = recommender.get_recommendations(
-        category=category,
-        description=full_text,
-        urgency=urgency
-    )
     
     return CombinedAnalysis(
         category=category,
@@ -101,25 +736,207 @@ async def analyze_incident(incident: IncidentInput):
         urgency_level=urgency,
         entities=entities if entities else None,
         recommended_actions=recommendations,
-        estimated_resolution_time=resolution_time
+        estimated_resolution_time=resolution_time,
+        degraded_stages=degraded if degraded else None
     )
 
+async def _read_json_body(request: Request, limit: int) -> bytes:
+    # A JSON list is only parsed once complete, so its size is capped;
+    # NDJSON bodies stream item by item with no overall limit
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"JSON batch bodies are limited to {limit} bytes; send larger batches as application/x-ndjson"
+    )
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+        raise too_large
+    body = bytearray()
+    async for chunk in request.stream():
+        body.extend(chunk)
+        if len(body) > limit:
+            raise too_large
+    return bytes(body)
+
+async def _read_batch_items(request: Request) -> AsyncIterator[Tuple[int, object]]:
+    # Yields (index, IncidentInput) or (index, error message) per input item
+    content_type = request.headers.get("content-type", "")
+    
+    if content_type.startswith("application/json"):
+        try:
+            payload = json.loads(await _read_json_body(request, settings.analysis_batch_max_json_bytes))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON body: {str(e)}")
+        if not isinstance(payload, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON list of incidents")
+        for index, record in enumerate(payload):
+            yield index, _validate_incident(record)
+        return
+    
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Expected an NDJSON file in the 'file' field")
+        chunks = iter_upload_chunks(upload)
+    else:
+        # application/x-ndjson body streamed straight from the socket
+        chunks = request.stream()
+    
+    index = 0
+    async for line in iter_lines(chunks, settings.analysis_batch_max_line_bytes):
+        if isinstance(line, ValueError):
+            yield index, str(line)
+        else:
+            try:
+                yield index, _validate_incident(json.loads(line))
+            except ValueError as e:
+                yield index, f"Invalid JSON: {str(e)}"
+        index += 1
+
+def _validate_incident(record) -> object:
+    try:
+        return IncidentInput.model_validate(record)
+    except ValidationError as e:
+        return f"Invalid incident: {e.errors(include_url=False)}"
+
+async def _analyze_chunk(chunk: List[Tuple[int, object]]) -> List[bytes]:
+    async with admission.slot("bulk", bounded=False):
+        return await _analyze_chunk_admitted(chunk)
+
+async def _analyze_chunk_admitted(chunk: List[Tuple[int, object]]) -> List[bytes]:
+    lines = {}
+    pending = []
+    for index, item in chunk:
+        if isinstance(item, str):
+            lines[index] = dumps_line({"index": index, "error": item})
+            continue
+        cached = None
+        if analysis_cache is not None:
+            cached = await analysis_cache.get(item.title, item.description)
+        if cached is not None:
+            lines[index] = dumps_line({"index": index, "analysis": cached.model_dump()})
+        else:
+            pending.append((index, item))
+    
+    if pending:
+        texts = [f"{item.title} {item.description}" for _, item in pending]
+        degraded: List[str] = []
+        
+        # One batched call per model for the whole chunk, with the
+        # per-request stage timeouts scaled to the chunk size
+        classifications, sentiments, entities = await asyncio.gather(
+            _run_stage(
+                "classification",
+                inference_pool.run(classify_batch, [(item.title, item.description) for _, item in pending]),
+                settings.stage_timeout_classification * len(pending),
+                degraded,
+                mode="batch"
+            ),
+            _run_stage(
+                "sentiment",
+                inference_pool.run(sentiment_batch, texts),
+                settings.stage_timeout_sentiment * len(pending),
+                degraded,
+                mode="batch"
+            ),
+            _run_stage(
+                "entities",
+                inference_pool.run(extract_entities_batch, texts, ANALYSIS_ENTITY_TYPES),
+                settings.stage_timeout_entities * len(pending),
+                degraded,
+                mode="batch"
+            )
+        )
+        
+        categories = [
+            classifications[position] if classifications else ("Platform Technical Issue", 0.5)
+            for position in range(len(pending))
+        ]
+        started = time.perf_counter()
+        recommended = recommender.get_recommendations_many(
+            [(category, full_text) for (category, _), full_text in zip(categories, texts)]
+        )
+        _observe_stage("recommendation", "batch", started)
+        
+        for position, ((index, item), full_text) in enumerate(zip(pending, texts)):
+            try:
+                category, confidence = categories[position]
+                recommendations, resolution_time = recommended[position]
+                analysis = _compose_analysis(
+                    category,
+                    confidence,
+                    recommendations,
+                    resolution_time,
+                    sentiments[position] if sentiments else None,
+                    entities[position] if entities else None,
+                    list(degraded)
+                )
+                if analysis_cache is not None and not degraded:
+                    await analysis_cache.set(item.title, item.description, analysis)
+                lines[index] = dumps_line({"index": index, "analysis": analysis.model_dump()})
+            except Exception as e:
+                lines[index] = dumps_line({"index": index, "error": str(e)})
+    
+    return [lines[index] for index, _ in chunk]
+
+@app.post("/incidents/analyze/batch")
+async def analyze_incident_batch(request: Request):
+    """Analyze many incidents, streaming one NDJSON line per item.
+
+    Accepts a JSON list of incidents (up to ANALYSIS_BATCH_MAX_JSON_BYTES),
+    an application/x-ndjson body, or a multipart upload with an NDJSON file
+    in the ``file`` field. Each output line carries the input ``index`` and
+    either ``analysis`` or ``error``.
+    """
+    await _ensure_models_ready()
+    # Bulk work is checked once up front; chunks then wait for slots rather
+    # than failing halfway through the stream
+    admission.check("bulk")
+    items = _read_batch_items(request)
+    
+    # Pull the first item before streaming so malformed bodies still get a 400
+    try:
+        first = await items.__anext__()
+    except StopAsyncIteration:
+        first = None
+    
+    async def generate():
+        chunk = [first] if first is not None else []
+        in_flight = []
+        # At most pool-size chunks are held in memory at any time
+        async for entry in items:
+            chunk.append(entry)
+            if len(chunk) >= settings.analysis_batch_chunk_size:
+                in_flight.append(asyncio.ensure_future(_analyze_chunk(chunk)))
+                chunk = []
+                if len(in_flight) >= inference_pool.size:
+                    for line in await in_flight.pop(0):
+                        yield line
+        if chunk:
+            in_flight.append(asyncio.ensure_future(_analyze_chunk(chunk)))
+        for task in in_flight:
+            for line in await task:
+                yield line
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
 @app.get("/incidents/metrics")
 async def get_metrics():
     try:
-        total = len(incidents)
-        high_priority = sum(1 for inc in incidents if inc["urgency_level"] == "High")
-        open_incidents = sum(1 for inc in incidents if inc["status"] == "open")
-        resolved = sum(1 for inc in incidents if inc["status"] == "resolved")
+        # Counters are maintained on every write, so this never scans incidents
+        counters = await incident_store.counters()
+        by_status = counters["status"]
+        by_urgency = counters["urgency_level"]
+        by_category = counters["category"]
         
         return {
-            "total_incidents": total,
-            "high_priority": high_priority,
-            "open": open_incidents,
-            "resolved": resolved,
+            "total_incidents": sum(by_status.values()),
+            "high_priority": by_urgency.get("High", 0),
+            "open": by_status.get("open", 0),
+            "resolved": by_status.get("resolved", 0),
             "by_category": {
-                category: sum(1 for inc in incidents if inc["category"] == category)
-                for category in classifier.categories
+                category: by_category.get(category, 0)
+                for category in CATEGORIES
             }
         }
     except Exception as e:
@@ -128,6 +945,143 @@ async def get_metrics():
             detail=f"Error fetching metrics: {str(e)}"
         )
 
+@app.get("/incidents/metrics/rollups")
+async def get_metric_rollups(
+    dimension: Literal["category", "urgency_level", "status"] = "category",
+    granularity: Literal["minute", "hour"] = "hour",
+    hours: float = Query(24, gt=0),
+    until: Optional[datetime] = None
+):
+    """Counts per time bucket over the last ``hours``, e.g. last 24h by category.
+
+    Category and urgency count created incidents; status counts incidents
+    entering each status.
+    """
+    end = until or datetime.utcnow()
+    if granularity == "minute" and hours > settings.metrics_minute_retention_hours:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Minute buckets cover at most {settings.metrics_minute_retention_hours} hours"
+        )
+    rollups = await incident_store.rollups(dimension, granularity, end - timedelta(hours=hours), end)
+    return {"dimension": dimension, "granularity": granularity, **rollups}
+
+@app.get("/jobs/stats")
+async def get_job_stats():
+    return document_jobs.stats()
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await document_jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/jobs/{job_id}/documents/{position}/text")
+async def get_job_document_text(job_id: str, position: int):
+    document = await document_jobs.get_document_text(job_id, position)
+    if document is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return document
+
+@app.get("/health/live")
+async def health_live():
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def health_ready():
+    # Traffic should only be routed here once every model is loaded and warm
+    health = inference_pool.health() if inference_pool is not None else {"state": "starting"}
+    if health["state"] != "ready":
+        return JSONResponse(status_code=503, content=health)
+    return health
+
+@app.get("/inference/stats")
+async def get_inference_stats():
+    return {
+        "classifier": classification_batcher.stats(),
+        "sentiment": sentiment_batcher.stats(),
+        "embedding": embedding_batcher.stats(),
+        "pool": inference_pool.stats(),
+        "admission": admission.stats(),
+        "similarity_index": similarity_index.stats() if similarity_index is not None else None,
+        "analysis_cache": analysis_cache.stats() if analysis_cache is not None else None
+    }
+
+def _runtime_metrics():
+    """Gauges read when /metrics is scraped rather than kept up to date."""
+    batchers = [
+        batcher for batcher in (classification_batcher, sentiment_batcher, embedding_batcher, incident_writer, search_writer)
+        if batcher is not None
+    ]
+    yield (
+        "micro_batcher_queue_depth", "gauge", "Items waiting in each micro-batcher queue",
+        [({"batcher": batcher.name}, batcher.queue_depth) for batcher in batchers]
+    )
+    if admission is not None:
+        yield (
+            "admission_queue_depth", "gauge", "Requests waiting for an inference slot, by priority lane",
+            [({"lane": lane}, admission.queue_depth(lane)) for lane in admission.lanes]
+        )
+        yield (
+            "admission_running", "gauge", "Requests holding an inference slot",
+            [({}, admission.running)]
+        )
+    jobs = document_jobs.stats()
+    yield (
+        "document_job_queue_depth", "gauge", "Document extraction jobs waiting for a worker",
+        [({}, jobs["queue_depth"])]
+    )
+    yield (
+        "document_jobs_running", "gauge", "Document extraction jobs in progress",
+        [({}, jobs["running"])]
+    )
+
+    role = "api" if settings.prefork_worker is None else f"api_worker_{settings.prefork_worker}"
+    rss = [({"role": role, "pid": str(os.getpid())}, process_rss_bytes())]
+    if inference_pool is not None:
+        yield (
+            "inference_pool_pending_tasks", "gauge", "Tasks submitted to the inference pool and not yet finished",
+            [({}, inference_pool.pending)]
+        )
+        if inference_pool.startup_s is not None:
+            yield (
+                "inference_pool_startup_seconds", "gauge", "Time to load and warm up every model",
+                [({}, inference_pool.startup_s)]
+            )
+        load_times = []
+        for pid, snapshot in inference_pool.worker_stats.items():
+            for model, state in snapshot["models"].items():
+                if "load_s" in state:
+                    load_times.append(({"model": model, "pid": str(pid)}, state["load_s"]))
+            if pid != os.getpid():
+                rss.append(({"role": "inference_worker", "pid": str(pid)}, process_rss_bytes(pid)))
+        yield "model_load_seconds", "gauge", "Model load time per inference worker", load_times
+
+    yield (
+        "process_resident_memory_bytes", "gauge", "Resident memory of the API and inference worker processes",
+        [(labels, value) for labels, value in rss if value is not None]
+    )
+    # Shared-page-aware figures; RSS counts weights shared after a fork in every process
+    memory = [(labels, process_memory_bytes(int(labels["pid"]))) for labels, _ in rss]
+    memory = [(labels, usage) for labels, usage in memory if usage is not None]
+    yield (
+        "process_proportional_memory_bytes", "gauge", "PSS: shared pages split across the processes mapping them",
+        [(labels, usage["pss"]) for labels, usage in memory]
+    )
+    yield (
+        "process_unique_memory_bytes", "gauge", "USS: pages private to the process",
+        [(labels, usage["uss"]) for labels, usage in memory]
+    )
+
+REGISTRY.add_collector(_runtime_metrics)
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,44 @@
+from transformers import AutoTokenizer, pipeline
+import os
+import torch
+
+# fp32 torch, dynamic-int8 torch, exported ONNX and its int8-quantized variant
+BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+ONNX_FILE = "model.onnx"
+ONNX_QUANTIZED_FILE = "model_quantized.onnx"
+
+
+def onnx_model_path(onnx_dir: str, model_name: str) -> str:
+    return os.path.join(onnx_dir, model_name.replace("/", "--"))
+
+
+def build_pipeline(task: str, model_name: str, backend: str = "torch", onnx_dir: str = "models/onnx"):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {BACKENDS}")
+
+    if backend in ("torch", "torch-int8"):
+        pipe = pipeline(task, model=model_name, device=-1)  # Use CPU
+        if backend == "torch-int8":
+            # Weights of every Linear layer are stored as int8 and activations
+            # quantized on the fly; no calibration data needed
+            pipe.model = torch.quantization.quantize_dynamic(
+                pipe.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        return pipe
+
+    # ONNX models are produced offline by `python -m app.models.export`; both
+    # need the packages in requirements-optional.txt
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+
+    path = onnx_model_path(onnx_dir, model_name)
+    file_name = ONNX_QUANTIZED_FILE if backend == "onnx-int8" else ONNX_FILE
+    if not os.path.exists(os.path.join(path, file_name)):
+        raise FileNotFoundError(
+            f"{os.path.join(path, file_name)} not found; run "
+            f"`python -m app.models.export --model {model_name}"
+            f"{' --quantize' if backend == 'onnx-int8' else ''}` first"
+        )
+    model = ORTModelForSequenceClassification.from_pretrained(path, file_name=file_name)
+    tokenizer = AutoTokenizer.from_pretrained(path)
+    return pipeline(task, model=model, tokenizer=tokenizer, device=-1)
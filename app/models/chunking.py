@@ -0,0 +1,125 @@
+import re
+from typing import List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+WORD = re.compile(r"\S+")
+
+# Tokenizers without a real limit report this sentinel as model_max_length
+_UNBOUNDED = 1_000_000
+
+
+class Window(NamedTuple):
+    # Index of the input text this window was cut from
+    owner: int
+    text: str
+    tokens: int
+
+
+def model_window(tokenizer, model=None, reserved: int = 0, limit: int = 0) -> int:
+    """Tokens of text per window: the model's input size minus ``reserved``
+    for special tokens and anything else sent alongside (e.g. a hypothesis),
+    optionally capped lower by ``limit``."""
+    size = getattr(tokenizer, "model_max_length", 0) or 0
+    if not size or size >= _UNBOUNDED:
+        # Fall back to the model's position embeddings
+        size = getattr(getattr(model, "config", None), "max_position_embeddings", None) or 512
+    size = max(16, size - reserved)
+    return min(size, limit) if limit > 0 else size
+
+
+class TokenWindower:
+    """Cuts texts into overlapping windows that each fit a model's input.
+
+    Each batch of texts is tokenized once, with offsets, and windows are
+    sliced out of the original strings at token boundaries, so the models'
+    own calls (pipelines, ONNX runtimes) take them unchanged. Only the first
+    ``max_tokens`` tokens of a text are kept, which bounds the work per
+    incident however long its description or attached documents are.
+    Without a tokenizer, whitespace-separated words count as tokens.
+    """
+
+    def __init__(self, tokenizer=None, window_tokens: int = 512, overlap_tokens: int = 32,
+                 max_tokens: int = 2048):
+        self.tokenizer = tokenizer
+        self.window_tokens = max(1, window_tokens)
+        self.overlap_tokens = max(0, min(overlap_tokens, self.window_tokens // 2))
+        self.max_tokens = max_tokens if max_tokens > 0 else None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.texts = 0
+        self.windows = 0
+        # Texts cut at max_tokens
+        self.capped = 0
+
+    def _offsets(self, texts: List[str]) -> List[Sequence]:
+        if self.tokenizer is not None:
+            try:
+                encoding = self.tokenizer(
+                    texts, add_special_tokens=False, return_offsets_mapping=True, verbose=False
+                )
+                return encoding["offset_mapping"]
+            except NotImplementedError:
+                # Slow (pure Python) tokenizers cannot return offsets
+                pass
+        return [[match.span() for match in WORD.finditer(text)] for text in texts]
+
+    def split(self, texts: List[str], token_lengths: Optional[List[int]] = None) -> List[Window]:
+        """Windows of every text in order; ``token_lengths`` is extended with
+        each text's token count before capping."""
+        windows = []
+        step = self.window_tokens - self.overlap_tokens
+        for owner, (text, offsets) in enumerate(zip(texts, self._offsets(texts))):
+            self.texts += 1
+            if token_lengths is not None:
+                token_lengths.append(len(offsets))
+            capped = self.max_tokens is not None and len(offsets) > self.max_tokens
+            if capped:
+                offsets = offsets[:self.max_tokens]
+                self.capped += 1
+            if len(offsets) <= self.window_tokens:
+                # The common case: the text fits in one window
+                windows.append(Window(owner, text[:offsets[-1][1]] if capped else text, len(offsets)))
+                continue
+            for start in range(0, len(offsets), step):
+                stop = min(start + self.window_tokens, len(offsets))
+                windows.append(Window(owner, text[offsets[start][0]:offsets[stop - 1][1]], stop - start))
+                if stop == len(offsets):
+                    break
+        self.windows += len(windows)
+        return windows
+
+    def stats(self) -> dict:
+        return {
+            "window_tokens": self.window_tokens,
+            "overlap_tokens": self.overlap_tokens,
+            "max_tokens": self.max_tokens,
+            "texts": self.texts,
+            "windows": self.windows,
+            "capped": self.capped,
+            "avg_windows": self.windows / self.texts if self.texts else 0.0
+        }
+
+
+def aggregate(windows: List[Window], scores: Sequence, count: int, method: str = "mean") -> List[np.ndarray]:
+    """Combine per-window score vectors into one vector per owner text.
+
+    ``mean`` weights each window by its token count, so a short trailing
+    window does not count as much as a full one; ``max`` keeps the highest
+    score of any window for every entry. Windows of one owner must score
+    the same entries; different owners may score different ones.
+    """
+    grouped = [[] for _ in range(count)]
+    weights = [[] for _ in range(count)]
+    for window, row in zip(windows, scores):
+        grouped[window.owner].append(row)
+        weights[window.owner].append(max(1, window.tokens))
+    combined = []
+    for rows, row_weights in zip(grouped, weights):
+        rows = np.asarray(rows, dtype=np.float64)
+        if method == "max":
+            combined.append(rows.max(axis=0))
+        else:
+            combined.append(np.average(rows, axis=0, weights=row_weights))
+    return combined
@@ -1,75 +1,245 @@
-from transformers import pipeline
-from typing import Tuple
+from app.models.backends import build_pipeline
+from app.models.chunking import TokenWindower, aggregate, model_window
+from typing import List, Tuple
+import numpy as np
 import torch
 
+# Updated categories based on TRACE's commodity trading context
+CATEGORIES = [
+    # Documentation & Compliance
+    "Documentation Issue",        # Missing/incorrect trade documents
+    "Compliance Violation",       # KYC/regulatory compliance issues
+    "Contract Issue",            # Contract-related problems
+    
+    # Logistics & Shipment
+    "Shipment Delay",            # Delays in transportation
+    "Damaged Goods",             # Physical damage to goods
+    "Quality Control",           # Product quality issues
+    "Storage Issue",             # Warehouse/storage problems
+    "Transportation Issue",       # Vehicle/carrier problems
+    
+    # Financial & Payment
+    "Payment Issue",             # Payment delays or problems
+    "Financing Problem",         # Issues with trade financing
+    "Currency Risk",             # Exchange rate/currency issues
+    
+    # Technical & System
+    "Platform Technical Issue",   # TRACE system technical problems
+    "Integration Error",          # Issues with external system integration
+    "Data Synchronization",       # Data consistency problems
+    
+    # Trade Operations
+    "Aggregation Issue",         # Problems with commodity aggregation
+    "Verification Failure",       # Buyer/seller verification issues
+    "Trade Execution Error",      # Issues in trade execution
+    
+    # Communication & Support
+    "Communication Breakdown",    # Issues in stakeholder communication
+    "Stakeholder Dispute",        # Conflicts between parties
+    
+    # Supply Chain
+    "Supply Shortage",           # Issues with commodity availability
+    "Quality Assurance",         # Product quality control issues
+    "Traceability Issue"         # Problems with product tracing
+]
+
+# Short descriptions used by the embedding shortlist stage
+CATEGORY_DESCRIPTIONS = {
+    "Documentation Issue": "missing or incorrect trade documents",
+    "Compliance Violation": "KYC or regulatory compliance issues",
+    "Contract Issue": "contract-related problems",
+    "Shipment Delay": "delays in transportation of a shipment",
+    "Damaged Goods": "physical damage to goods or cargo",
+    "Quality Control": "product quality issues",
+    "Storage Issue": "warehouse or storage problems",
+    "Transportation Issue": "vehicle or carrier problems",
+    "Payment Issue": "payment delays or problems",
+    "Financing Problem": "issues with trade financing",
+    "Currency Risk": "exchange rate or currency issues",
+    "Platform Technical Issue": "TRACE system technical problems",
+    "Integration Error": "issues with external system integration",
+    "Data Synchronization": "data consistency problems",
+    "Aggregation Issue": "problems with commodity aggregation",
+    "Verification Failure": "buyer or seller verification issues",
+    "Trade Execution Error": "issues in trade execution",
+    "Communication Breakdown": "issues in stakeholder communication",
+    "Stakeholder Dispute": "conflicts between parties",
+    "Supply Shortage": "issues with commodity availability",
+    "Quality Assurance": "product quality control issues",
+    "Traceability Issue": "problems with product tracing"
+}
+
 class IncidentClassifier:
-    def __init__(self):
-        self.classifier = pipeline(
+    def __init__(
+        self,
+        model_name: str = "facebook/bart-large-mnli",
+        backend: str = "torch",
+        onnx_dir: str = "models/onnx",
+        batch_size: int = 16,
+        embedder=None,
+        shortlist_k: int = 0,
+        shortlist_min_confidence: float = 0.5,
+        window_tokens: int = 0,
+        overlap_tokens: int = 32,
+        max_tokens: int = 1024,
+        aggregation: str = "mean"
+    ):
+        # Forward-pass batch size used when scoring several incidents at once
+        self.batch_size = batch_size
+        self.hypothesis_template = "This trade incident involves {}."
+        self.classifier = build_pipeline(
             "zero-shot-classification",
-            model="facebook/bart-large-mnli",
-            device=-1  # Use CPU
+            model_name,
+            backend=backend,
+            onnx_dir=onnx_dir
         )
         
-        # Updated categories based on TRACE's commodity trading context
-        self.categories = [
-            # Documentation & Compliance
-            "Documentation Issue",        # Missing/incorrect trade documents
-            "Compliance Violation",       # KYC/regulatory compliance issues
-            "Contract Issue",            # Contract-related problems
-            
-            # Logistics & Shipment
-            "Shipment Delay",            # Delays in transportation
-            "Damaged Goods",             # Physical damage to goods
-            "Quality Control",           # Product quality issues
-            "Storage Issue",             # Warehouse/storage problems
-            "Transportation Issue",       # Vehicle/carrier problems
-            
-            # Financial & Payment
-            "Payment Issue",             # Payment delays or problems
-            "Financing Problem",         # Issues with trade financing
-            "Currency Risk",             # Exchange rate/currency issues
-            
-            # Technical & System
-            "Platform Technical Issue",   # TRACE system technical problems
-            "Integration Error",          # Issues with external system integration
-            "Data Synchronization",       # Data consistency problems
-            
-            # Trade Operations
-            "Aggregation Issue",         # Problems with commodity aggregation
-            "Verification Failure",       # Buyer/seller verification issues
-            "Trade Execution Error",      # Issues in trade execution
-            
-            # Communication & Support
-            "Communication Breakdown",    # Issues in stakeholder communication
-            "Stakeholder Dispute",        # Conflicts between parties
-            
-            # Supply Chain
-            "Supply Shortage",           # Issues with commodity availability
-            "Quality Assurance",         # Product quality control issues
-            "Traceability Issue"         # Problems with product tracing
-        ]
+        self.categories = list(CATEGORIES)
+        self.category_descriptions = dict(CATEGORY_DESCRIPTIONS)
+
+        # Two-stage scoring: an embedding shortlist narrows the candidate labels
+        # and the NLI model only scores those. Shortlist results whose top score
+        # is below shortlist_min_confidence are re-scored on the full label set.
+        self.embedder = embedder
+        self.shortlist_k = shortlist_k if embedder is not None else 0
+        self.shortlist_min_confidence = shortlist_min_confidence
+        self.category_embeddings = None
+        if self.shortlist_k:
+            self.category_embeddings = self.embedder.embed([
+                f"{category}: {self.category_descriptions.get(category, category)}"
+                for category in self.categories
+            ])
+
+        self.entailment_id = self._entailment_id()
+        self.shortlist_stats = {"shortlisted": 0, "fallbacks": 0}
+
+        # Long texts are scored as windows that fit next to the longest
+        # hypothesis (plus the four separator tokens of a pair), and each
+        # label's probabilities are combined across an incident's windows
+        tokenizer = self.classifier.tokenizer
+        hypothesis_tokens = max(
+            len(tokenizer(self.hypothesis_template.format(category), add_special_tokens=False)["input_ids"])
+            for category in self.categories
+        )
+        self.windower = TokenWindower(
+            tokenizer,
+            window_tokens=model_window(
+                tokenizer, self.classifier.model, reserved=hypothesis_tokens + 4, limit=window_tokens
+            ),
+            overlap_tokens=overlap_tokens,
+            max_tokens=max_tokens
+        )
+        self.aggregation = aggregation
+
+    def _entailment_id(self) -> int:
+        for label, label_id in self.classifier.model.config.label2id.items():
+            if label.lower().startswith("entail"):
+                return label_id
+        return -1
 
     def classify(self, title: str, description: str) -> Tuple[str, float]:
+        return self.classify_many([(title, description)])[0]
+
+    def classify_many(self, items: List[Tuple[str, str]]) -> List[Tuple[str, float]]:
         # Combine title and description for better context
-        text = f"{title} {description}"
+        texts = [f"{title} {description}" for title, description in items]
         
         try:
-            # Perform classification with more specific hypothesis template
-            result = self.classifier(
-                text,
-                candidate_labels=self.categories,
-                hypothesis_template="This trade incident involves {}."
-            )
-            
-            # Convert logits to probabilities if needed
-            if isinstance(result['scores'], torch.Tensor):
-                scores = result['scores'].cpu().numpy().tolist()
-            else:
-                scores = result['scores']
-                
-            return result['labels'][0], scores[0]
+            if not self.shortlist_k:
+                return self._classify(texts, [self.categories] * len(texts))
+
+            shortlists = self.shortlist(texts, self.shortlist_k)
+            results = self._classify(texts, shortlists)
+            self.shortlist_stats["shortlisted"] += len(texts)
+
+            # Low-confidence shortlist results fall back to full scoring
+            uncertain = [
+                i for i, (_, score) in enumerate(results)
+                if score < self.shortlist_min_confidence
+            ]
+            if uncertain:
+                self.shortlist_stats["fallbacks"] += len(uncertain)
+                rescored = self._classify(
+                    [texts[i] for i in uncertain],
+                    [self.categories] * len(uncertain)
+                )
+                for i, result in zip(uncertain, rescored):
+                    results[i] = result
+
+            return results
             
         except Exception as e:
             # Fallback to default category if classification fails
             print(f"Classification error: {str(e)}")
-            return "Platform Technical Issue", 0.5
+            return [("Platform Technical Issue", 0.5) for _ in items]
+
+    def category_probabilities(self, items: List[Tuple[str, str]]) -> np.ndarray:
+        """Probability of every category for each (title, description), one row
+        per item in ``self.categories`` order, always over the full label set."""
+        texts = [f"{title} {description}" for title, description in items]
+        return np.vstack(self._combined(texts, [self.categories] * len(texts)))
+
+    def reset_stats(self):
+        self.shortlist_stats = {"shortlisted": 0, "fallbacks": 0}
+        self.windower.reset_stats()
+
+    def shortlist(self, texts: List[str], k: int) -> List[List[str]]:
+        """Return the k categories most similar to each text by embedding."""
+        similarities = self.embedder.embed(texts) @ self.category_embeddings.T
+        k = min(k, len(self.categories))
+        top = np.argsort(-similarities, axis=1)[:, :k]
+        return [[self.categories[j] for j in row] for row in top]
+
+    def _classify(self, texts: List[str], label_sets: List[List[str]]) -> List[Tuple[str, float]]:
+        results = []
+        for labels, combined in zip(label_sets, self._combined(texts, label_sets)):
+            best = int(combined.argmax())
+            results.append((labels[best], float(combined[best])))
+        return results
+
+    def _combined(self, texts: List[str], label_sets: List[List[str]]) -> List[np.ndarray]:
+        # All windows of all texts are scored in the same forward-pass batches
+        windows = self.windower.split(texts)
+        scores = self._score(
+            [window.text for window in windows],
+            [label_sets[window.owner] for window in windows]
+        )
+        return aggregate(windows, scores, len(texts), self.aggregation)
+
+    def _score(self, texts: List[str], label_sets: List[List[str]]) -> List[np.ndarray]:
+        """Probability of every candidate label, one array per text."""
+        # Build every premise/hypothesis pair up front so incidents with
+        # different candidate labels still share forward-pass batches
+        pairs = [
+            (text, self.hypothesis_template.format(label))
+            for text, labels in zip(texts, label_sets)
+            for label in labels
+        ]
+
+        tokenizer = self.classifier.tokenizer
+        model = self.classifier.model
+        entailment_logits = []
+        for start in range(0, len(pairs), self.batch_size):
+            chunk = pairs[start:start + self.batch_size]
+            inputs = tokenizer(
+                [premise for premise, _ in chunk],
+                [hypothesis for _, hypothesis in chunk],
+                padding=True,
+                truncation="only_first",
+                return_tensors="pt"
+            )
+            with torch.no_grad():
+                logits = model(**inputs).logits
+            entailment_logits.extend(logits[:, self.entailment_id].tolist())
+
+        results = []
+        offset = 0
+        for labels in label_sets:
+            # Softmax of the entailment logits across this text's candidates,
+            # matching the single-label zero-shot pipeline
+            logits = np.array(entailment_logits[offset:offset + len(labels)])
+            offset += len(labels)
+            scores = np.exp(logits - logits.max())
+            results.append(scores / scores.sum())
+
+        return results
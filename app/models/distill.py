@@ -0,0 +1,177 @@
+"""Distil the zero-shot classifier into the cascade's fast student.
+
+Usage:
+    python -m app.models.distill [--output PATH] [--limit 50000]
+        [--data incidents.jsonl] [--holdout 0.2] [--targets hard|soft]
+        [--thresholds 0.5,0.6,0.7,0.8,0.9,0.95] [--target-agreement 0.95]
+
+The configured classifier (the teacher) labels the stored incidents, or
+the JSONL file of {"title", "description"} records given with ``--data``,
+with its probabilities over every category. A softmax regression over
+hashed word features is fitted to those labels on all but a held-out
+share. On the held-out incidents, for each confidence threshold, the
+report gives the share the student would answer, its agreement with the
+teacher there, and the cascade's mean latency per incident. The threshold
+whose agreement first reaches ``--target-agreement`` is suggested for
+CLASSIFIER_CASCADE_THRESHOLD.
+
+The student is written to CLASSIFIER_STUDENT_PATH and picked up by the
+inference workers on their next start.
+"""
+import argparse
+import json
+import os
+import random
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.models.student import StudentClassifier
+
+
+def load_stored_incidents(limit: int) -> List[Tuple[str, str]]:
+    from app.utils.incident_store import IncidentStore
+
+    store = IncidentStore(settings.database_path, threads=1)
+    try:
+        return [(title, description) for title, description in store.newest_texts_sync(limit)]
+    finally:
+        store.close()
+
+
+def load_jsonl(path: str, limit: int) -> List[Tuple[str, str]]:
+    items = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                items.append((record["title"], record["description"]))
+                if len(items) >= limit:
+                    break
+    return items
+
+
+def label(teacher, items: List[Tuple[str, str]], batch_size: int) -> Tuple[np.ndarray, float]:
+    """Teacher probabilities for every item, and its mean seconds per item."""
+    rows = []
+    started = time.perf_counter()
+    for start in range(0, len(items), batch_size):
+        rows.append(teacher.category_probabilities(items[start:start + batch_size]))
+        done = min(start + batch_size, len(items))
+        if done % (batch_size * 20) == 0 or done == len(items):
+            print(f"Labelled {done}/{len(items)} incidents")
+    elapsed = time.perf_counter() - started
+    return np.vstack(rows), elapsed / max(1, len(items))
+
+
+def threshold_report(student, teacher_labels, items, thresholds, teacher_s) -> List[dict]:
+    started = time.perf_counter()
+    probabilities = student.predict_proba([f"{title} {description}" for title, description in items])
+    student_s = (time.perf_counter() - started) / max(1, len(items))
+    confidence = probabilities.max(axis=1)
+    agrees = probabilities.argmax(axis=1) == teacher_labels
+
+    rows = []
+    for threshold in thresholds:
+        answered = confidence >= threshold
+        share = float(answered.mean()) if len(items) else 0.0
+        rows.append({
+            "threshold": threshold,
+            "student_share": share,
+            "escalation_rate": 1.0 - share,
+            "student_agreement": float(agrees[answered].mean()) if answered.any() else None,
+            # Escalated incidents get the teacher's own answer
+            "cascade_agreement": float((agrees | ~answered).mean()) if len(items) else None,
+            "student_ms": student_s * 1000.0,
+            "teacher_ms": teacher_s * 1000.0,
+            "cascade_mean_ms": (student_s + (1.0 - share) * teacher_s) * 1000.0
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=settings.classifier_student_path)
+    parser.add_argument("--data", help="JSONL incidents to label instead of the database")
+    parser.add_argument("--limit", type=int, default=50000, help="newest incidents to use")
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument("--targets", choices=["hard", "soft"], default="hard",
+                        help="fit the teacher's top category or its full distribution")
+    parser.add_argument("--dimension", type=int, default=2 ** 16, help="hashed feature space size")
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--thresholds", default="0.5,0.6,0.7,0.8,0.9,0.95")
+    parser.add_argument("--target-agreement", type=float, default=0.95)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    items = load_jsonl(args.data, args.limit) if args.data else load_stored_incidents(args.limit)
+    if len(items) < 2:
+        parser.error("Need at least two incidents to train and evaluate on")
+    print(f"Distilling on {len(items)} incidents")
+
+    from app.utils.inference_pool import build_classifier
+    teacher = build_classifier()
+    probabilities, teacher_s = label(teacher, items, settings.batch_max_size)
+    teacher_labels = probabilities.argmax(axis=1)
+    targets = probabilities
+    if args.targets == "hard":
+        targets = np.eye(len(teacher.categories), dtype=np.float32)[teacher_labels]
+
+    order = list(range(len(items)))
+    random.Random(args.seed).shuffle(order)
+    held_out = max(1, int(len(items) * args.holdout))
+    evaluate, train = order[:held_out], order[held_out:]
+
+    started = time.perf_counter()
+    student = StudentClassifier.fit(
+        [f"{items[i][0]} {items[i][1]}" for i in train],
+        targets[train],
+        teacher.categories,
+        dimension=args.dimension,
+        epochs=args.epochs,
+        seed=args.seed
+    )
+    print(f"Fitted the student on {len(train)} incidents in {time.perf_counter() - started:.1f}s")
+
+    thresholds = sorted(float(value) for value in args.thresholds.split(",") if value)
+    report = threshold_report(
+        student, teacher_labels[evaluate], [items[i] for i in evaluate], thresholds, teacher_s
+    )
+    suggested = next(
+        (row["threshold"] for row in report
+         if row["student_agreement"] is not None and row["student_agreement"] >= args.target_agreement),
+        None
+    )
+
+    print(f"\nHeld-out incidents: {len(evaluate)}")
+    print(f"{'threshold':>9}  {'student':>8}  {'escalated':>9}  {'agreement':>9}  {'cascade':>8}  {'mean_ms':>8}")
+    for row in report:
+        agreement = "-" if row["student_agreement"] is None else f"{row['student_agreement']:.3f}"
+        print(
+            f"{row['threshold']:>9.2f}  {row['student_share']:>8.1%}  {row['escalation_rate']:>9.1%}  "
+            f"{agreement:>9}  {row['cascade_agreement']:>8.3f}  {row['cascade_mean_ms']:>8.2f}"
+        )
+    print(f"Teacher {teacher_s * 1000.0:.1f} ms per incident, student {report[0]['student_ms']:.3f} ms")
+    if suggested is None:
+        print(f"No threshold reaches {args.target_agreement:.0%} agreement; label more incidents or try higher thresholds")
+    else:
+        print(f"Suggested CLASSIFIER_CASCADE_THRESHOLD={suggested}")
+
+    student.metadata = {
+        "teacher": settings.classifier_fingerprint(),
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "incidents": len(train),
+        "held_out": len(evaluate),
+        "targets": args.targets,
+        "report": report,
+        "suggested_threshold": suggested
+    }
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    student.save(args.output)
+    print(f"Saved the student to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
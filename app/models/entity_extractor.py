@@ -1,46 +1,108 @@
 import spacy
-from typing import List
+from typing import Iterable, List, Optional
 from app.schemas.entity import Entity
 
+# Custom patterns for trade-specific entities
+PATTERNS = [
+    # Shipment ID patterns
+    {"label": "TRACKING_ID", "pattern": [{"SHAPE": "ddd###"}]},
+    {"label": "TRACKING_ID", "pattern": [{"SHAPE": "ddd####"}]},
+    {"label": "TRACKING_ID", "pattern": [{"SHAPE": "###ddd"}]},
+    
+    # Document patterns
+    {"label": "DOCUMENT", "pattern": "Bill of Lading"},
+    {"label": "DOCUMENT", "pattern": "Certificate of Origin"},
+    {"label": "DOCUMENT", "pattern": "customs forms"},
+    {"label": "DOCUMENT", "pattern": "import license"},
+    
+    # Product patterns
+    {"label": "PRODUCT", "pattern": [{"POS": "NOUN"}, {"LOWER": "shipment"}]},
+    {"label": "PRODUCT", "pattern": [{"POS": "NOUN"}, {"LOWER": "cargo"}]},
+    
+    # Custom status patterns
+    {"label": "STATUS", "pattern": "delayed"},
+    {"label": "STATUS", "pattern": "pending"},
+    {"label": "STATUS", "pattern": "cleared"},
+    {"label": "STATUS", "pattern": "held"},
+]
+
+# Components no pattern or entity type depends on; the tagger and
+# attribute_ruler stay because the PRODUCT patterns match on POS
+EXCLUDED_COMPONENTS = ["parser", "lemmatizer", "senter"]
+
+# Entity types produced only by the entity_ruler; every other type needs the
+# statistical NER, including Product, which the NER also emits as PRODUCT.
+# The ruler itself needs POS because of the PRODUCT patterns.
+RULER_TYPES = {"Tracking ID", "Document", "Status"}
+RULER_COMPONENTS = {"tok2vec", "tagger", "attribute_ruler", "entity_ruler"}
+
+# Entity types incident analysis keeps
+ANALYSIS_ENTITY_TYPES = ["Tracking ID", "Product"]
+
 class EntityExtractor:
-    def __init__(self):
-        # Load English language model
-        self.nlp = spacy.load("en_core_web_sm")
+    def __init__(
+        self,
+        model_name: str = "en_core_web_sm",
+        batch_size: int = 64,
+        n_process: int = 1,
+        max_tokens: int = 0
+    ):
+        self.batch_size = batch_size
+        self.n_process = n_process
+        # Texts are cut to this many spaCy tokens (0 keeps them whole)
+        self.max_tokens = max_tokens
+        
+        # Load English language model without the unused components
+        self.nlp = spacy.load(model_name, exclude=EXCLUDED_COMPONENTS)
         
         # Add custom patterns for trade-specific entities
         ruler = self.nlp.add_pipe("entity_ruler", before="ner")
-        patterns = [
-            # Shipment ID patterns
-            {"label": "TRACKING_ID", "pattern": [{"SHAPE": "ddd###"}]},
-            {"label": "TRACKING_ID", "pattern": [{"SHAPE": "ddd####"}]},
-            {"label": "TRACKING_ID", "pattern": [{"SHAPE": "###ddd"}]},
-            
-            # Document patterns
-            {"label": "DOCUMENT", "pattern": "Bill of Lading"},
-            {"label": "DOCUMENT", "pattern": "Certificate of Origin"},
-            {"label": "DOCUMENT", "pattern": "customs forms"},
-            {"label": "DOCUMENT", "pattern": "import license"},
-            
-            # Product patterns
-            {"label": "PRODUCT", "pattern": [{"POS": "NOUN"}, {"LOWER": "shipment"}]},
-            {"label": "PRODUCT", "pattern": [{"POS": "NOUN"}, {"LOWER": "cargo"}]},
-            
-            # Custom status patterns
-            {"label": "STATUS", "pattern": "delayed"},
-            {"label": "STATUS", "pattern": "pending"},
-            {"label": "STATUS", "pattern": "cleared"},
-            {"label": "STATUS", "pattern": "held"},
-        ]
-        ruler.add_patterns(patterns)
+        ruler.add_patterns(PATTERNS)
 
-    def extract_entities(self, text: str) -> List[Entity]:
-        # Process the text
-        doc = self.nlp(text)
-        
+    def extract_entities(self, text: str, entity_types: Optional[Iterable[str]] = None) -> List[Entity]:
+        return self.extract_entities_many([text], entity_types=entity_types)[0]
+
+    def extract_entities_many(
+        self,
+        texts: List[str],
+        entity_types: Optional[Iterable[str]] = None,
+        batch_size: Optional[int] = None,
+        n_process: Optional[int] = None
+    ) -> List[List[Entity]]:
+        """Extract entities from many texts in one streamed ``nlp.pipe`` pass.
+
+        When ``entity_types`` is given only those types are returned, and
+        components none of them depend on are skipped for the call.
+        """
+        wanted = set(entity_types) if entity_types is not None else None
+        docs = self.nlp.pipe(
+            (self._capped_doc(text) for text in texts) if self.max_tokens else texts,
+            batch_size=batch_size or self.batch_size,
+            n_process=n_process or self.n_process,
+            disable=self._unneeded_components(wanted)
+        )
+        return [self._doc_entities(doc, wanted) for doc in docs]
+
+    def _capped_doc(self, text: str):
+        # Tokenized once here; nlp.pipe runs the pipeline on the Doc as is
+        doc = self.nlp.make_doc(text)
+        return doc[:self.max_tokens].as_doc() if len(doc) > self.max_tokens else doc
+
+    def _unneeded_components(self, wanted: Optional[set]) -> List[str]:
+        if wanted is None:
+            return []
+        needed = set(RULER_COMPONENTS)
+        if wanted - RULER_TYPES:
+            needed.add("ner")
+        return [name for name in self.nlp.pipe_names if name not in needed]
+
+    def _doc_entities(self, doc, wanted: Optional[set] = None) -> List[Entity]:
         entities = []
         for ent in doc.ents:
             # Map spaCy entity types to custom types
             entity_type = self._map_entity_type(ent.label_)
+            if wanted is not None and entity_type not in wanted:
+                continue
             
             # Create entity with confidence score
             entity = Entity(
@@ -0,0 +1,52 @@
+"""Export transformer models to ONNX (optionally int8-quantized).
+
+Usage:
+    python -m app.models.export [--model NAME ...] [--quantize] [--output DIR]
+
+Without --model the configured classifier and sentiment models are
+exported. The output layout is what the "onnx" and "onnx-int8" inference
+backends load from ONNX_MODEL_DIR.
+"""
+import argparse
+import os
+
+from app.config import settings
+from app.models.backends import onnx_model_path
+
+
+def export_model(model_name: str, output_dir: str, quantize: bool = False) -> str:
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    path = onnx_model_path(output_dir, model_name)
+    os.makedirs(path, exist_ok=True)
+
+    model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+    model.save_pretrained(path)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(path)
+    print(f"Exported {model_name} to {path}")
+
+    if quantize:
+        # Dynamic quantization: int8 weights, activations quantized at runtime
+        quantizer = ORTQuantizer.from_pretrained(path)
+        config = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+        quantizer.quantize(save_dir=path, quantization_config=config)
+        print(f"Quantized {model_name} to int8 in {path}")
+
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", action="append", dest="models")
+    parser.add_argument("--quantize", action="store_true")
+    parser.add_argument("--output", default=settings.onnx_model_dir)
+    args = parser.parse_args()
+
+    for model_name in args.models or [settings.classifier_model, settings.sentiment_model]:
+        export_model(model_name, args.output, quantize=args.quantize)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,106 @@
-from typing import List, Tuple
+import json
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+# Impact keywords for urgency calculation, with their weights. Inflected
+# forms are listed explicitly since matching is on whole words.
+DEFAULT_IMPACT_KEYWORDS = {
+    "immediate": 1.0, "immediately": 1.0,
+    "urgent": 1.0, "urgently": 1.0,
+    "critical": 1.0, "critically": 1.0,
+    "severe": 1.0, "severely": 1.0,
+    "damaged": 1.0,
+    "breach": 1.0, "breaches": 1.0, "breached": 1.0,
+    "violation": 1.0, "violations": 1.0,
+    "failed": 1.0,
+    "emergency": 1.0, "emergencies": 1.0,
+    "risk": 1.0, "risks": 1.0, "risky": 1.0,
+}
+
+DEFAULT_ACTIONS = [
+    "Escalate to relevant department for immediate review",
+    "Schedule stakeholder update within 24 hours",
+    "Document incident details and track resolution progress"
+]
+
+# Base resolution times (in hours) for different categories
+BASE_RESOLUTION_HOURS = {
+    "Documentation Issue": 24,
+    "Compliance Violation": 48,
+    "Transportation Issue": 12,
+    "Shipment Delay": 24,
+    "Payment Issue": 24,
+    "Platform Technical Issue": 8,
+    "Integration Error": 12
+}
+DEFAULT_RESOLUTION_HOURS = 24
+
+# Urgency levels as array codes, lowest first
+URGENCY_LEVELS = ("Low", "Medium", "High")
+LOW, MEDIUM, HIGH = range(len(URGENCY_LEVELS))
+
+# Adjust resolution time based on urgency
+URGENCY_MULTIPLIERS = {
+    "High": 0.7,    # Reduce time for high urgency
+    "Medium": 1.0,  # Standard time
+    "Low": 1.5      # Allow more time for low urgency
+}
+
+
+def load_keyword_weights(path: str) -> Dict[str, float]:
+    """Read a keyword lexicon: a JSON object of term -> weight, or a list of terms."""
+    with open(path) as f:
+        lexicon = json.load(f)
+    if isinstance(lexicon, list):
+        return {term: 1.0 for term in lexicon}
+    return {term: float(weight) for term, weight in lexicon.items()}
+
+
+class KeywordMatcher:
+    """Finds weighted lexicon terms in text in a single pass over its words.
+
+    Terms may span several words. Each word is looked up in a dict for every
+    term length up to the longest term, so the cost grows with the text and
+    not with the size of the lexicon.
+    """
+
+    WORD = re.compile(r"[a-z0-9]+", re.IGNORECASE)
+
+    def __init__(self, weights: Dict[str, float]):
+        self.weights: Dict[Tuple[str, ...], float] = {}
+        for term, weight in weights.items():
+            words = tuple(self.WORD.findall(term.lower()))
+            if words:
+                self.weights[words] = weight
+        self.max_words = max((len(words) for words in self.weights), default=1)
+
+    def matches(self, text: str, stop_at: Optional[float] = None) -> Set[Tuple[str, ...]]:
+        """Distinct terms found in ``text``; stops early once their weight reaches ``stop_at``."""
+        found = set()
+        score = 0.0
+        window = deque(maxlen=self.max_words)
+        for match in self.WORD.finditer(text):
+            window.append(match.group().lower())
+            recent = tuple(window)
+            # Every term ending at this word
+            for start in range(len(recent)):
+                term = recent[start:]
+                if term in self.weights and term not in found:
+                    found.add(term)
+                    score += self.weights[term]
+            if stop_at is not None and score >= stop_at:
+                break
+        return found
+
+    def score(self, text: str, stop_at: Optional[float] = None) -> float:
+        return sum(self.weights[term] for term in self.matches(text, stop_at))
+
 
 class IncidentRecommender:
-    def __init__(self):
+    def __init__(self, keyword_weights: Optional[Dict[str, float]] = None):
         # Predefined resolution templates based on incident types
         self.resolution_templates = {
             # Quality & Standards
@@ -110,81 +209,74 @@ class IncidentRecommender:
             "default": "Medium"
         }
         
-        # Impact keywords for urgency calculation
-        self.high_impact_keywords = [
-            "immediate", "urgent", "critical", "severe", "damaged",
-            "breach", "violation", "failed", "emergency", "risk"
-        ]
+        self.urgency_codes = {
+            category: URGENCY_LEVELS.index(level) for category, level in self.urgency_factors.items()
+        }
+        
+        # Impact keywords for urgency calculation; a custom lexicon extends
+        # or reweights the defaults
+        self.high_impact_keywords = {**DEFAULT_IMPACT_KEYWORDS, **(keyword_weights or {})}
+        self.keyword_matcher = KeywordMatcher(self.high_impact_keywords)
         # SLA breach times based on urgency (in hours)
         self.sla_times = {
             "High": 24,    # 1 day
             "Medium": 48,  # 2 days
             "Low": 72     # 3 days
         }
-
-    def get_recommendations(self, category: str, description: str, urgency: str) -> Tuple[List[str], str]:
-        # Calculate urgency based on description and category
-        calculated_urgency = self._calculate_urgency(category, description)
         
-        # Get predefined actions for the category
-        actions = self.resolution_templates.get(
-            category, 
-            [
-                "Escalate to relevant department for immediate review",
-                "Schedule stakeholder update within 24 hours",
-                "Document incident details and track resolution progress"
-            ]
+        # Resolution estimates for every category and urgency, computed once
+        categories = (
+            set(self.resolution_templates) | set(self.urgency_factors) | set(BASE_RESOLUTION_HOURS)
+        ) - {"default"}
+        self.resolution_times = {
+            (category, urgency): f"{self._calculate_resolution_time(category, urgency)} hours"
+            for category in categories
+            for urgency in self.sla_times
+        }
+
+    def get_recommendations(self, category: str, description: str, urgency: Optional[str] = None) -> Tuple[List[str], str]:
+        return self.get_recommendations_many([(category, description)])[0]
+    
+    def get_recommendations_many(self, items: Iterable[Tuple[str, str]]) -> List[Tuple[List[str], str]]:
+        """Recommendations for many (category, description) pairs at once.
+
+        Each description is scanned for impact keywords once; urgency is then
+        decided for the whole batch with array operations.
+        """
+        items = list(items)
+        if not items:
+            return []
+        categories = [category for category, _ in items]
+
+        # Weight of impact keywords per description; nothing past 2 changes
+        # the outcome, so long texts stop scanning there
+        impact = np.fromiter(
+            (self.keyword_matcher.score(description, stop_at=2.0) for _, description in items),
+            dtype=np.float64,
+            count=len(items)
         )
-        
-        # Calculate resolution time based on calculated urgency and SLA
-        resolution_hours = min(
-            self.sla_times[calculated_urgency],
-            self._calculate_resolution_time(category, calculated_urgency)
+        # Base urgency from category, as an index into URGENCY_LEVELS
+        base = np.array([self.urgency_codes.get(category, MEDIUM) for category in categories])
+        urgency = np.select(
+            [impact >= 2, (impact >= 1) & (base != LOW), (impact < 1) & (base == HIGH)],
+            [HIGH, HIGH, MEDIUM],
+            default=base
         )
-        
-        return actions, f"{resolution_hours} hours"
+
+        results = []
+        for category, code in zip(categories, urgency.tolist()):
+            level = URGENCY_LEVELS[code]
+            resolution_time = self.resolution_times.get((category, level))
+            if resolution_time is None:
+                resolution_time = f"{self._calculate_resolution_time(category, level)} hours"
+            results.append((self.resolution_templates.get(category, DEFAULT_ACTIONS), resolution_time))
+        return results
     
     def _calculate_resolution_time(self, category: str, urgency: str) -> int:
-        # Base resolution times (in hours) for different categories
-        base_times = {
-            "Documentation Issue": 24,
-            "Compliance Violation": 48,
-            "Transportation Issue": 12,
-            "Shipment Delay": 24,
-            "Payment Issue": 24,
-            "Platform Technical Issue": 8,
-            "Integration Error": 12
-        }
-        
         # Get base time or default to 24 hours
-        base_time = base_times.get(category, 24)
-        
-        # Adjust based on urgency
-        urgency_multiplier = {
-            "High": 0.7,    # Reduce time for high urgency
-            "Medium": 1.0,  # Standard time
-            "Low": 1.5      # Allow more time for low urgency
-        }
+        base_time = BASE_RESOLUTION_HOURS.get(category, DEFAULT_RESOLUTION_HOURS)
         
-        estimated_hours = int(base_time * urgency_multiplier[urgency])
+        estimated_hours = int(base_time * URGENCY_MULTIPLIERS[urgency])
         
         # Ensure within SLA limits
         return min(estimated_hours, self.sla_times[urgency])
-    
-    def _calculate_urgency(self, category: str, description: str) -> str:
-        # Base urgency from category
-        base_urgency = self.urgency_factors.get(category, "Medium")
-        
-        # Count impact keywords in description
-        impact_words = sum(1 for word in self.high_impact_keywords 
-                         if word in description.lower())
-        
-        # Adjust urgency based on keywords
-        if impact_words >= 2:
-            return "High"
-        elif impact_words == 1 and base_urgency != "Low":
-            return "High"
-        elif impact_words == 0 and base_urgency == "High":
-            return "Medium"
-            
-        return base_urgency
\ No newline at end of file
@@ -1,14 +1,39 @@
-from transformers import pipeline
-from typing import Tuple
+from app.models.backends import build_pipeline
+from app.models.chunking import TokenWindower, aggregate, model_window
+from typing import List, Optional, Tuple
 
 class SentimentAnalyzer:
-    def __init__(self):
-        self.analyzer = pipeline(
+    def __init__(
+        self,
+        model_name: str = "distilbert-base-uncased-finetuned-sst-2-english",
+        backend: str = "torch",
+        onnx_dir: str = "models/onnx",
+        batch_size: int = 16,
+        window_tokens: int = 0,
+        overlap_tokens: int = 32,
+        max_tokens: int = 1024,
+        aggregation: str = "max"
+    ):
+        # Forward-pass batch size used when scoring several texts at once
+        self.batch_size = batch_size
+        self.analyzer = build_pipeline(
             "sentiment-analysis",
-            model="distilbert-base-uncased-finetuned-sst-2-english",
-            device=-1  # Use CPU
+            model_name,
+            backend=backend,
+            onnx_dir=onnx_dir
         )
         
+        # Long texts are scored as windows (two tokens are kept for [CLS] and
+        # [SEP]); with "max" the most negative window sets the sentiment
+        tokenizer = self.analyzer.tokenizer
+        self.windower = TokenWindower(
+            tokenizer,
+            window_tokens=model_window(tokenizer, self.analyzer.model, reserved=2, limit=window_tokens),
+            overlap_tokens=overlap_tokens,
+            max_tokens=max_tokens
+        )
+        self.aggregation = aggregation
+
         # Urgency mapping based on sentiment scores
         self.urgency_levels = {
             (0.0, 0.3): "Low",
@@ -17,7 +42,34 @@ class SentimentAnalyzer:
         }
 
     def analyze(self, text: str) -> Tuple[str, str]:
-        result = self.analyzer(text)[0]
+        return self.analyze_many([text])[0]
+
+    def analyze_many(self, texts: List[str], token_lengths: Optional[List[int]] = None) -> List[Tuple[str, str]]:
+        """Sentiment and urgency per text; ``token_lengths`` is filled with
+        each text's full token count when given."""
+        mapped = []
+        for negative in self.negativity_many(texts, token_lengths):
+            if negative >= 0.5:
+                mapped.append(self._map_result({"label": "NEGATIVE", "score": negative}))
+            else:
+                mapped.append(self._map_result({"label": "POSITIVE", "score": 1.0 - negative}))
+        return mapped
+
+    def negativity_many(self, texts: List[str], token_lengths: Optional[List[int]] = None) -> List[float]:
+        """Probability that each text is negative, combined across its windows."""
+        windows = self.windower.split(texts, token_lengths)
+        # Windows fit by construction; truncation only guards against
+        # re-tokenization at a window edge coming out a token longer
+        results = self.analyzer(
+            [window.text for window in windows], batch_size=self.batch_size, truncation=True
+        )
+        negativity = [
+            [result["score"] if result["label"] == "NEGATIVE" else 1.0 - result["score"]]
+            for result in results
+        ]
+        return [float(negative) for (negative,) in aggregate(windows, negativity, len(texts), self.aggregation)]
+
+    def _map_result(self, result: dict) -> Tuple[str, str]:
         score = result['score']
         
         # Map sentiment labels
@@ -30,4 +82,4 @@ class SentimentAnalyzer:
                 urgency = level
                 break
                 
-        return sentiment, urgency 
\ No newline at end of file
+        return sentiment, urgency
@@ -0,0 +1,120 @@
+"""Tiny offline stand-ins for the analysis models (MODEL_PROFILE=stub).
+
+They keep the interfaces of the real models but need no downloads and run
+in microseconds, so benchmarks and local runs can exercise the rest of the
+service (batching, storage, uploads, indexing) without the model cost
+drowning it out. Their predictions are deterministic but not meaningful.
+"""
+import re
+import zlib
+from typing import List, Optional, Tuple
+
+import numpy as np
+import spacy
+
+from app.models.classifier import CATEGORIES, CATEGORY_DESCRIPTIONS
+from app.models.entity_extractor import PATTERNS, EntityExtractor
+
+WORD = re.compile(r"[a-z]+")
+
+NEGATIVE_WORDS = {
+    "delayed", "damaged", "failed", "missing", "overdue", "rejected", "error",
+    "dispute", "breach", "violation", "shortage", "outage", "flooded", "lost"
+}
+
+
+def _words(text: str) -> set:
+    return set(WORD.findall(text.lower()))
+
+
+class StubClassifier:
+    """Picks the category whose name and description share most words with the text."""
+
+    def __init__(self):
+        self.categories = list(CATEGORIES)
+        self.category_words = [
+            _words(f"{category} {CATEGORY_DESCRIPTIONS.get(category, '')}") for category in self.categories
+        ]
+        self.shortlist_stats = {"shortlisted": 0, "fallbacks": 0}
+
+    def classify(self, title: str, description: str) -> Tuple[str, float]:
+        return self.classify_many([(title, description)])[0]
+
+    def classify_many(self, items: List[Tuple[str, str]]) -> List[Tuple[str, float]]:
+        results = []
+        for row in self.category_probabilities(items):
+            best = int(np.argmax(row))
+            results.append((self.categories[best], float(row[best])))
+        return results
+
+    def category_probabilities(self, items: List[Tuple[str, str]]) -> np.ndarray:
+        rows = []
+        for title, description in items:
+            words = _words(f"{title} {description}")
+            overlaps = np.array([len(words & category_words) for category_words in self.category_words], dtype=float)
+            total = overlaps.sum()
+            rows.append(overlaps / total if total else np.full(len(self.categories), 1.0 / len(self.categories)))
+        return np.vstack(rows) if rows else np.zeros((0, len(self.categories)))
+
+    def reset_stats(self):
+        self.shortlist_stats = {"shortlisted": 0, "fallbacks": 0}
+
+
+class StubSentimentAnalyzer:
+    def analyze(self, text: str) -> Tuple[str, str]:
+        return self.analyze_many([text])[0]
+
+    def analyze_many(self, texts: List[str], token_lengths: Optional[List[int]] = None) -> List[Tuple[str, str]]:
+        if token_lengths is not None:
+            token_lengths.extend(len(text.split()) for text in texts)
+        results = []
+        for text in texts:
+            negatives = len(_words(text) & NEGATIVE_WORDS)
+            if negatives >= 2:
+                results.append(("Negative", "High"))
+            elif negatives == 1:
+                results.append(("Negative", "Medium"))
+            else:
+                results.append(("Positive", "Low"))
+        return results
+
+
+class StubEmbedder:
+    """Hashed bag-of-words vectors, L2-normalised like TextEmbedder's."""
+
+    def __init__(self, dimension: int = 256):
+        self._dimension = dimension
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self._dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in WORD.findall(text.lower()):
+                vectors[row, zlib.crc32(word.encode("utf-8")) % self._dimension] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-9)
+
+
+class StubEntityExtractor(EntityExtractor):
+    """The entity_ruler patterns on a blank English pipeline.
+
+    Blank pipelines have no tagger, so the POS-based PRODUCT patterns are
+    left out.
+    """
+
+    def __init__(self, batch_size: int = 64, n_process: int = 1, max_tokens: int = 0):
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.max_tokens = max_tokens
+        self.nlp = spacy.blank("en")
+        ruler = self.nlp.add_pipe("entity_ruler")
+        ruler.add_patterns([
+            pattern for pattern in PATTERNS
+            if not any("POS" in token for token in pattern["pattern"] if isinstance(token, dict))
+        ])
+
+    def _unneeded_components(self, wanted: Optional[set]) -> List[str]:
+        return []
@@ -0,0 +1,239 @@
+"""Fast student classifier distilled from the zero-shot model, and the cascade
+that puts it in front of its teacher.
+
+The student is a softmax regression over hashed word unigrams and bigrams:
+scoring an incident is a regex pass, a few dozen crc32 hashes and a sparse
+dot product, microseconds against the NLI model's hundreds of milliseconds.
+It is trained by ``python -m app.models.distill`` on the teacher's labels
+for stored incidents.
+"""
+import json
+import random
+import re
+import time
+import zlib
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+WORD = re.compile(r"[a-z0-9]+")
+
+# Rows of the sparse feature matrix: (indices, values) per text
+SparseRows = List[Tuple[np.ndarray, np.ndarray]]
+
+
+def hashed_features(text: str, dimension: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Hashed unigram and bigram counts, log-scaled and L2-normalised.
+
+    crc32 rather than ``hash()`` so indices are the same in every process.
+    """
+    words = WORD.findall(text.lower())
+    counts = {}
+    for position, word in enumerate(words):
+        index = zlib.crc32(word.encode()) % dimension
+        counts[index] = counts.get(index, 0) + 1
+        if position:
+            index = zlib.crc32(f"{words[position - 1]} {word}".encode()) % dimension
+            counts[index] = counts.get(index, 0) + 1
+    if not counts:
+        # Keeps every row non-empty for the segment sums below
+        return np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.float32)
+    indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    values = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+    return indices, values / np.linalg.norm(values)
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def _stack(rows: SparseRows) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Flattened indices and values plus where each row starts
+    lengths = [len(indices) for indices, _ in rows]
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+    return (
+        np.concatenate([indices for indices, _ in rows]),
+        np.concatenate([values for _, values in rows]),
+        starts
+    )
+
+
+class StudentClassifier:
+    def __init__(self, categories: Sequence[str], weights: np.ndarray, bias: np.ndarray,
+                 metadata: Optional[dict] = None):
+        self.categories = list(categories)
+        self.weights = weights
+        self.bias = bias
+        self.dimension = weights.shape[0]
+        self.metadata = metadata or {}
+
+    def _logits(self, rows: SparseRows) -> np.ndarray:
+        indices, values, starts = _stack(rows)
+        return np.add.reduceat(self.weights[indices] * values[:, None], starts, axis=0) + self.bias
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, len(self.categories)))
+        return _softmax(self._logits([hashed_features(text, self.dimension) for text in texts]))
+
+    def classify_many(self, items: List[Tuple[str, str]]) -> List[Tuple[str, float]]:
+        probabilities = self.predict_proba([f"{title} {description}" for title, description in items])
+        best = probabilities.argmax(axis=1)
+        return [(self.categories[j], float(row[j])) for row, j in zip(probabilities, best)]
+
+    @classmethod
+    def fit(
+        cls,
+        texts: List[str],
+        targets: np.ndarray,
+        categories: Sequence[str],
+        dimension: int = 2 ** 16,
+        epochs: int = 20,
+        learning_rate: float = 0.5,
+        l2: float = 1e-6,
+        batch_size: int = 64,
+        seed: int = 0
+    ) -> "StudentClassifier":
+        """Minimise cross-entropy against ``targets`` (one probability row per
+        text, hard or soft) with AdaGrad, updating only the touched rows."""
+        rows = [hashed_features(text, dimension) for text in texts]
+        targets = np.asarray(targets, dtype=np.float32)
+        weights = np.zeros((dimension, len(categories)), dtype=np.float32)
+        bias = np.zeros(len(categories), dtype=np.float32)
+        weight_history = np.zeros(dimension, dtype=np.float32)
+        bias_history = np.zeros(len(categories), dtype=np.float32)
+        student = cls(categories, weights, bias)
+
+        order = list(range(len(rows)))
+        rng = random.Random(seed)
+        for _ in range(epochs):
+            rng.shuffle(order)
+            for start in range(0, len(order), batch_size):
+                batch = order[start:start + batch_size]
+                batch_rows = [rows[i] for i in batch]
+                delta = (_softmax(student._logits(batch_rows)) - targets[batch]) / len(batch)
+
+                indices, values, starts = _stack(batch_rows)
+                owners = np.repeat(np.arange(len(batch)), np.diff(np.append(starts, len(indices))))
+                contributions = values[:, None] * delta[owners]
+                # Sum gradients of repeated feature indices before updating
+                order_by_index = np.argsort(indices, kind="stable")
+                unique, first = np.unique(indices[order_by_index], return_index=True)
+                gradient = np.add.reduceat(contributions[order_by_index], first, axis=0)
+                gradient += l2 * weights[unique]
+
+                weight_history[unique] += (gradient ** 2).mean(axis=1)
+                weights[unique] -= learning_rate * gradient / (np.sqrt(weight_history[unique])[:, None] + 1e-8)
+                bias_gradient = delta.sum(axis=0)
+                bias_history += bias_gradient ** 2
+                bias -= learning_rate * bias_gradient / (np.sqrt(bias_history) + 1e-8)
+        return student
+
+    def save(self, path: str):
+        np.savez_compressed(
+            path,
+            weights=self.weights,
+            bias=self.bias,
+            categories=np.array(self.categories),
+            metadata=np.array(json.dumps(self.metadata))
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "StudentClassifier":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                [str(category) for category in data["categories"]],
+                data["weights"],
+                data["bias"],
+                json.loads(str(data["metadata"]))
+            )
+
+
+class CascadeClassifier:
+    """Answers with the student when it is confident, otherwise with the teacher.
+
+    Incidents whose student confidence is below ``threshold`` are escalated
+    to the teacher in one batch. A random ``audit_rate`` share of the
+    student's answers is also sent to the teacher to measure live agreement.
+    Anything else (shortlist stats, the windower) is read from the teacher.
+    """
+
+    def __init__(self, student: StudentClassifier, teacher, threshold: float = 0.8,
+                 audit_rate: float = 0.0, seed: Optional[int] = None):
+        self.student = student
+        self.teacher = teacher
+        self.threshold = threshold
+        self.audit_rate = audit_rate
+        self._random = random.Random(seed)
+        self.reset_stats()
+
+    def __getattr__(self, name):
+        if name == "teacher":
+            # Not set yet (e.g. while unpickling): avoid recursing through here
+            raise AttributeError(name)
+        return getattr(self.teacher, name)
+
+    def reset_stats(self):
+        self.tier_stats = {
+            "student": 0,
+            "escalated": 0,
+            "student_s": 0.0,
+            "teacher_s": 0.0,
+            # Escalated incidents the student had right anyway, below the threshold
+            "escalated_agreed": 0,
+            "audited": 0,
+            "audit_agreed": 0
+        }
+        if hasattr(self.teacher, "reset_stats"):
+            self.teacher.reset_stats()
+
+    def classify(self, title: str, description: str) -> Tuple[str, float]:
+        return self.classify_many([(title, description)])[0]
+
+    def classify_many(self, items: List[Tuple[str, str]], tiers: Optional[dict] = None) -> List[Tuple[str, float]]:
+        """``tiers``, when given, is filled with this call's per-tier counts and timings."""
+        started = time.perf_counter()
+        results = self.student.classify_many(items)
+        student_s = time.perf_counter() - started
+
+        escalate = [i for i, (_, confidence) in enumerate(results) if confidence < self.threshold]
+        audit = [
+            i for i, (_, confidence) in enumerate(results)
+            if confidence >= self.threshold and self.audit_rate and self._random.random() < self.audit_rate
+        ]
+        teacher_s = 0.0
+        agreed = audit_agreed = 0
+        if escalate or audit:
+            started = time.perf_counter()
+            answers = self.teacher.classify_many([items[i] for i in escalate + audit])
+            teacher_s = time.perf_counter() - started
+            for i, answer in zip(escalate, answers):
+                agreed += results[i][0] == answer[0]
+                results[i] = answer
+            audit_agreed = sum(results[i][0] == answer[0] for i, answer in zip(audit, answers[len(escalate):]))
+
+        batch = {
+            "student": len(items) - len(escalate),
+            "escalated": len(escalate),
+            "student_s": student_s,
+            "teacher_s": teacher_s,
+            "escalated_agreed": agreed,
+            "audited": len(audit),
+            "audit_agreed": audit_agreed
+        }
+        for key, value in batch.items():
+            self.tier_stats[key] += value
+        if tiers is not None:
+            tiers.update(batch)
+        return results
+
+    def cascade_stats(self) -> dict:
+        stats = self.tier_stats
+        total = stats["student"] + stats["escalated"]
+        return {
+            "threshold": self.threshold,
+            **stats,
+            "escalation_rate": stats["escalated"] / total if total else 0.0,
+            "audit_agreement": stats["audit_agreed"] / stats["audited"] if stats["audited"] else None
+        }
@@ -12,4 +12,6 @@ class CombinedAnalysis(BaseModel):
     urgency_level: str
     entities: Optional[List[Entity]] = None
     recommended_actions: List[str]
-    estimated_resolution_time: str 
\ No newline at end of file
+    estimated_resolution_time: str
+    # Stages that timed out or failed and were replaced by defaults
+    degraded_stages: Optional[List[str]] = None
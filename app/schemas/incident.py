@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, List
+from typing import Literal, Optional, List
 from pydantic import BaseModel
 from fastapi import UploadFile
 
@@ -12,6 +12,14 @@ class IncidentCreate(BaseModel):
     description: str
     documents: Optional[List[UploadFile]] = None
 
+class SimilarIncident(BaseModel):
+    id: int
+    title: str
+    category: str
+    status: str
+    # Cosine similarity of the incident embeddings
+    similarity: float
+
 class IncidentResponse(BaseModel):
     id: int
     title: str
@@ -22,3 +30,27 @@ class IncidentResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
     document_count: int
+    # Background text-extraction job for the uploaded documents, if any
+    document_job_id: Optional[str] = None
+    # Earlier incidents similar enough to be the same report
+    possible_duplicates: Optional[List[SimilarIncident]] = None
+
+class IncidentPage(BaseModel):
+    items: List[IncidentResponse]
+    # Pass as ``cursor`` to fetch the next page; None on the last page
+    next_cursor: Optional[int] = None
+
+class IncidentSearchHit(IncidentResponse):
+    # Best matching field with the matched words in [brackets]
+    snippet: Optional[str] = None
+
+class IncidentSearchPage(BaseModel):
+    items: List[IncidentSearchHit]
+    next_cursor: Optional[int] = None
+
+class IncidentStatusUpdate(BaseModel):
+    status: Literal["open", "in_progress", "resolved", "closed"]
+
+class SimilarIncidents(BaseModel):
+    incident_id: int
+    similar: List[SimilarIncident]
@@ -0,0 +1,185 @@
+"""Pre-fork server: load the models once, then fork API workers that share them.
+
+Usage:
+    python -m app.serve [--workers 4] [--host 0.0.0.0] [--port 8000]
+
+``uvicorn --workers N`` imports the app in N fresh processes, and each one
+loads every model itself (with INFERENCE_WORKERS > 0 each also starts its
+own inference pool), so memory grows N-fold. Here the parent loads and warms
+the models in-process, freezes its heap and forks the workers. Workers run
+inference on their own threads over the inherited weights, which stay
+shared copy-on-write since inference only reads them. Incidents, ids,
+counters and document jobs live in SQLite, so every worker sees the same
+state; the similarity index files are shared the same way, each worker
+appending the incidents it creates to one memory-mapped matrix.
+
+Workers that die are restarted. A memory report (RSS, PSS and USS per
+process) is printed once the workers are up.
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+
+
+def load_models(settings):
+    from app.utils import inference_pool
+
+    # Loaded and warmed on one thread: an intra-op thread pool started here
+    # would not survive the fork and can deadlock the workers' first call
+    inference_pool.load_models(torch_threads=1)
+    result, _, _ = inference_pool.warmup(settings.warmup_batch_sizes)
+    if result["failed"]:
+        raise RuntimeError(f"Models failed to load: {', '.join(result['failed'])}")
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(number: int, sock: socket.socket, args, settings):
+    import uvicorn
+
+    # uvicorn installs its own handlers for a graceful shutdown
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    # The inference pool's startup sets this worker's torch thread count
+    settings.prefork_worker = number
+
+    from app.main import app
+    config = uvicorn.Config(app, log_level=args.log_level, access_log=args.access_log)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def memory_report(children: dict) -> str:
+    from app.utils.metrics import process_memory_bytes
+
+    rows = [("parent", os.getpid())] + [(f"worker {number}", pid) for pid, number in sorted(
+        children.items(), key=lambda item: item[1]
+    )]
+    lines = [f"{'process':<10} {'pid':>8} {'rss_mb':>9} {'pss_mb':>9} {'uss_mb':>9}"]
+    total_pss = 0
+    for name, pid in rows:
+        usage = process_memory_bytes(pid)
+        if usage is None:
+            lines.append(f"{name:<10} {pid:>8}   (unavailable)")
+            continue
+        total_pss += usage["pss"]
+        lines.append(
+            f"{name:<10} {pid:>8} {usage['rss'] / 2**20:>9.1f} {usage['pss'] / 2**20:>9.1f} "
+            f"{usage['uss'] / 2**20:>9.1f}"
+        )
+    lines.append(f"total PSS {total_pss / 2**20:.1f} MB across {len(rows)} processes")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--access-log", action="store_true")
+    parser.add_argument("--memory-report-delay", type=float, default=10.0,
+                        help="seconds after startup to print the memory report (0 disables)")
+    args = parser.parse_args()
+
+    # Fast tokenizers disable their own thread pool after a fork anyway,
+    # with a warning per worker
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+    from app.config import settings
+    from app.utils.job_queue import requeue_interrupted_jobs
+
+    # Workers infer in-process on the shared models, splitting the cores
+    settings.inference_workers = 0
+    if not os.getenv("INFERENCE_TORCH_THREADS"):
+        settings.inference_torch_threads = max(1, (os.cpu_count() or 1) // max(1, args.workers))
+    if not os.getenv("SIMILARITY_SYNC_INTERVAL_S"):
+        settings.similarity_sync_interval_s = 2.0
+
+    started = time.perf_counter()
+    load_models(settings)
+    print(f"Models loaded and warmed in {time.perf_counter() - started:.2f}s")
+
+    # Jobs a previous run left half done; workers only pick up queued ones
+    requeued = requeue_interrupted_jobs(settings.database_path)
+    if requeued:
+        print(f"Requeued {requeued} interrupted document job(s)")
+
+    sock = bind_socket(args.host, args.port, args.backlog)
+
+    # Objects that exist now are never collected, so the collector never
+    # writes to (and un-shares) the pages holding them in the workers
+    gc.collect()
+    gc.freeze()
+
+    children = {}
+    stopping = False
+
+    def spawn(number: int):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(number, sock, args, settings)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = number
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for number in range(args.workers):
+        spawn(number)
+    print(f"Serving on {args.host}:{args.port} with {args.workers} pre-forked workers")
+
+    report_at = time.monotonic() + args.memory_report_delay if args.memory_report_delay > 0 else None
+    while children:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid == 0:
+            if report_at is not None and time.monotonic() >= report_at:
+                print(memory_report(children))
+                report_at = None
+            time.sleep(0.5)
+            continue
+        number = children.pop(pid, None)
+        if number is None or stopping:
+            continue
+        print(f"Worker {number} (pid {pid}) exited with status {status}; restarting")
+        requeue_interrupted_jobs(settings.database_path, pid)
+        time.sleep(1)
+        spawn(number)
+
+    sock.close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
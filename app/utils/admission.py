@@ -0,0 +1,196 @@
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from app.utils.metrics import ADMISSION_REJECTED, ADMISSION_WAIT_SECONDS, record_timing
+
+# Highest priority first
+LANES = ("urgent", "normal", "bulk")
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be queued; the API answers 503 with Retry-After."""
+
+    def __init__(self, lane: str, reason: str, retry_after: int):
+        super().__init__(f"Inference is saturated ({reason}); retry in {retry_after}s")
+        self.lane = lane
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounds the requests running inference at once and queues the rest by priority.
+
+    At most ``max_concurrent`` requests hold a slot; up to ``max_queue`` more
+    wait in per-lane FIFO queues and freed slots go to the highest lane
+    first. When the queue is full a request is rejected straight away,
+    unless a lower lane has a waiter, in which case the newest such waiter
+    is rejected instead so urgent work is never turned away behind bulk
+    traffic. ``max_concurrent=None`` admits everything immediately while
+    still counting waits and lanes.
+
+    Unbounded callers (background work) wait in separate per-lane queues
+    that neither count towards ``max_queue`` nor are ever shed; within a
+    lane they get a freed slot after the bounded waiters.
+
+    Slots are held with ``async with controller.slot(lane)``.
+    """
+
+    def __init__(self, max_concurrent: Optional[int], max_queue: int = 256, lanes=LANES):
+        self.max_concurrent = max(1, max_concurrent) if max_concurrent is not None else None
+        self.max_queue = max(0, max_queue)
+        self.lanes = tuple(lanes)
+        self.running = 0
+        self._waiters: Dict[str, deque] = {lane: deque() for lane in self.lanes}
+        self._background: Dict[str, deque] = {lane: deque() for lane in self.lanes}
+        # Smoothed time a slot is held, which sizes Retry-After
+        self._hold_s: Optional[float] = None
+
+        self.admitted = {lane: 0 for lane in self.lanes}
+        self.rejected = {lane: 0 for lane in self.lanes}
+        self.shed = {lane: 0 for lane in self.lanes}
+        self.total_wait = {lane: 0.0 for lane in self.lanes}
+        self.max_wait = {lane: 0.0 for lane in self.lanes}
+
+    @property
+    def queued(self) -> int:
+        # Bounded waiters only; background waiters have no limit
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    @property
+    def background_queued(self) -> int:
+        return sum(len(waiters) for waiters in self._background.values())
+
+    def queue_depth(self, lane: str) -> int:
+        return len(self._waiters[lane]) + len(self._background[lane])
+
+    def retry_after(self) -> int:
+        # Roughly how long the current backlog takes to drain through every slot
+        slots = self.max_concurrent or 1
+        return max(1, min(60, math.ceil((self._hold_s or 1.0) * (self.queued + 1) / slots)))
+
+    def _free(self) -> bool:
+        return self.max_concurrent is None or (
+            self.running < self.max_concurrent and not self.queued and not self.background_queued
+        )
+
+    def _victim(self, lane: str) -> Optional[str]:
+        # Lowest lane below ``lane`` that has someone waiting
+        for lower in reversed(self.lanes[self.lanes.index(lane) + 1:]):
+            if self._waiters[lower]:
+                return lower
+        return None
+
+    def _reject(self, lane: str, reason: str):
+        self.rejected[lane] += 1
+        ADMISSION_REJECTED.labels(lane, reason).inc()
+        return AdmissionRejected(lane, reason, self.retry_after())
+
+    def check(self, lane: str):
+        """Raise AdmissionRejected now if a request in ``lane`` would be turned away.
+
+        Lets endpoints fail fast before reading uploads or allocating ids.
+        """
+        if not self._free() and self.queued >= self.max_queue and self._victim(lane) is None:
+            raise self._reject(lane, "full")
+
+    async def acquire(self, lane: str, bounded: bool = True):
+        """Wait for a slot; unbounded callers (background work) are never rejected."""
+        if self._free():
+            self.running += 1
+            self._record_wait(lane, 0.0)
+            return
+
+        if bounded and self.queued >= self.max_queue:
+            victim = self._victim(lane)
+            if victim is None:
+                raise self._reject(lane, "full")
+            # The newest waiter of the lowest lane would wait longest anyway
+            waiters = self._waiters[victim]
+            future = waiters.pop()
+            if not future.done():
+                self.shed[victim] += 1
+                future.set_exception(self._reject(victim, "shed"))
+
+        started = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        waiters = (self._waiters if bounded else self._background)[lane]
+        waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                # Granted a slot just as the caller went away: pass it on
+                self.release()
+            elif future in waiters:
+                waiters.remove(future)
+            raise
+        self._record_wait(lane, time.perf_counter() - started)
+
+    def release(self, held_s: Optional[float] = None):
+        if held_s is not None:
+            self._hold_s = held_s if self._hold_s is None else 0.8 * self._hold_s + 0.2 * held_s
+        self.running -= 1
+        if self.max_concurrent is None:
+            return
+        for lane in self.lanes:
+            for waiters in (self._waiters[lane], self._background[lane]):
+                while waiters:
+                    future = waiters.popleft()
+                    if not future.done():
+                        # The slot passes straight to the waiter
+                        self.running += 1
+                        future.set_result(None)
+                        return
+
+    def _record_wait(self, lane: str, waited: float):
+        self.admitted[lane] += 1
+        self.total_wait[lane] += waited
+        self.max_wait[lane] = max(self.max_wait[lane], waited)
+        ADMISSION_WAIT_SECONDS.labels(lane).observe(waited)
+        record_timing("admission", waited)
+
+    def slot(self, lane: str, bounded: bool = True) -> "_Slot":
+        return _Slot(self, lane, bounded)
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "running": self.running,
+            "queued": self.queued,
+            "background_queued": self.background_queued,
+            "retry_after_s": self.retry_after(),
+            "lanes": {
+                lane: {
+                    "queue_depth": len(self._waiters[lane]),
+                    "background_queue_depth": len(self._background[lane]),
+                    "admitted": self.admitted[lane],
+                    "rejected": self.rejected[lane],
+                    "shed": self.shed[lane],
+                    "avg_wait_ms": (
+                        self.total_wait[lane] / self.admitted[lane] * 1000.0 if self.admitted[lane] else 0.0
+                    ),
+                    "max_wait_ms": self.max_wait[lane] * 1000.0
+                }
+                for lane in self.lanes
+            }
+        }
+
+
+class _Slot:
+    __slots__ = ("controller", "lane", "bounded", "started")
+
+    def __init__(self, controller: AdmissionController, lane: str, bounded: bool):
+        self.controller = controller
+        self.lane = lane
+        self.bounded = bounded
+
+    async def __aenter__(self):
+        await self.controller.acquire(self.lane, self.bounded)
+        self.started = time.perf_counter()
+
+    async def __aexit__(self, *exc_info):
+        self.controller.release(time.perf_counter() - self.started)
@@ -0,0 +1,194 @@
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from app.schemas.combined_analysis import CombinedAnalysis
+
+
+class CacheBackend:
+    """Key/value store behind AnalysisCache.
+
+    The get/set signature mirrors a Redis client so a Redis-compatible
+    server can be shared by several API workers.
+    """
+
+    # Local backends are called directly on the event loop; remote ones
+    # are offloaded to a thread
+    is_local = True
+
+    def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+
+class InMemoryCacheBackend(CacheBackend):
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max(1, max_entries)
+        # key -> (value, monotonic expiry time or None), least recently used first
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+
+class RedisCacheBackend(CacheBackend):
+    # Size bounds and LRU eviction are delegated to the server's
+    # maxmemory / maxmemory-policy settings
+    is_local = False
+
+    def __init__(self, url: str, prefix: str = "analysis:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(self.prefix + key)
+        return value.decode("utf-8") if value is not None else None
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None):
+        self.client.set(self.prefix + key, value, px=int(ttl * 1000) if ttl else None)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+    def stats(self) -> dict:
+        info = self.client.info("stats")
+        return {
+            "backend": "redis",
+            "evictions": info.get("evicted_keys", 0),
+            "expirations": info.get("expired_keys", 0)
+        }
+
+
+class AnalysisCache:
+    def __init__(self, backend: CacheBackend, model_version: str, ttl: Optional[float] = None):
+        self.backend = backend
+        self.model_version = model_version
+        self.ttl = ttl or None
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        # Whitespace differences should not defeat the cache. Case is kept:
+        # the NLI and sentiment models are case-sensitive, so texts that
+        # differ only in case can be analysed differently
+        return " ".join(text.split())
+
+    def key_for(self, title: str, description: str) -> str:
+        payload = "\x00".join([
+            self.model_version,
+            self._normalize(title),
+            self._normalize(description)
+        ])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def _call(self, fn, *args):
+        if self.backend.is_local:
+            return fn(*args)
+        return await asyncio.to_thread(fn, *args)
+
+    async def get(self, title: str, description: str) -> Optional[CombinedAnalysis]:
+        try:
+            value = await self._call(self.backend.get, self.key_for(title, description))
+        except Exception as e:
+            # A cache outage must never fail the analysis itself
+            self.errors += 1
+            print(f"Analysis cache error: {str(e)}")
+            value = None
+
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return CombinedAnalysis.model_validate_json(value)
+
+    async def set(self, title: str, description: str, analysis: CombinedAnalysis):
+        try:
+            await self._call(
+                self.backend.set,
+                self.key_for(title, description),
+                analysis.model_dump_json(),
+                self.ttl
+            )
+        except Exception as e:
+            self.errors += 1
+            print(f"Analysis cache error: {str(e)}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        try:
+            backend_stats = self.backend.stats()
+        except Exception as e:
+            backend_stats = {"error": str(e)}
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "errors": self.errors,
+            "ttl_s": self.ttl,
+            **backend_stats
+        }
+
+
+def build_analysis_cache(settings) -> Optional[AnalysisCache]:
+    if settings.analysis_cache_backend == "none":
+        return None
+    if settings.analysis_cache_backend == "redis":
+        backend = RedisCacheBackend(settings.analysis_cache_redis_url)
+    else:
+        backend = InMemoryCacheBackend(settings.analysis_cache_max_entries)
+    return AnalysisCache(
+        backend,
+        model_version=settings.model_fingerprint(),
+        ttl=settings.analysis_cache_ttl_s
+    )
@@ -0,0 +1,530 @@
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, List, Optional, Tuple
+
+COLUMNS = [
+    "id", "title", "description", "category", "urgency_level", "status",
+    "created_at", "updated_at", "document_count", "document_job_id"
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS incidents (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    category TEXT NOT NULL,
+    urgency_level TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    document_count INTEGER NOT NULL DEFAULT 0,
+    document_job_id TEXT
+);
+-- Each filter index ends in id so filtered listings page by id without sorting
+CREATE INDEX IF NOT EXISTS idx_incidents_status ON incidents(status, id);
+CREATE INDEX IF NOT EXISTS idx_incidents_category ON incidents(category, id);
+CREATE INDEX IF NOT EXISTS idx_incidents_urgency ON incidents(urgency_level, id);
+CREATE INDEX IF NOT EXISTS idx_incidents_created_at ON incidents(created_at, id);
+CREATE TABLE IF NOT EXISTS id_sequences (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO id_sequences (name, value) VALUES ('incidents', 0);
+-- Running totals per dimension value, maintained on every write
+CREATE TABLE IF NOT EXISTS incident_counters (
+    dimension TEXT NOT NULL,
+    value TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (dimension, value)
+);
+-- Event counts per time bucket: category and urgency are counted when an
+-- incident is created, status whenever an incident enters that status
+CREATE TABLE IF NOT EXISTS incident_rollups (
+    granularity TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    dimension TEXT NOT NULL,
+    value TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (granularity, bucket, dimension, value)
+);
+-- Full-text index keyed by incident id (rowid). Rows are written after the
+-- incident, in batches, so search may lag creation slightly; prefix indexes
+-- keep "term*" queries off the full term list
+CREATE VIRTUAL TABLE IF NOT EXISTS incident_search USING fts5(
+    title, description, entities, documents,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+"""
+
+STATUSES = ["open", "in_progress", "resolved", "closed"]
+DIMENSIONS = ("status", "category", "urgency_level")
+
+SEARCH_FIELDS = ("title", "description", "entities", "documents")
+# Indexed ids behind the highest that the startup backfill checks again, in
+# case a process stopped before its queued index updates were written
+SEARCH_BACKFILL_OVERLAP = 10000
+
+SEARCH_TOKEN = re.compile(r'(-?)"([^"]*)"?|(\S+)')
+
+# Bucket keys are prefixes of the ISO timestamps stored in created_at
+GRANULARITIES = {"minute": "%Y-%m-%dT%H:%M", "hour": "%Y-%m-%dT%H"}
+
+UPSERT_COUNTER = (
+    "INSERT INTO incident_counters (dimension, value, count) VALUES (?, ?, ?) "
+    "ON CONFLICT(dimension, value) DO UPDATE SET count = count + excluded.count"
+)
+UPSERT_ROLLUP = (
+    "INSERT INTO incident_rollups (granularity, bucket, dimension, value, count) "
+    "VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT(granularity, bucket, dimension, value) DO UPDATE SET count = count + excluded.count"
+)
+
+
+def _to_db(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def search_expression(query: str) -> str:
+    """Translate a search box query into an FTS5 MATCH expression.
+
+    Words and "quoted phrases" must all match; ``word*`` matches a prefix and
+    a leading ``-`` excludes a word or phrase. Everything is quoted, so FTS5
+    operators and punctuation in the query are taken as plain text.
+    """
+    include, exclude = [], []
+    for negated, phrase, word in SEARCH_TOKEN.findall(query):
+        prefix = False
+        if word:
+            if word.startswith("-") and len(word) > 1:
+                negated, word = "-", word[1:]
+            prefix = word.endswith("*")
+            phrase = word.rstrip("*")
+        if not any(character.isalnum() for character in phrase):
+            continue
+        term = '"' + phrase.replace('"', '""') + '"' + ("*" if prefix else "")
+        (exclude if negated else include).append(term)
+    if not include:
+        raise ValueError("Query has no words to search for")
+    return " ".join(include) + "".join(f" NOT {term}" for term in exclude)
+
+
+def _from_row(row) -> dict:
+    incident = dict(zip(COLUMNS, row))
+    incident["created_at"] = datetime.fromisoformat(incident["created_at"])
+    incident["updated_at"] = datetime.fromisoformat(incident["updated_at"])
+    return incident
+
+
+class IncidentStore:
+    """SQLite-backed incident storage shared by every API worker.
+
+    Each thread gets its own connection; all calls are made through a small
+    thread pool so the event loop never blocks on database I/O.
+    """
+
+    def __init__(self, db_path: str, threads: int = 4, minute_retention_hours: int = 48):
+        self.db_path = db_path
+        self.minute_retention = timedelta(hours=minute_retention_hours)
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="incident-store")
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+        self._backfill_metrics()
+
+    def _backfill_metrics(self):
+        # One-off scan for databases created before counters were maintained
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM incident_counters LIMIT 1").fetchone():
+                return
+            if not conn.execute("SELECT 1 FROM incidents LIMIT 1").fetchone():
+                return
+            for dimension in DIMENSIONS:
+                conn.execute(
+                    f"INSERT INTO incident_counters (dimension, value, count) "
+                    f"SELECT '{dimension}', {dimension}, COUNT(*) FROM incidents GROUP BY {dimension}"
+                )
+            # Past status changes are not recorded, so each incident counts
+            # as having entered "open" when it was created
+            for granularity, fmt in GRANULARITIES.items():
+                prefix = len(datetime(2000, 1, 1).strftime(fmt))
+                for dimension, value in (("category", "category"), ("urgency_level", "urgency_level"),
+                                         ("status", "'open'")):
+                    conn.execute(
+                        f"INSERT INTO incident_rollups (granularity, bucket, dimension, value, count) "
+                        f"SELECT '{granularity}', substr(created_at, 1, {prefix}), '{dimension}', "
+                        f"{value}, COUNT(*) FROM incidents GROUP BY 2, 4"
+                    )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # WAL makes NORMAL durable against application crashes
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    async def run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    # Id allocation -------------------------------------------------------
+
+    def allocate_ids_sync(self, count: int = 1) -> List[int]:
+        # A single UPDATE ... RETURNING is atomic across threads and processes
+        with self._connect() as conn:
+            (last,) = conn.execute(
+                "UPDATE id_sequences SET value = value + ? WHERE name = 'incidents' RETURNING value",
+                (count,)
+            ).fetchone()
+        return list(range(last - count + 1, last + 1))
+
+    async def allocate_id(self) -> int:
+        return (await self.run(self.allocate_ids_sync, 1))[0]
+
+    # Writes --------------------------------------------------------------
+
+    def _record_events(self, conn: sqlite3.Connection, counters: Counter, events: Counter):
+        conn.executemany(
+            UPSERT_COUNTER,
+            [(dimension, value, delta) for (dimension, value), delta in counters.items() if delta]
+        )
+        rollups = Counter()
+        for (at, dimension, value), count in events.items():
+            for granularity, fmt in GRANULARITIES.items():
+                rollups[(granularity, at.strftime(fmt), dimension, value)] += count
+        conn.executemany(UPSERT_ROLLUP, [key + (count,) for key, count in rollups.items()])
+
+        # Minute buckets are only kept for recent windows
+        cutoff = datetime.utcnow() - self.minute_retention
+        conn.execute(
+            "DELETE FROM incident_rollups WHERE granularity = 'minute' AND bucket < ?",
+            (cutoff.strftime(GRANULARITIES["minute"]),)
+        )
+
+    def add_many_sync(self, incidents: List[dict]) -> List[dict]:
+        counters, events = Counter(), Counter()
+        for incident in incidents:
+            for dimension in DIMENSIONS:
+                counters[(dimension, incident[dimension])] += 1
+                events[(incident["created_at"], dimension, incident[dimension])] += 1
+
+        # Rows, counters and rollups commit together in one transaction
+        with self._connect() as conn:
+            conn.executemany(
+                f"INSERT INTO incidents ({', '.join(COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in COLUMNS)})",
+                [[_to_db(incident.get(column)) for column in COLUMNS] for incident in incidents]
+            )
+            self._record_events(conn, counters, events)
+        return incidents
+
+    async def add_many(self, incidents: List[dict]) -> List[dict]:
+        return await self.run(self.add_many_sync, incidents)
+
+    def update_status_sync(self, incident_id: int, status: str) -> Optional[dict]:
+        now = datetime.utcnow()
+        conn = self._connect()
+        with conn:
+            # Take the write lock up front so the old status read below
+            # cannot go stale before the counters are adjusted
+            conn.execute("BEGIN IMMEDIATE")
+            previous = conn.execute("SELECT status FROM incidents WHERE id = ?", (incident_id,)).fetchone()
+            if previous is None:
+                return None
+            row = conn.execute(
+                f"UPDATE incidents SET status = ?, updated_at = ? WHERE id = ? "
+                f"RETURNING {', '.join(COLUMNS)}",
+                (status, now.isoformat(), incident_id)
+            ).fetchone()
+            if previous[0] != status:
+                self._record_events(
+                    conn,
+                    Counter({("status", previous[0]): -1, ("status", status): 1}),
+                    Counter({(now, "status", status): 1})
+                )
+        return _from_row(row)
+
+    async def update_status(self, incident_id: int, status: str) -> Optional[dict]:
+        return await self.run(self.update_status_sync, incident_id, status)
+
+    # Reads ---------------------------------------------------------------
+
+    def get_sync(self, incident_id: int) -> Optional[dict]:
+        row = self._connect().execute(
+            f"SELECT {', '.join(COLUMNS)} FROM incidents WHERE id = ?", (incident_id,)
+        ).fetchone()
+        return _from_row(row) if row else None
+
+    async def get(self, incident_id: int) -> Optional[dict]:
+        return await self.run(self.get_sync, incident_id)
+
+    def get_many_sync(self, incident_ids: List[int]) -> dict:
+        placeholders = ", ".join("?" for _ in incident_ids)
+        rows = self._connect().execute(
+            f"SELECT {', '.join(COLUMNS)} FROM incidents WHERE id IN ({placeholders})",
+            list(incident_ids)
+        ).fetchall()
+        return {row[0]: _from_row(row) for row in rows}
+
+    async def get_many(self, incident_ids: List[int]) -> dict:
+        if not incident_ids:
+            return {}
+        return await self.run(self.get_many_sync, incident_ids)
+
+    def texts_after_sync(self, after_id: int, limit: int) -> List[Tuple[int, str]]:
+        # Id-ordered scan used to (re)build derived indexes
+        return self._connect().execute(
+            "SELECT id, title || ' ' || description FROM incidents WHERE id > ? ORDER BY id LIMIT ?",
+            (after_id, limit)
+        ).fetchall()
+
+    async def texts_after(self, after_id: int, limit: int = 256) -> List[Tuple[int, str]]:
+        return await self.run(self.texts_after_sync, after_id, limit)
+
+    def newest_texts_sync(self, limit: int) -> List[Tuple[str, str]]:
+        # (title, description) of the latest incidents, e.g. to distil the classifier on
+        return self._connect().execute(
+            "SELECT title, description FROM incidents ORDER BY id DESC LIMIT ?", (limit,)
+        ).fetchall()
+
+    @staticmethod
+    def _filters(
+        status: Optional[str] = None,
+        category: Optional[str] = None,
+        urgency_level: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None
+    ) -> Tuple[List[str], List[Any]]:
+        clauses, params = [], []
+        for column, value in (("status", status), ("category", category), ("urgency_level", urgency_level)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if created_after is not None:
+            clauses.append("created_at >= ?")
+            params.append(created_after.isoformat())
+        if created_before is not None:
+            clauses.append("created_at < ?")
+            params.append(created_before.isoformat())
+        return clauses, params
+
+    def list_sync(self, cursor: Optional[int] = None, limit: int = 50, **filters) -> dict:
+        clauses, params = self._filters(**filters)
+        # Keyset pagination: newest first, continuing below the last id seen
+        if cursor is not None:
+            clauses.append("id < ?")
+            params.append(cursor)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connect().execute(
+            f"SELECT {', '.join(COLUMNS)} FROM incidents {where} ORDER BY id DESC LIMIT ?",
+            params + [limit + 1]
+        ).fetchall()
+
+        items = [_from_row(row) for row in rows[:limit]]
+        return {
+            "items": items,
+            "next_cursor": items[-1]["id"] if len(rows) > limit else None
+        }
+
+    async def list(self, **filters) -> dict:
+        return await self.run(lambda: self.list_sync(**filters))
+
+    # Search ---------------------------------------------------------------
+
+    def index_sync(self, updates: List[dict]) -> List[dict]:
+        """Write search index updates in one transaction.
+
+        Each update carries an ``id`` and any of SEARCH_FIELDS and sets only
+        those, so an incident's own text and its documents' text, written
+        separately, can arrive in either order.
+        """
+        with self._connect() as conn:
+            for update in updates:
+                fields = {name: update[name] for name in SEARCH_FIELDS if update.get(name) is not None}
+                if not fields:
+                    continue
+                changed = conn.execute(
+                    f"UPDATE incident_search SET {', '.join(f'{name} = ?' for name in fields)} WHERE rowid = ?",
+                    list(fields.values()) + [update["id"]]
+                ).rowcount
+                if not changed:
+                    conn.execute(
+                        f"INSERT INTO incident_search (rowid, {', '.join(SEARCH_FIELDS)}) "
+                        f"VALUES (?, {', '.join('?' for _ in SEARCH_FIELDS)})",
+                        [update["id"]] + [fields.get(name, "") for name in SEARCH_FIELDS]
+                    )
+        return updates
+
+    def backfill_search_sync(self, batch_size: int = 5000) -> int:
+        """Index the title and description of stored incidents the index is missing.
+
+        Scans from a little below the highest indexed id, so on an existing
+        database it only looks at recent incidents. Returns the number indexed.
+        """
+        conn = self._connect()
+        last = conn.execute("SELECT rowid FROM incident_search ORDER BY rowid DESC LIMIT 1").fetchone()
+        cursor = max(0, last[0] - SEARCH_BACKFILL_OVERLAP) if last else 0
+        indexed = 0
+        while True:
+            with conn:
+                # Other processes index concurrently; rows they wrote are skipped
+                conn.execute("BEGIN IMMEDIATE")
+                upper = conn.execute(
+                    "SELECT max(id) FROM (SELECT id FROM incidents WHERE id > ? ORDER BY id LIMIT ?)",
+                    (cursor, batch_size)
+                ).fetchone()[0]
+                if upper is None:
+                    return indexed
+                indexed += conn.execute(
+                    "INSERT INTO incident_search (rowid, title, description, entities, documents) "
+                    "SELECT id, title, description, '', '' FROM incidents WHERE id > ? AND id <= ? "
+                    "AND id NOT IN (SELECT rowid FROM incident_search WHERE rowid > ? AND rowid <= ?)",
+                    (cursor, upper, cursor, upper)
+                ).rowcount
+            cursor = upper
+
+    def search_sync(self, query: str, cursor: Optional[int] = None, limit: int = 50, **filters) -> dict:
+        """Incidents matching ``query`` (see search_expression) and the filters,
+        newest first, with a snippet of the best matching field."""
+        clauses, params = self._filters(**filters)
+        clauses.insert(0, "incident_search MATCH ?")
+        params.insert(0, search_expression(query))
+        # The rowid bound and order let FTS5 walk its doclists newest first
+        # and stop after one page instead of collecting every match
+        if cursor is not None:
+            clauses.append("incident_search.rowid < ?")
+            params.append(cursor)
+        conn = self._connect()
+        # Date ranges also bound the rowids, so a range far in the past does
+        # not walk every newer match first
+        for bound in self._date_id_bounds(conn, filters.get("created_after"), filters.get("created_before")):
+            if bound is None:
+                return {"items": [], "next_cursor": None}
+            clauses.append(bound[0])
+            params.append(bound[1])
+
+        columns = ", ".join(f"incidents.{column}" for column in COLUMNS)
+        rows = conn.execute(
+            f"SELECT {columns}, snippet(incident_search, -1, '[', ']', '...', 12) "
+            f"FROM incident_search JOIN incidents ON incidents.id = incident_search.rowid "
+            f"WHERE {' AND '.join(clauses)} ORDER BY incident_search.rowid DESC LIMIT ?",
+            params + [limit + 1]
+        ).fetchall()
+
+        items = []
+        for row in rows[:limit]:
+            item = _from_row(row[:-1])
+            item["snippet"] = row[-1]
+            items.append(item)
+        return {
+            "items": items,
+            "next_cursor": items[-1]["id"] if len(rows) > limit else None
+        }
+
+    @staticmethod
+    def _date_id_bounds(conn, created_after: Optional[datetime], created_before: Optional[datetime]) -> list:
+        """Rowid clauses bounding the ids of incidents created in the range,
+        or None when no incident was created in it.
+
+        Ids follow creation only roughly (an id is taken before analysis), so
+        the exact ids are looked up, from whichever costs the fewest rows: the
+        created_at index over the range itself, below the end date, or the
+        ids above it. A lower bound matters only for small ranges: walking
+        down from the newest match otherwise fills a page before reaching it.
+        """
+        if created_before is None:
+            return []
+        last = conn.execute("SELECT max(id) FROM incidents").fetchone()[0] or 0
+
+        def position(stamp: str) -> int:
+            # Id of the first incident created at or after ``stamp``
+            row = conn.execute(
+                "SELECT id FROM incidents WHERE created_at >= ? ORDER BY created_at, id LIMIT 1", (stamp,)
+            ).fetchone()
+            return row[0] if row else last + 1
+
+        before = created_before.isoformat()
+        end = position(before)
+        if created_after is not None:
+            after = created_after.isoformat()
+            start = position(after)
+            if start > last:
+                return [None]
+            if end - start < min(end, last - end):
+                low, high = conn.execute(
+                    "SELECT min(id), max(id) FROM incidents INDEXED BY idx_incidents_created_at "
+                    "WHERE created_at >= ? AND created_at < ?",
+                    (after, before)
+                ).fetchone()
+                if low is None:
+                    return [None]
+                return [("incident_search.rowid >= ?", low), ("incident_search.rowid <= ?", high)]
+
+        if end < last - end:
+            sql = "SELECT max(id) FROM incidents INDEXED BY idx_incidents_created_at WHERE created_at < ?"
+        else:
+            sql = "SELECT id FROM incidents NOT INDEXED WHERE created_at < ? ORDER BY id DESC LIMIT 1"
+        row = conn.execute(sql, (before,)).fetchone()
+        return [("incident_search.rowid <= ?", row[0]) if row and row[0] is not None else None]
+
+    async def search(self, query: str, **filters) -> dict:
+        return await self.run(lambda: self.search_sync(query, **filters))
+
+    # Metrics --------------------------------------------------------------
+
+    def counters_sync(self) -> dict:
+        counters = {dimension: {} for dimension in DIMENSIONS}
+        for dimension, value, count in self._connect().execute(
+            "SELECT dimension, value, count FROM incident_counters"
+        ):
+            counters[dimension][value] = count
+        return counters
+
+    async def counters(self) -> dict:
+        return await self.run(self.counters_sync)
+
+    def rollups_sync(self, dimension: str, granularity: str, since: datetime,
+                     until: Optional[datetime] = None) -> dict:
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension: {dimension}")
+        fmt = GRANULARITIES[granularity]
+        params = [granularity, dimension, since.strftime(fmt)]
+        upper = ""
+        if until is not None:
+            upper = "AND bucket <= ?"
+            params.append(until.strftime(fmt))
+        rows = self._connect().execute(
+            f"SELECT bucket, value, count FROM incident_rollups "
+            f"WHERE granularity = ? AND dimension = ? AND bucket >= ? {upper} ORDER BY bucket",
+            params
+        ).fetchall()
+
+        buckets, totals = {}, Counter()
+        for bucket, value, count in rows:
+            buckets.setdefault(bucket, {})[value] = count
+            totals[value] += count
+        return {
+            "buckets": [{"bucket": bucket, "counts": counts} for bucket, counts in buckets.items()],
+            "totals": dict(totals)
+        }
+
+    async def rollups(self, dimension: str, granularity: str, since: datetime,
+                      until: Optional[datetime] = None) -> dict:
+        return await self.run(self.rollups_sync, dimension, granularity, since, until)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,402 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.utils.metrics import (
+    CLASSIFIER_AUDITS,
+    CLASSIFIER_TIER_ITEMS,
+    CLASSIFIER_TIER_SECONDS,
+    INFERENCE_BATCH_SECONDS,
+    INFERENCE_BATCH_SIZE,
+    INFERENCE_POOL_RESTARTS,
+    INPUT_TOKENS
+)
+
+# Models owned by the current process. In process-pool mode each worker
+# fills this once from its initializer; in thread mode the API process does.
+_models: Dict[str, Any] = {}
+
+# Per-model load state ("loading", "loaded", "failed") and timings for
+# this process, reported back to the API with every task result
+_load_state: Dict[str, dict] = {}
+_warmup_state: Dict[str, Any] = {}
+_warmup_barrier = None
+
+WARMUP_TEXT = "Shipment ABC1234 of sesame cargo is delayed at the port and the buyer payment is pending."
+
+
+def _load(name: str, factory: Callable[[], Any]):
+    _load_state[name] = {"state": "loading"}
+    started = time.perf_counter()
+    try:
+        _models[name] = factory()
+        _load_state[name] = {"state": "loaded", "load_s": time.perf_counter() - started}
+    except Exception as e:
+        # Recorded rather than raised so one bad model does not kill the
+        # worker before readiness can report what went wrong
+        print(f"Error loading {name} model: {str(e)}")
+        _load_state[name] = {
+            "state": "failed",
+            "load_s": time.perf_counter() - started,
+            "error": str(e)
+        }
+
+
+def build_classifier(embedder=None):
+    """The configured zero-shot classifier, i.e. the cascade's teacher."""
+    from app.config import settings
+
+    if settings.model_profile == "stub":
+        from app.models.stubs import StubClassifier
+        return StubClassifier()
+
+    from app.models.classifier import IncidentClassifier
+    return IncidentClassifier(
+        model_name=settings.classifier_model,
+        backend=settings.classifier_backend,
+        onnx_dir=settings.onnx_model_dir,
+        batch_size=settings.batch_max_size,
+        embedder=embedder,
+        shortlist_k=settings.classifier_shortlist_k,
+        shortlist_min_confidence=settings.classifier_shortlist_min_confidence,
+        window_tokens=settings.chunk_window_tokens,
+        overlap_tokens=settings.chunk_overlap_tokens,
+        max_tokens=settings.analysis_max_tokens,
+        aggregation=settings.classifier_chunk_aggregation
+    )
+
+
+def build_cascade(teacher):
+    """Put the distilled student in front of ``teacher`` when there is one for it."""
+    from app.config import settings
+    from app.models.student import CascadeClassifier, StudentClassifier
+
+    path = settings.classifier_student_path
+    if not settings.classifier_cascade_enabled or not path or not os.path.exists(path):
+        return teacher
+    student = StudentClassifier.load(path)
+    trained_for = student.metadata.get("teacher")
+    if trained_for != settings.classifier_fingerprint() or student.categories != list(teacher.categories):
+        # A student only imitates the teacher it was distilled from
+        print(f"Ignoring classifier student {path}: trained for {trained_for}, "
+              f"not {settings.classifier_fingerprint()}")
+        return teacher
+    return CascadeClassifier(
+        student,
+        teacher,
+        threshold=settings.classifier_cascade_threshold,
+        audit_rate=settings.classifier_cascade_audit_rate
+    )
+
+
+def load_models(torch_threads: int = 0, warmup_barrier=None):
+    global _warmup_barrier
+    import torch
+    from app.config import settings
+    from app.models.embedder import TextEmbedder
+    from app.models.entity_extractor import EntityExtractor
+    from app.models.sentiment_analyzer import SentimentAnalyzer
+
+    _warmup_barrier = warmup_barrier
+
+    # Keep intra-op threads per worker bounded so workers do not oversubscribe cores
+    if torch_threads > 0:
+        torch.set_num_threads(torch_threads)
+
+    if _load_state:
+        # Already loaded here, e.g. inherited from the app.serve parent
+        return
+
+    if settings.model_profile == "stub":
+        from app.models import stubs
+        if settings.similarity_enabled:
+            _load("embedder", stubs.StubEmbedder)
+        _load("classifier", lambda: build_cascade(build_classifier()))
+        _load("sentiment", stubs.StubSentimentAnalyzer)
+        _load("extractor", lambda: stubs.StubEntityExtractor(
+            batch_size=settings.entity_batch_size,
+            n_process=settings.entity_n_process,
+            max_tokens=settings.analysis_max_tokens
+        ))
+        return
+
+    if settings.classifier_shortlist_k or settings.similarity_enabled:
+        _load("embedder", lambda: TextEmbedder(settings.embedding_model))
+    _load("classifier", lambda: build_cascade(build_classifier(_models.get("embedder"))))
+    _load("sentiment", lambda: SentimentAnalyzer(
+        model_name=settings.sentiment_model,
+        backend=settings.sentiment_backend,
+        onnx_dir=settings.onnx_model_dir,
+        batch_size=settings.batch_max_size,
+        window_tokens=settings.chunk_window_tokens,
+        overlap_tokens=settings.chunk_overlap_tokens,
+        max_tokens=settings.analysis_max_tokens,
+        aggregation=settings.sentiment_chunk_aggregation
+    ))
+    _load("extractor", lambda: EntityExtractor(
+        model_name=settings.spacy_model,
+        batch_size=settings.entity_batch_size,
+        n_process=settings.entity_n_process,
+        max_tokens=settings.analysis_max_tokens
+    ))
+
+
+def _reply(result: Any, task: Optional[dict] = None) -> Tuple[Any, int, dict]:
+    # Every task returns a snapshot of its worker's model state so the API
+    # process can report it without a separate round-trip per worker, plus
+    # the task's own timings for the metrics recorded there
+    classifier = _models.get("classifier")
+    snapshot = {
+        "models": {name: dict(state) for name, state in _load_state.items()},
+        "warmup": dict(_warmup_state),
+        "shortlist": dict(classifier.shortlist_stats) if classifier else {},
+        "cascade": classifier.cascade_stats() if hasattr(classifier, "cascade_stats") else None,
+        "chunking": {
+            name: _models[name].windower.stats()
+            for name in ("classifier", "sentiment")
+            if hasattr(_models.get(name), "windower")
+        },
+        "task": task or {}
+    }
+    return result, os.getpid(), snapshot
+
+
+def _task(started: float, items: int, **extra) -> dict:
+    return {"compute_s": time.perf_counter() - started, "items": items, **extra}
+
+
+def warmup(batch_sizes: List[int]):
+    # Dummy inferences at every configured batch size so the first real
+    # request does not pay for cold kernels and allocator growth
+    failed = [name for name, state in _load_state.items() if state["state"] == "failed"]
+    # Models warmed up before a fork are not warmed again in every child
+    if not failed and "warmup_s" not in _warmup_state:
+        started = time.perf_counter()
+        for batch_size in batch_sizes:
+            texts = [WARMUP_TEXT] * batch_size
+            # A cascade's teacher only sees escalations, so it is warmed directly
+            classifier = _models["classifier"]
+            getattr(classifier, "teacher", classifier).classify_many([("Warmup", WARMUP_TEXT)] * batch_size)
+            _models["sentiment"].analyze_many(texts)
+            _models["extractor"].extract_entities_many(texts)
+            if "embedder" in _models:
+                _models["embedder"].embed(texts)
+        _warmup_state["warmup_s"] = time.perf_counter() - started
+        _warmup_state["batch_sizes"] = list(batch_sizes)
+        # Reset counters polluted by the dummy inputs
+        if "classifier" in _models:
+            _models["classifier"].reset_stats()
+        for name in ("classifier", "sentiment"):
+            if hasattr(_models.get(name), "windower"):
+                _models[name].windower.reset_stats()
+
+    # Hold this worker until every worker has picked up a warmup task so
+    # no single process warms up twice while another stays cold
+    if _warmup_barrier is not None:
+        try:
+            _warmup_barrier.wait(timeout=600)
+        except Exception:
+            pass
+    return _reply({"failed": failed})
+
+
+def classify_batch(items: List[Tuple[str, str]]):
+    started = time.perf_counter()
+    classifier = _models["classifier"]
+    if hasattr(classifier, "cascade_stats"):
+        # Counts and timings of each tier, for the per-tier metrics
+        tiers = {}
+        results = classifier.classify_many(items, tiers=tiers)
+        return _reply(results, _task(started, len(items), tiers=tiers))
+    results = classifier.classify_many(items)
+    return _reply(results, _task(started, len(items)))
+
+
+def sentiment_batch(texts: List[str]):
+    started = time.perf_counter()
+    # Every analysed incident passes through sentiment exactly once, so the
+    # token counts from its windowing pass measure input lengths
+    token_lengths = []
+    results = _models["sentiment"].analyze_many(texts, token_lengths=token_lengths)
+    return _reply(results, _task(started, len(texts), token_lengths=token_lengths))
+
+
+def embed_batch(texts: List[str]):
+    started = time.perf_counter()
+    vectors = list(_models["embedder"].embed(texts))
+    return _reply(vectors, _task(started, len(texts)))
+
+
+def extract_entities_batch(texts: List[str], entity_types: Optional[List[str]] = None):
+    started = time.perf_counter()
+    results = _models["extractor"].extract_entities_many(texts, entity_types=entity_types)
+    return _reply(results, _task(started, len(texts)))
+
+
+class InferencePool:
+    def __init__(self, workers: int = 2, torch_threads: int = 0, start_method: str = "spawn"):
+        self.workers = workers
+        self.torch_threads = torch_threads
+        self.start_method = start_method
+        self.worker_stats: Dict[int, dict] = {}
+        self.state = "starting"
+        self.error: Optional[str] = None
+        self.startup_s: Optional[float] = None
+        # Tasks submitted to the executor and not yet finished
+        self.pending = 0
+        # Rebuilds of the process pool after a worker died
+        self.restarts = 0
+        self._ready: Optional[asyncio.Event] = None
+        self._warmup_batch_sizes: List[int] = []
+        self._restart_task: Optional[asyncio.Task] = None
+        self.executor = self._make_executor()
+
+    def _make_executor(self):
+        if self.workers > 0:
+            context = multiprocessing.get_context(self.start_method)
+            return ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=load_models,
+                initargs=(self.torch_threads, context.Barrier(self.workers))
+            )
+        # In-process mode: models live in the API process and inference
+        # runs on dedicated threads so the event loop stays free
+        return ThreadPoolExecutor(max_workers=2, thread_name_prefix="inference")
+
+    @property
+    def size(self) -> int:
+        return self.workers if self.workers > 0 else 2
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    async def start(self, warmup_batch_sizes: List[int]):
+        """Load and warm up models in the background; never raises."""
+        loop = asyncio.get_running_loop()
+        self._ready = self._ready or asyncio.Event()
+        self._warmup_batch_sizes = list(warmup_batch_sizes)
+        self.state = "loading"
+        started = time.perf_counter()
+        try:
+            if self.workers > 0:
+                # One warmup task per worker; spawning the workers runs the
+                # model-loading initializer in each of them
+                results = await asyncio.gather(*[
+                    self._submit(warmup, warmup_batch_sizes) for _ in range(self.workers)
+                ])
+            else:
+                await loop.run_in_executor(self.executor, load_models, self.torch_threads)
+                results = [await self._submit(warmup, warmup_batch_sizes)]
+
+            failed = sorted({name for result in results for name in result["failed"]})
+            if failed:
+                raise RuntimeError(f"Models failed to load: {', '.join(failed)}")
+            self.state = "ready"
+            self.error = None
+        except Exception as e:
+            print(f"Inference pool startup error: {str(e)}")
+            self.state = "failed"
+            self.error = str(e)
+        finally:
+            self.startup_s = time.perf_counter() - started
+            self._ready.set()
+            print(f"Inference pool {self.state} in {self.startup_s:.2f}s")
+
+    async def wait_ready(self) -> bool:
+        if self._ready is None:
+            self._ready = asyncio.Event()
+        await self._ready.wait()
+        return self.ready
+
+    def _restart(self, broken):
+        # Every task in flight on a dead pool fails with BrokenProcessPool;
+        # only the first of them, and only on a pool that was serving,
+        # rebuilds it. A pool that breaks while starting stays failed.
+        if broken is not self.executor or self.state != "ready":
+            return
+        print("Inference worker died; restarting the inference pool")
+        INFERENCE_POOL_RESTARTS.inc()
+        self.restarts += 1
+        self.state = "restarting"
+        self.error = "An inference worker died"
+        # New requests wait for the rebuilt pool instead of failing fast
+        self._ready = asyncio.Event()
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.worker_stats.clear()
+        self.executor = self._make_executor()
+        self._restart_task = asyncio.get_running_loop().create_task(self.start(self._warmup_batch_sizes))
+
+    async def _submit(self, fn: Callable, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        self.pending += 1
+        try:
+            result, pid, snapshot = await loop.run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            self._restart(executor)
+            raise RuntimeError("An inference worker died; the inference pool is restarting") from None
+        finally:
+            self.pending -= 1
+        task = snapshot.pop("task")
+        self.worker_stats[pid] = snapshot
+        if "compute_s" in task:
+            INFERENCE_BATCH_SECONDS.labels(fn.__name__).observe(task["compute_s"])
+            INFERENCE_BATCH_SIZE.labels(fn.__name__).observe(task["items"])
+        for length in task.get("token_lengths", ()):
+            INPUT_TOKENS.observe(length)
+        tiers = task.get("tiers")
+        if tiers:
+            CLASSIFIER_TIER_ITEMS.labels("student").inc(tiers["student"])
+            CLASSIFIER_TIER_ITEMS.labels("teacher").inc(tiers["escalated"])
+            CLASSIFIER_TIER_SECONDS.labels("student").observe(tiers["student_s"])
+            if tiers["escalated"] or tiers["audited"]:
+                CLASSIFIER_TIER_SECONDS.labels("teacher").observe(tiers["teacher_s"])
+            CLASSIFIER_AUDITS.labels("agree").inc(tiers["audit_agreed"])
+            CLASSIFIER_AUDITS.labels("disagree").inc(tiers["audited"] - tiers["audit_agreed"])
+        return result
+
+    async def run(self, fn: Callable, *args) -> Any:
+        # Requests arriving during startup wait for the models instead of
+        # hitting a half-loaded worker
+        if not await self.wait_ready():
+            raise RuntimeError(f"Inference models unavailable: {self.error}")
+        return await self._submit(fn, *args)
+
+    def health(self) -> dict:
+        return {
+            "state": self.state,
+            "error": self.error,
+            "startup_s": self.startup_s,
+            "restarts": self.restarts,
+            "workers": {
+                str(pid): {"models": snapshot["models"], "warmup": snapshot["warmup"]}
+                for pid, snapshot in self.worker_stats.items()
+            }
+        }
+
+    def stats(self) -> dict:
+        return {
+            "mode": "process" if self.workers > 0 else "thread",
+            "size": self.size,
+            "torch_threads": self.torch_threads,
+            "state": self.state,
+            "pending": self.pending,
+            "restarts": self.restarts,
+            "workers": {
+                str(pid): {
+                    "shortlist": snapshot["shortlist"],
+                    "chunking": snapshot["chunking"],
+                    "cascade": snapshot["cascade"]
+                }
+                for pid, snapshot in self.worker_stats.items()
+            }
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
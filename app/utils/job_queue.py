@@ -0,0 +1,320 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Awaitable, Callable, List, Optional
+
+from app.utils.document_processor import DocumentProcessor, SavedDocument
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS document_jobs (
+    id TEXT PRIMARY KEY,
+    incident_id INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    error TEXT,
+    analysis TEXT,
+    worker_pid INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_document_jobs_status ON document_jobs(status);
+CREATE INDEX IF NOT EXISTS idx_document_jobs_incident ON document_jobs(incident_id);
+CREATE TABLE IF NOT EXISTS job_documents (
+    job_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    filename TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    status TEXT NOT NULL,
+    text TEXT,
+    error TEXT,
+    PRIMARY KEY (job_id, position)
+);
+"""
+
+
+def requeue_interrupted_jobs(db_path: str, worker_pid: Optional[int] = None) -> int:
+    """Mark jobs left running by stopped processes (or by one, given its pid)
+    as queued again, for processes that start with ``recover_running=False``."""
+    if not os.path.exists(db_path):
+        return 0
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            if worker_pid is None:
+                cursor = conn.execute("UPDATE document_jobs SET status = 'queued' WHERE status = 'running'")
+            else:
+                cursor = conn.execute(
+                    "UPDATE document_jobs SET status = 'queued' WHERE status = 'running' AND worker_pid = ?",
+                    (worker_pid,)
+                )
+            return cursor.rowcount
+    except sqlite3.OperationalError:
+        # No jobs table yet
+        return 0
+    finally:
+        conn.close()
+
+
+class DocumentJobQueue:
+    """Extracts document text in the background, persisting job state in SQLite.
+
+    Jobs survive restarts: queued or interrupted jobs whose files are still
+    on disk are picked up again by ``start``. When ``on_complete`` is given
+    it is awaited with the incident id and the extracted texts once a job's
+    documents are read; the dict it returns is stored as the job's analysis.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        processor: DocumentProcessor,
+        workers: int = 2,
+        on_complete: Optional[Callable[[int, List[str]], Awaitable[Optional[dict]]]] = None
+    ):
+        self.db_path = db_path
+        self.processor = processor
+        self.workers = max(1, workers)
+        self.on_complete = on_complete
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        # Columns added after the table was first released
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(document_jobs)")}
+        for column, column_type in (("analysis", "TEXT"), ("worker_pid", "INTEGER")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE document_jobs ADD COLUMN {column} {column_type}")
+
+        # Observability counters
+        self.started_at = time.monotonic()
+        self.busy_time = 0.0
+        self._running_since = {}
+        self.completed = 0
+        self.failed = 0
+        self._latencies = deque(maxlen=1000)
+
+    def _execute(self, sql: str, params=(), many: bool = False):
+        with self._lock, self._conn:
+            if many:
+                return self._conn.executemany(sql, params).fetchall()
+            return self._conn.execute(sql, params).fetchall()
+
+    async def _db(self, sql: str, params=(), many: bool = False):
+        return await asyncio.to_thread(self._execute, sql, params, many)
+
+    async def start(self, recover_running: bool = True):
+        """Start the workers and resume queued jobs.
+
+        With ``recover_running`` jobs left running by a previous process are
+        requeued too; processes sharing the database with live peers pass
+        False so they do not take over jobs still being worked on.
+        """
+        self._queue = asyncio.Queue()
+        if recover_running:
+            await self._db("UPDATE document_jobs SET status = 'queued' WHERE status = 'running'")
+        # Every process may see the same queued jobs; _claim lets one run each
+        rows = await self._db("SELECT id FROM document_jobs WHERE status = 'queued' ORDER BY created_at")
+        for (job_id,) in rows:
+            self._queue.put_nowait(job_id)
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def enqueue(self, incident_id: int, documents: List[SavedDocument], dispatch: bool = True) -> str:
+        """Persist a job for the documents. With ``dispatch=False`` it only
+        starts once ``dispatch`` is called (or on the next start)."""
+        job_id = uuid.uuid4().hex
+        await self._db(
+            "INSERT INTO document_jobs (id, incident_id, status, created_at) VALUES (?, ?, 'queued', ?)",
+            (job_id, incident_id, time.time())
+        )
+        await self._db(
+            "INSERT INTO job_documents (job_id, position, filename, sha256, size, path, status) "
+            "VALUES (?, ?, ?, ?, ?, ?, 'queued')",
+            [
+                (job_id, position, doc.filename, doc.sha256, doc.size, doc.path)
+                for position, doc in enumerate(documents)
+            ],
+            many=True
+        )
+        if dispatch:
+            self.dispatch(job_id)
+        return job_id
+
+    def dispatch(self, job_id: str):
+        self._queue.put_nowait(job_id)
+
+    async def discard(self, job_id: str):
+        """Delete a job that was enqueued with ``dispatch=False`` and is no
+        longer wanted, along with its uploaded files."""
+        # Deleted first so a process restarting meanwhile cannot resume it
+        await self._db("DELETE FROM document_jobs WHERE id = ? AND status = 'queued'", (job_id,))
+        rows = await self._db("SELECT path FROM job_documents WHERE job_id = ?", (job_id,))
+        for (path,) in rows:
+            self.processor.remove(path)
+        await self._db("DELETE FROM job_documents WHERE job_id = ?", (job_id,))
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            started = time.monotonic()
+            self._running_since[job_id] = started
+            try:
+                await self._process(job_id)
+            except Exception as e:
+                print(f"Document job {job_id} error: {str(e)}")
+            finally:
+                del self._running_since[job_id]
+                self.busy_time += time.monotonic() - started
+
+    def _claim(self, job_id: str) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE document_jobs SET status = 'running', started_at = ?, worker_pid = ? "
+                "WHERE id = ? AND status = 'queued'",
+                (time.time(), os.getpid(), job_id)
+            )
+            return cursor.rowcount == 1
+
+    async def _process(self, job_id: str):
+        if not await asyncio.to_thread(self._claim, job_id):
+            # Already taken by another process sharing the database
+            return
+        documents = await self._db(
+            "SELECT position, path, sha256 FROM job_documents WHERE job_id = ? AND status != 'done' "
+            "ORDER BY position",
+            (job_id,)
+        )
+
+        errors = 0
+        for position, path, sha256 in documents:
+            try:
+                if not os.path.exists(path):
+                    raise FileNotFoundError(f"Upload no longer on disk: {os.path.basename(path)}")
+                text = await asyncio.to_thread(self.processor.extract_text, path, sha256)
+                await self._db(
+                    "UPDATE job_documents SET status = 'done', text = ?, error = NULL "
+                    "WHERE job_id = ? AND position = ?",
+                    (text, job_id, position)
+                )
+            except Exception as e:
+                errors += 1
+                await self._db(
+                    "UPDATE job_documents SET status = 'failed', error = ? "
+                    "WHERE job_id = ? AND position = ?",
+                    (str(e), job_id, position)
+                )
+            # Not in a finally: a job cancelled at shutdown keeps its files
+            # so it can resume on the next start
+            self.processor.remove(path)
+
+        analysis = None
+        if self.on_complete is not None:
+            analysis = await self._analyze(job_id)
+
+        finished = time.time()
+        status = "failed" if errors else "done"
+        await self._db(
+            "UPDATE document_jobs SET status = ?, finished_at = ?, error = ?, analysis = ? WHERE id = ?",
+            (
+                status,
+                finished,
+                f"{errors} document(s) failed" if errors else None,
+                json.dumps(analysis) if analysis is not None else None,
+                job_id
+            )
+        )
+        created = await self._db("SELECT created_at FROM document_jobs WHERE id = ?", (job_id,))
+        if created:
+            self._latencies.append(finished - created[0][0])
+        if errors:
+            self.failed += 1
+        else:
+            self.completed += 1
+
+    async def _analyze(self, job_id: str) -> Optional[dict]:
+        # Includes documents extracted before a restart interrupted the job
+        rows = await self._db(
+            "SELECT incident_id, text FROM job_documents JOIN document_jobs ON document_jobs.id = job_id "
+            "WHERE job_id = ? AND job_documents.status = 'done' ORDER BY position",
+            (job_id,)
+        )
+        texts = [text for _, text in rows if text and text.strip()]
+        if not texts:
+            return None
+        try:
+            return await self.on_complete(rows[0][0], texts)
+        except Exception as e:
+            # The extracted text is kept either way
+            print(f"Document job {job_id} analysis error: {str(e)}")
+            return None
+
+    async def get_job(self, job_id: str) -> Optional[dict]:
+        rows = await self._db(
+            "SELECT id, incident_id, status, created_at, started_at, finished_at, error, analysis "
+            "FROM document_jobs WHERE id = ?",
+            (job_id,)
+        )
+        if not rows:
+            return None
+        job = dict(zip(
+            ["id", "incident_id", "status", "created_at", "started_at", "finished_at", "error", "analysis"],
+            rows[0]
+        ))
+        job["analysis"] = json.loads(job["analysis"]) if job["analysis"] else None
+        documents = await self._db(
+            "SELECT position, filename, sha256, size, status, error, length(text) "
+            "FROM job_documents WHERE job_id = ? ORDER BY position",
+            (job_id,)
+        )
+        job["documents"] = [
+            dict(zip(["position", "filename", "sha256", "size", "status", "error", "text_length"], row))
+            for row in documents
+        ]
+        return job
+
+    async def get_document_text(self, job_id: str, position: int) -> Optional[dict]:
+        rows = await self._db(
+            "SELECT filename, status, text, error FROM job_documents WHERE job_id = ? AND position = ?",
+            (job_id, position)
+        )
+        if not rows:
+            return None
+        return dict(zip(["filename", "status", "text", "error"], rows[0]))
+
+    def stats(self) -> dict:
+        latencies = sorted(self._latencies)
+        now = time.monotonic()
+        elapsed = now - self.started_at
+        busy = self.busy_time + sum(now - since for since in self._running_since.values())
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "running": len(self._running_since),
+            "workers": self.workers,
+            "completed": self.completed,
+            "failed": self.failed,
+            "worker_utilization": min(1.0, busy / (elapsed * self.workers)) if elapsed else 0.0,
+            "avg_job_latency_s": sum(latencies) / len(latencies) if latencies else 0.0,
+            "p95_job_latency_s": (
+                latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else 0.0
+            ),
+            "ocr_cache": self.processor.ocr_cache.stats() if self.processor.ocr_cache else None
+        }
@@ -0,0 +1,152 @@
+import asyncio
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, List, Optional
+
+
+class MicroBatcher:
+    """Collects concurrent inference requests and flushes them as one batch.
+
+    A batch is flushed when it reaches ``max_batch_size`` items or when the
+    oldest queued item has waited ``max_wait_ms``, whichever comes first.
+    ``batch_fn`` is a blocking callable taking a list of items and returning
+    a list of results in the same order. It is awaited through ``runner``
+    (e.g. a worker pool) when given, otherwise on the default executor.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 10.0,
+        runner: Optional[Callable[..., Awaitable[Any]]] = None,
+        max_in_flight: int = 1
+    ):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.runner = runner
+        self.max_in_flight = max(1, max_in_flight)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        # Flushes in progress; the loop only keeps weak references to tasks
+        self._flushes = set()
+
+        # Batch statistics used to tune throughput vs. tail latency
+        self.batches = 0
+        self.items = 0
+        self.size_flushes = 0
+        self.wait_flushes = 0
+        self.errors = 0
+        self.batch_sizes = Counter()
+        self.total_queue_wait = 0.0
+        self.total_batch_time = 0.0
+
+    async def submit(self, item: Any) -> Any:
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future, time.perf_counter()))
+        return await future
+
+    def _ensure_started(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Wait for a free slot first so items keep accumulating meanwhile
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            if len(batch) >= self.max_batch_size:
+                self.size_flushes += 1
+            else:
+                self.wait_flushes += 1
+            task = loop.create_task(self._flush(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            # Requests whose callers went away are dropped before inference
+            live = [(item, future, queued) for item, future, queued in batch if not future.done()]
+            if not live:
+                return
+
+            self.batches += 1
+            self.items += len(live)
+            self.batch_sizes[len(live)] += 1
+            self.total_queue_wait += sum(started - queued for _, _, queued in live)
+
+            try:
+                items = [item for item, _, _ in live]
+                if self.runner is not None:
+                    results = await self.runner(self.batch_fn, items)
+                else:
+                    results = await loop.run_in_executor(None, self.batch_fn, items)
+                if len(results) != len(live):
+                    raise RuntimeError(
+                        f"{self.name} batch returned {len(results)} results for {len(live)} items"
+                    )
+            except Exception as e:
+                self.errors += 1
+                for _, future, _ in live:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            for (_, future, _), result in zip(live, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self.total_batch_time += time.perf_counter() - started
+            self._slots.release()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "fill_rate": (
+                self.items / (self.batches * self.max_batch_size) if self.batches else 0.0
+            ),
+            "size_flushes": self.size_flushes,
+            "wait_flushes": self.wait_flushes,
+            "errors": self.errors,
+            "avg_queue_wait_ms": (
+                self.total_queue_wait / self.items * 1000.0 if self.items else 0.0
+            ),
+            "avg_batch_time_ms": (
+                self.total_batch_time / self.batches * 1000.0 if self.batches else 0.0
+            ),
+            "queue_depth": self.queue_depth,
+            "batch_size_histogram": dict(sorted(self.batch_sizes.items()))
+        }
@@ -0,0 +1,49 @@
+import json
+from typing import AsyncIterator, Union
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[Union[bytes, ValueError]]:
+    """Split a byte stream into lines without buffering more than one line.
+
+    Lines longer than ``max_line_bytes`` are skipped and yielded as a
+    ValueError so the caller can report them in place.
+    """
+    buffer = bytearray()
+    oversized = False
+    async for chunk in chunks:
+        buffer += chunk
+        # Lines are sliced from an offset and the consumed prefix dropped
+        # once per chunk, so each byte is copied a bounded number of times
+        start = 0
+        while True:
+            newline = buffer.find(b"\n", start)
+            if newline < 0:
+                break
+            line = bytes(buffer[start:newline])
+            start = newline + 1
+            if oversized:
+                oversized = False
+                yield ValueError(f"Line exceeds {max_line_bytes} bytes")
+            elif line.strip():
+                yield line
+        del buffer[:start]
+        if len(buffer) > max_line_bytes:
+            # Drop the rest of an oversized line as it streams in
+            buffer.clear()
+            oversized = True
+    if oversized:
+        yield ValueError(f"Line exceeds {max_line_bytes} bytes")
+    elif buffer.strip():
+        yield bytes(buffer)
+
+
+async def iter_upload_chunks(file, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def dumps_line(record: dict) -> bytes:
+    return (json.dumps(record, default=str) + "\n").encode("utf-8")
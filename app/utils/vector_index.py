@@ -0,0 +1,455 @@
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Rows scored per matrix product when assigning vectors to partitions
+ASSIGN_CHUNK_ROWS = 16384
+# Ids appended since the sorted copy was last rebuilt; past this many they
+# are merged in, so lookups never scan more than this unsorted tail
+SORTED_TAIL_ROWS = 4096
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    clusters = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_CHUNK_ROWS):
+        chunk = np.asarray(vectors[start:start + ASSIGN_CHUNK_ROWS])
+        clusters[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return clusters
+
+
+def _kmeans(sample: np.ndarray, nlist: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means: unit-length centroids maximising cosine similarity."""
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        clusters = _nearest(sample, centroids)
+        sums = np.stack(
+            [np.bincount(clusters, weights=sample[:, d], minlength=nlist) for d in range(sample.shape[1])],
+            axis=1
+        ).astype(np.float32)
+        norms = np.linalg.norm(sums, axis=1)
+        empty = norms == 0
+        # Reseed empty partitions from random sample points
+        sums[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+        norms[empty] = 1.0
+        centroids = sums / norms[:, None]
+    return centroids
+
+
+class VectorIndex:
+    """Append-only matrix of L2-normalised vectors with top-k cosine search.
+
+    Rows live in a float32 matrix whose capacity doubles as it fills, so
+    appends are amortised O(1). With ``path`` set, the matrix is a memory
+    map over ``<path>.f32`` and the ids are appended to ``<path>.ids``; the
+    ids file is written last, so its length is the number of complete rows.
+
+    Several processes may open the same ``path`` (app.serve's workers do):
+    appends take an exclusive lock on ``<path>.lock`` and first catch up on
+    rows the others wrote, and every lookup picks up newly appended rows
+    (one stat of the ids file when there are none) under a shared lock. The
+    matrix is mapped shared, so its pages are held once in the page cache
+    however many processes read it.
+
+    Below ``train_threshold`` rows every search is an exact scan. Past it,
+    and with ``nlist`` > 0, the rows are partitioned by k-means in a
+    background thread; searches then score only the ``nprobe`` partitions
+    whose centroids are closest to the query, trading a little recall for
+    reading a small fraction of the matrix. With shared files one process
+    trains and the others load its partitions.
+    """
+
+    def __init__(
+        self,
+        dimension: int,
+        path: Optional[str] = None,
+        model_name: str = "",
+        initial_capacity: int = 1024,
+        nlist: int = 0,
+        nprobe: int = 8,
+        train_threshold: int = 50000
+    ):
+        self.dimension = dimension
+        self.path = path
+        self.model_name = model_name
+        self.nlist = nlist
+        self.nprobe = max(1, min(nprobe, nlist)) if nlist else 0
+        self.train_threshold = max(train_threshold, nlist)
+        self._lock = threading.Lock()
+        self._count = 0
+        self._ids = np.zeros(initial_capacity, dtype=np.int64)
+        self._vectors = None
+        # Sorted copy of the first _sorted_count ids, and the row of each,
+        # for binary search
+        self._sorted_ids = np.zeros(0, dtype=np.int64)
+        self._sorted_rows = np.zeros(0, dtype=np.int64)
+        self._sorted_count = 0
+
+        # Inverted lists: row numbers per partition, as appended chunks
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[List[np.ndarray]] = []
+        self._training = False
+        self._lock_file = None
+
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._lock_file = open(f"{path}.lock", "a")
+            with self._file_lock():
+                self._open(initial_capacity)
+        else:
+            self._vectors = np.zeros((initial_capacity, dimension), dtype=np.float32)
+        self._maybe_train()
+
+    # Persistence ---------------------------------------------------------
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool = True):
+        # Between processes; threads of this one are serialised by self._lock
+        if self._lock_file is None:
+            yield
+            return
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _remove(self, *suffixes: str):
+        for suffix in suffixes:
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def _open(self, initial_capacity: int):
+        meta_path = f"{self.path}.json"
+        meta = {"dimension": self.dimension, "model": self.model_name}
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                if json.load(f) != meta:
+                    # Vectors from another model or size cannot be compared
+                    print(f"Vector index {self.path} was built with different settings; resetting")
+                    self._remove(".f32", ".ids", ".centroids.npy", ".clusters")
+        with open(meta_path, "w") as f:
+            json.dump(meta, f)
+
+        ids = np.fromfile(f"{self.path}.ids", dtype=np.int64) if os.path.exists(f"{self.path}.ids") else None
+        self._count = len(ids) if ids is not None else 0
+        capacity = max(initial_capacity, self._count)
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        if self._count:
+            self._ids[:self._count] = ids
+        self._map(capacity)
+        self._load_partitions()
+
+    def _load_partitions(self, persist: bool = True):
+        centroids_path = f"{self.path}.centroids.npy"
+        if not self.nlist or not os.path.exists(centroids_path):
+            if persist:
+                self._remove(".centroids.npy", ".clusters")
+            return
+        centroids = np.load(centroids_path)
+        if centroids.shape != (self.nlist, self.dimension):
+            if persist:
+                self._remove(".centroids.npy", ".clusters")
+            return
+
+        self._centroids = centroids
+        self._lists = [[] for _ in range(self.nlist)]
+        self._load_clusters(0, persist)
+
+    def _load_clusters(self, start: int, persist: bool):
+        clusters = np.fromfile(
+            f"{self.path}.clusters", dtype=np.int32, offset=start * 4, count=self._count - start
+        ) if os.path.exists(f"{self.path}.clusters") else np.zeros(0, dtype=np.int32)
+        self._add_to_lists(start, clusters)
+        # Rows whose partition was not yet written when a process stopped;
+        # only a holder of the exclusive lock writes them
+        if start + len(clusters) < self._count:
+            self._assign(start + len(clusters), self._count, persist)
+
+    def _map(self, capacity: int):
+        vectors_path = f"{self.path}.f32"
+        needed = capacity * self.dimension * 4
+        with open(vectors_path, "ab") as f:
+            if f.tell() < needed:
+                f.truncate(needed)
+        self._vectors = np.memmap(vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension))
+
+    def _grow(self, needed: int, extend: bool = True):
+        """Make room for ``needed`` rows. Without ``extend`` (catching up under
+        a shared lock) the vectors file is mapped at the size a writer left."""
+        capacity = len(self._ids)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        if not extend:
+            capacity = max(needed, os.path.getsize(f"{self.path}.f32") // (self.dimension * 4))
+        ids = np.zeros(capacity, dtype=np.int64)
+        ids[:self._count] = self._ids[:self._count]
+        self._ids = ids
+        if self.path:
+            self._vectors.flush()
+            self._map(capacity)
+        else:
+            vectors = np.zeros((capacity, self.dimension), dtype=np.float32)
+            vectors[:self._count] = self._vectors[:self._count]
+            self._vectors = vectors
+
+    # Partitioning --------------------------------------------------------
+
+    def _maybe_train(self):
+        if self.nlist and self._centroids is None and not self._training \
+                and self._count >= self.train_threshold:
+            train_lock = None
+            if self.path:
+                # Only one process trains; the others load its partitions
+                train_lock = open(f"{self.path}.train.lock", "a")
+                try:
+                    fcntl.flock(train_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    train_lock.close()
+                    return
+            self._training = True
+            threading.Thread(
+                target=self._train, args=(train_lock,), name="vector-index-train", daemon=True
+            ).start()
+
+    def _train(self, train_lock=None):
+        try:
+            count = self._count
+            rng = np.random.default_rng(0)
+            sample_rows = np.sort(rng.choice(count, min(count, self.nlist * 64), replace=False))
+            centroids = _kmeans(np.asarray(self._vectors[sample_rows]), self.nlist)
+            with self._lock, self._file_lock():
+                self._read_appended()
+                if self._centroids is not None:
+                    # Another process finished first; its partitions were just loaded
+                    return
+                self._centroids = centroids
+                self._lists = [[] for _ in range(self.nlist)]
+                if self.path:
+                    np.save(f"{self.path}.centroids.npy", centroids)
+                    self._remove(".clusters")
+                # Includes rows appended while k-means was running
+                self._assign(0, self._count)
+            print(f"Vector index partitioned into {self.nlist} lists over {self._count} vectors")
+        except Exception as e:
+            print(f"Vector index training error: {str(e)}")
+        finally:
+            self._training = False
+            if train_lock is not None:
+                train_lock.close()
+
+    def _assign(self, start: int, end: int, persist: bool = True):
+        clusters = _nearest(self._vectors[start:end], self._centroids)
+        if self.path and persist:
+            with open(f"{self.path}.clusters", "ab") as f:
+                f.write(clusters.tobytes())
+        self._add_to_lists(start, clusters)
+
+    def _add_to_lists(self, start: int, clusters: np.ndarray):
+        rows = np.arange(start, start + len(clusters), dtype=np.int64)
+        order = np.argsort(clusters, kind="stable")
+        bounds = np.searchsorted(clusters[order], np.arange(self.nlist + 1))
+        for cluster in np.flatnonzero(np.diff(bounds)):
+            chunks = self._lists[cluster]
+            chunks.append(rows[order[bounds[cluster]:bounds[cluster + 1]]])
+            if len(chunks) > 32:
+                # Replaced rather than mutated so concurrent searches see a whole list
+                self._lists[cluster] = [np.concatenate(chunks)]
+
+    # Sharing between processes ------------------------------------------
+
+    def _file_rows(self) -> int:
+        try:
+            return os.path.getsize(f"{self.path}.ids") // 8
+        except OSError:
+            return 0
+
+    def _partitions_appeared(self) -> bool:
+        return bool(self.nlist) and self._centroids is None and os.path.exists(f"{self.path}.centroids.npy")
+
+    def _read_appended(self):
+        """Load rows, and partitions, other processes wrote since we last
+        looked; called with self._lock and a file lock held."""
+        if not self.path:
+            return
+        total = self._file_rows()
+        if total > self._count:
+            start = self._count
+            self._grow(total, extend=False)
+            self._ids[start:total] = np.fromfile(
+                f"{self.path}.ids", dtype=np.int64, offset=start * 8, count=total - start
+            )
+            self._count = total
+            if self._centroids is not None:
+                self._load_clusters(start, persist=False)
+        if self._partitions_appeared():
+            self._load_partitions(persist=False)
+
+    def _catch_up(self):
+        # One stat when nothing changed; called with self._lock held
+        if self.path and (self._file_rows() > self._count or self._partitions_appeared()):
+            with self._file_lock(exclusive=False):
+                self._read_appended()
+
+    def refresh(self):
+        """Pick up rows other processes appended to the shared files."""
+        with self._lock:
+            self._catch_up()
+
+    # Updates and queries -------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, ids: List[int], vectors: np.ndarray):
+        """Append vectors; ids that are already indexed are skipped."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dimension)
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) != len(vectors):
+            raise ValueError(f"Got {len(ids)} ids for {len(vectors)} vectors")
+        with self._lock, self._file_lock():
+            # Append after whatever other processes wrote meanwhile
+            self._read_appended()
+            # First occurrence of each id not indexed yet
+            _, first = np.unique(ids, return_index=True)
+            keep = np.sort(first)
+            keep = keep[~self._known(ids[keep])]
+            ids, vectors = ids[keep], vectors[keep]
+            if not len(ids):
+                return
+            start = self._count
+            end = start + len(ids)
+            self._grow(end)
+            self._vectors[start:end] = vectors
+            self._ids[start:end] = ids
+            if self.path:
+                self._vectors.flush()
+                with open(f"{self.path}.ids", "ab") as f:
+                    f.write(ids.tobytes())
+            self._count = end
+            if self._centroids is not None:
+                self._assign(start, end)
+        self._maybe_train()
+
+    def ids(self) -> np.ndarray:
+        return self._ids[:self._count].copy()
+
+    def _sort_tail(self):
+        # Called with the lock held. Merged in rather than the whole array
+        # re-sorted; equal ids keep their append order, newest last
+        if self._count - self._sorted_count > SORTED_TAIL_ROWS:
+            rows = np.arange(self._sorted_count, self._count)
+            order = np.argsort(self._ids[rows], kind="stable")
+            new, rows = self._ids[rows][order], rows[order]
+            positions = np.searchsorted(self._sorted_ids, new, side="right")
+            self._sorted_ids = np.insert(self._sorted_ids, positions, new)
+            self._sorted_rows = np.insert(self._sorted_rows, positions, rows)
+            self._sorted_count = self._count
+
+    def _known(self, ids: np.ndarray) -> np.ndarray:
+        """Which of ``ids`` are indexed; called with the lock held.
+
+        Binary search over the sorted copy, plus a scan of at most
+        SORTED_TAIL_ROWS ids appended since it was built.
+        """
+        self._sort_tail()
+        known = self._sorted_ids
+        if len(known):
+            positions = np.minimum(np.searchsorted(known, ids), len(known) - 1)
+            found = known[positions] == ids
+        else:
+            found = np.zeros(len(ids), dtype=bool)
+        if self._sorted_count < self._count:
+            found |= np.isin(ids, self._ids[self._sorted_count:self._count])
+        return found
+
+    def missing(self, ids: List[int]) -> List[int]:
+        """The given ids that are not indexed yet."""
+        ids = np.asarray(ids, dtype=np.int64)
+        with self._lock:
+            self._catch_up()
+            found = self._known(ids)
+        return ids[~found].tolist()
+
+    def _row(self, item_id: int) -> Optional[int]:
+        """Row holding ``item_id``, found like ``_known``; called with the lock held."""
+        self._sort_tail()
+        # The unsorted tail holds the newest rows
+        tail = np.flatnonzero(self._ids[self._sorted_count:self._count] == item_id)
+        if len(tail):
+            return self._sorted_count + int(tail[-1])
+        position = int(np.searchsorted(self._sorted_ids, item_id, side="right")) - 1
+        if position >= 0 and self._sorted_ids[position] == item_id:
+            return int(self._sorted_rows[position])
+        return None
+
+    def get(self, item_id: int) -> Optional[np.ndarray]:
+        with self._lock:
+            self._catch_up()
+            row = self._row(item_id)
+            return np.array(self._vectors[row]) if row is not None else None
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 5,
+        min_score: float = -1.0,
+        exclude_id: Optional[int] = None,
+        exact: bool = False
+    ) -> List[Tuple[int, float]]:
+        """Top-k (id, cosine similarity) pairs, best first."""
+        self.refresh()
+        # Snapshot so a concurrent append or growth cannot shift rows mid-search
+        count, ids, vectors = self._count, self._ids, self._vectors
+        centroids, lists = self._centroids, self._lists
+        if count == 0 or k <= 0:
+            return []
+
+        query = np.asarray(query, dtype=np.float32).reshape(self.dimension)
+        if centroids is None or exact:
+            rows = None
+            scores = vectors[:count] @ query
+        else:
+            probe = np.argpartition(-(centroids @ query), self.nprobe - 1)[:self.nprobe]
+            chunks = [chunk for cluster in probe for chunk in lists[cluster]]
+            rows = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int64)
+            rows = rows[rows < count]
+            scores = vectors[rows] @ query
+        if exclude_id is not None:
+            scores[ids[rows if rows is not None else slice(0, count)] == exclude_id] = -np.inf
+
+        # argpartition finds the top k in linear time; only those are sorted
+        top = min(k, len(scores))
+        if top == 0:
+            return []
+        candidates = np.argpartition(-scores, top - 1)[:top]
+        candidates = candidates[np.argsort(-scores[candidates])]
+        return [
+            (int(ids[row if rows is None else rows[row]]), float(scores[row]))
+            for row in candidates
+            if scores[row] >= min_score
+        ]
+
+    def stats(self) -> dict:
+        return {
+            "vectors": self._count,
+            "dimension": self.dimension,
+            "capacity": len(self._ids),
+            "memory_mapped": bool(self.path),
+            "shared_path": self.path,
+            "matrix_bytes": len(self._ids) * self.dimension * 4,
+            "model": self.model_name,
+            "partitioned": self._centroids is not None,
+            "training": self._training,
+            "nlist": self.nlist,
+            "nprobe": self.nprobe
+        }
@@ -0,0 +1,162 @@
+"""Check an inference backend against the fp32 torch baseline.
+
+Usage:
+    python -m benchmarks.backend_parity --backend torch-int8|onnx|onnx-int8
+        [--model classifier|sentiment|all] [--data incidents.jsonl] [--repeat 3]
+
+Reports label agreement, score drift, mean latency and memory for each
+backend. Scores come from the app's own IncidentClassifier (every category's
+probability, through its NLI scoring and windowing) and SentimentAnalyzer
+(the combined negative probability), built with the configured settings
+apart from the backend. Every backend is loaded and run in a fresh spawned
+process, so its peak RSS is not inflated or masked by memory the allocator
+kept from the other one. ONNX backends need a prior
+`python -m app.models.export` run.
+"""
+import argparse
+import json
+import multiprocessing
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.config import settings
+from app.models.backends import BACKENDS
+from benchmarks.samples import LABELLED_INCIDENTS
+from benchmarks.shortlist_comparison import load_incidents
+
+
+def rss_mb(field: str = "VmRSS") -> float:
+    """Current (VmRSS) or peak (VmHWM) resident memory of this process."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def load_classifier(backend):
+    # Without the shortlist or cascade, so every category is scored by NLI
+    from app.models.classifier import IncidentClassifier
+    return IncidentClassifier(
+        model_name=settings.classifier_model,
+        backend=backend,
+        onnx_dir=settings.onnx_model_dir,
+        batch_size=settings.batch_max_size,
+        window_tokens=settings.chunk_window_tokens,
+        overlap_tokens=settings.chunk_overlap_tokens,
+        max_tokens=settings.analysis_max_tokens,
+        aggregation=settings.classifier_chunk_aggregation
+    )
+
+
+def load_sentiment(backend):
+    from app.models.sentiment_analyzer import SentimentAnalyzer
+    return SentimentAnalyzer(
+        model_name=settings.sentiment_model,
+        backend=backend,
+        onnx_dir=settings.onnx_model_dir,
+        batch_size=settings.batch_max_size,
+        window_tokens=settings.chunk_window_tokens,
+        overlap_tokens=settings.chunk_overlap_tokens,
+        max_tokens=settings.analysis_max_tokens,
+        aggregation=settings.sentiment_chunk_aggregation
+    )
+
+
+def score_classifier(classifier, incidents):
+    # Full label -> score mapping per incident so drift covers every label
+    probabilities = classifier.category_probabilities(incidents)
+    return [dict(zip(classifier.categories, row.tolist())) for row in probabilities]
+
+
+def score_sentiment(analyzer, incidents):
+    negativity = analyzer.negativity_many([f"{title} {description}" for title, description in incidents])
+    return [{"NEGATIVE": negative, "POSITIVE": 1.0 - negative} for negative in negativity]
+
+
+def timed(score_fn, model, incidents, repeat):
+    latencies = []
+    outputs = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        outputs = score_fn(model, incidents)
+        latencies.append((time.perf_counter() - started) * 1000.0 / len(incidents))
+    return outputs, statistics.mean(latencies)
+
+
+MODELS = {
+    "classifier": (load_classifier, score_classifier),
+    "sentiment": (load_sentiment, score_sentiment)
+}
+
+
+def run_backend(kind, backend, incidents, repeat):
+    """Load and score one backend; runs in its own fresh process."""
+    load, score = MODELS[kind]
+    before = rss_mb()
+    started = time.perf_counter()
+    model = load(backend)
+    load_s = time.perf_counter() - started
+    outputs, mean_ms = timed(score, model, incidents, repeat)
+    return outputs, {
+        "mean_ms_per_text": mean_ms,
+        "load_s": load_s,
+        "peak_rss_mb": rss_mb("VmHWM"),
+        "rss_added_mb": rss_mb() - before
+    }
+
+
+def run_isolated(*args):
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(run_backend, *args).result()
+
+
+def compare(kind, model_name, backend, incidents, repeat):
+    expected, baseline = run_isolated(kind, "torch", incidents, repeat)
+    actual, candidate = run_isolated(kind, backend, incidents, repeat)
+    baseline_ms, candidate_ms = baseline["mean_ms_per_text"], candidate["mean_ms_per_text"]
+
+    agreement = sum(
+        1 for e, a in zip(expected, actual) if max(e, key=e.get) == max(a, key=a.get)
+    ) / len(incidents)
+    drifts = [abs(e[label] - a[label]) for e, a in zip(expected, actual) for label in e]
+    return {
+        "model": model_name,
+        "backend": backend,
+        "label_agreement": agreement,
+        "max_score_drift": max(drifts),
+        "mean_score_drift": statistics.mean(drifts),
+        "baseline": baseline,
+        "candidate": candidate,
+        "peak_rss_saved_mb": baseline["peak_rss_mb"] - candidate["peak_rss_mb"],
+        "speedup": baseline_ms / candidate_ms if candidate_ms else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backend", choices=[b for b in BACKENDS if b != "torch"], required=True)
+    parser.add_argument("--model", choices=["classifier", "sentiment", "all"], default="all")
+    parser.add_argument("--data")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    incidents = load_incidents(args.data) if args.data else LABELLED_INCIDENTS
+    incidents = [(title, description) for title, description, _ in incidents]
+
+    reports = []
+    if args.model in ("classifier", "all"):
+        reports.append(compare("classifier", settings.classifier_model, args.backend, incidents, args.repeat))
+    if args.model in ("sentiment", "all"):
+        reports.append(compare("sentiment", settings.sentiment_model, args.backend, incidents, args.repeat))
+    print(json.dumps(reports, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Diff two benchmark suite results and fail on regressions.
+
+Usage:
+    python -m benchmarks.compare baseline.json candidate.json
+        [--max-regression 0.15] [--threshold 'endpoints.*.p95_ms=0.25' ...]
+        [--min-ms 1.0]
+
+Latency metrics (``*_ms``) regress when they grow and ``throughput_rps``
+when it shrinks, by more than the relative threshold for that metric.
+``--threshold`` overrides the default for metric paths matching a glob;
+the last matching override wins. Any increase in ``errors`` is a
+regression. Latencies below ``--min-ms`` in both runs are treated as
+noise. Exits with status 1 when anything regressed.
+"""
+import argparse
+import fnmatch
+import json
+import sys
+
+COMPARED = ("mean_ms", "p50_ms", "p95_ms", "p99_ms", "throughput_rps", "errors")
+
+
+def flatten(node, prefix=""):
+    metrics = {}
+    for key, value in node.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            metrics.update(flatten(value, path))
+        elif key in COMPARED and isinstance(value, (int, float)):
+            metrics[path] = float(value)
+    return metrics
+
+
+def parse_thresholds(values):
+    overrides = []
+    for value in values:
+        pattern, _, limit = value.rpartition("=")
+        if not pattern:
+            raise argparse.ArgumentTypeError(f"Expected PATTERN=VALUE, got {value!r}")
+        overrides.append((pattern, float(limit)))
+    return overrides
+
+
+def threshold_for(path, default, overrides):
+    limit = default
+    for pattern, value in overrides:
+        if fnmatch.fnmatch(path, pattern):
+            limit = value
+    return limit
+
+
+def compare(baseline, candidate, max_regression, overrides, min_ms):
+    before = flatten({key: baseline.get(key, {}) for key in ("stages", "endpoints")})
+    after = flatten({key: candidate.get(key, {}) for key in ("stages", "endpoints")})
+
+    rows = []
+    for path in sorted(before.keys() & after.keys()):
+        old, new = before[path], after[path]
+        metric = path.rsplit(".", 1)[-1]
+        if metric == "errors":
+            change = new - old
+            regressed = new > old
+        else:
+            change = (new - old) / old if old else 0.0
+            # Positive change is always "worse" below
+            worse = -change if metric == "throughput_rps" else change
+            noise = metric.endswith("_ms") and old < min_ms and new < min_ms
+            regressed = not noise and worse > threshold_for(path, max_regression, overrides)
+        rows.append({"metric": path, "baseline": old, "candidate": new, "change": change, "regressed": regressed})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--max-regression", type=float, default=0.15)
+    parser.add_argument("--threshold", action="append", default=[])
+    parser.add_argument("--min-ms", type=float, default=1.0)
+    parser.add_argument("--json", action="store_true", help="print the comparison as JSON")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    rows = compare(baseline, candidate, args.max_regression, parse_thresholds(args.threshold), args.min_ms)
+    regressions = [row for row in rows if row["regressed"]]
+
+    if args.json:
+        print(json.dumps({"regressions": len(regressions), "metrics": rows}, indent=2))
+    else:
+        width = max((len(row["metric"]) for row in rows), default=10)
+        for row in rows:
+            change = (
+                f"{row['change']:+.0f}" if row["metric"].endswith(".errors") else f"{row['change'] * 100:+.1f}%"
+            )
+            flag = "  REGRESSED" if row["regressed"] else ""
+            print(f"{row['metric']:<{width}}  {row['baseline']:>12.3f}  {row['candidate']:>12.3f}  {change:>8}{flag}")
+        print(f"\n{len(regressions)} regression(s) across {len(rows)} metrics")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
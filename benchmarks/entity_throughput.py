@@ -0,0 +1,78 @@
+"""Measure entity extraction throughput for the full and lean spaCy pipelines.
+
+Usage:
+    python -m benchmarks.entity_throughput [--docs 2000] [--batch-size 64]
+        [--n-process 1] [--data incidents.jsonl] [--repeat 3]
+
+Reports docs/second for the original setup (full pipeline, one ``nlp()``
+call per text), the lean batched extractor returning every entity type, and
+the lean extractor restricted to the types analysis keeps.
+"""
+import argparse
+import json
+import statistics
+import time
+
+import spacy
+
+from app.config import settings
+from app.models.entity_extractor import ANALYSIS_ENTITY_TYPES, EntityExtractor
+from benchmarks.shortlist_comparison import load_incidents
+
+
+def full_pipeline(lean, model_name):
+    # The extractor as it was before: every component, one call per text
+    nlp = spacy.load(model_name)
+    nlp.add_pipe("entity_ruler", before="ner").add_patterns(lean.nlp.get_pipe("entity_ruler").patterns)
+    return lambda texts: [lean._doc_entities(nlp(text)) for text in texts]
+
+
+def throughput(extract, texts, repeat):
+    rates = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        extract(texts)
+        rates.append(len(texts) / (time.perf_counter() - started))
+    return statistics.mean(rates)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=settings.entity_batch_size)
+    parser.add_argument("--n-process", type=int, default=settings.entity_n_process)
+    parser.add_argument("--data")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    incidents = load_incidents(args.data)
+    texts = [f"{title} {description}" for title, description, _ in incidents]
+    texts = (texts * (args.docs // len(texts) + 1))[:args.docs]
+
+    lean = EntityExtractor(settings.spacy_model, batch_size=args.batch_size, n_process=args.n_process)
+    runs = {
+        "full_per_text": full_pipeline(lean, settings.spacy_model),
+        "lean_batched_all_types": lambda batch: lean.extract_entities_many(batch),
+        "lean_batched_analysis_types": lambda batch: lean.extract_entities_many(
+            batch, entity_types=ANALYSIS_ENTITY_TYPES
+        ),
+    }
+
+    report = {
+        "docs": len(texts),
+        "batch_size": args.batch_size,
+        "n_process": args.n_process,
+        "lean_components": lean.nlp.pipe_names,
+        "docs_per_second": {}
+    }
+    for name, extract in runs.items():
+        report["docs_per_second"][name] = throughput(extract, texts, args.repeat)
+    baseline = report["docs_per_second"]["full_per_text"]
+    report["speedup"] = {
+        name: rate / baseline for name, rate in report["docs_per_second"].items()
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
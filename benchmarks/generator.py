@@ -0,0 +1,159 @@
+"""Synthetic incidents for benchmarks.
+
+Every classifier category is covered in turn. Descriptions are built from
+the labelled samples plus filler sentences so their length varies from a
+sentence to a page, and a share of incidents carries generated attachments:
+a PNG, a scanned (image-only) PDF or a PDF with a text layer.
+"""
+import io
+import random
+from typing import List, NamedTuple, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from app.models.classifier import CATEGORIES, CATEGORY_DESCRIPTIONS
+from benchmarks.samples import LABELLED_INCIDENTS
+
+FILLER_SENTENCES = [
+    "The counterparty was informed by email and acknowledged receipt.",
+    "Operations flagged the issue during the morning review.",
+    "The warehouse manager confirmed the figures on site.",
+    "Shipment {tracking} of {commodity} cargo is affected.",
+    "The buyer asked for an update before the end of the week.",
+    "Status of the customs forms is pending with the clearing agent.",
+    "A similar problem was reported on a previous {commodity} trade.",
+    "The trade desk estimates the exposure at {amount} dollars.",
+    "Field agents are collecting photos and weight tickets.",
+    "The issue was escalated to the regional coordinator.",
+]
+COMMODITIES = ["sesame", "cocoa", "maize", "soybean", "cashew", "ginger", "sorghum"]
+
+# Sentence counts for short, medium and long descriptions
+LENGTHS = {"short": (0, 1), "medium": (3, 6), "long": (20, 40)}
+
+ATTACHMENT_KINDS = ["png", "scanned_pdf", "text_pdf"]
+
+
+class Attachment(NamedTuple):
+    filename: str
+    content: bytes
+    content_type: str
+
+
+class SyntheticIncident(NamedTuple):
+    title: str
+    description: str
+    category: str
+    length: str
+    attachments: List[Attachment]
+
+
+def _fill(template: str, rng: random.Random) -> str:
+    return template.format(
+        tracking=f"{rng.randint(100, 999)}{''.join(rng.choice('ABCDEFGHJKLMNPQRSTUVWXYZ') for _ in range(3))}",
+        commodity=rng.choice(COMMODITIES),
+        amount=f"{rng.randint(5, 900) * 1000:,}"
+    )
+
+
+def _text_lines(text: str, width: int = 80) -> List[str]:
+    lines, line = [], ""
+    for word in text.split():
+        if line and len(line) + len(word) + 1 > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}".strip()
+    if line:
+        lines.append(line)
+    return lines
+
+
+def render_image(text: str) -> Image.Image:
+    lines = _text_lines(text)[:60]
+    image = Image.new("L", (1240, 60 + 24 * len(lines)), color=255)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default()
+    for number, line in enumerate(lines):
+        draw.text((40, 30 + 24 * number), line, fill=0, font=font)
+    return image
+
+
+def png_bytes(text: str) -> bytes:
+    buffer = io.BytesIO()
+    render_image(text).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def scanned_pdf_bytes(text: str) -> bytes:
+    # An image-only page, as produced by a scanner: no text layer to extract
+    buffer = io.BytesIO()
+    render_image(text).convert("RGB").save(buffer, format="PDF", resolution=150)
+    return buffer.getvalue()
+
+
+def text_pdf_bytes(text: str) -> bytes:
+    """A single-page PDF with a real text layer in Helvetica."""
+    def escape(line: str) -> str:
+        return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    lines = _text_lines(text)[:50]
+    content = "BT /F1 11 Tf 50 760 Td 14 TL " + " ".join(f"({escape(line)}) '" for line in lines) + " ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        "/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        f"<< /Length {len(content)} >>\nstream\n{content}\nendstream",
+    ]
+    output = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1", "replace")
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    output += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return output
+
+
+def make_attachment(kind: str, text: str, name: str) -> Attachment:
+    if kind == "png":
+        return Attachment(f"{name}.png", png_bytes(text), "image/png")
+    if kind == "scanned_pdf":
+        return Attachment(f"{name}_scan.pdf", scanned_pdf_bytes(text), "application/pdf")
+    return Attachment(f"{name}.pdf", text_pdf_bytes(text), "application/pdf")
+
+
+def generate(count: int, seed: int = 0, attachment_rate: float = 0.3) -> List[SyntheticIncident]:
+    rng = random.Random(seed)
+    samples = {}
+    for title, description, category in LABELLED_INCIDENTS:
+        samples.setdefault(category, []).append((title, description))
+
+    incidents = []
+    for number in range(count):
+        category = CATEGORIES[number % len(CATEGORIES)]
+        title, description = rng.choice(samples.get(category) or [(
+            category, f"Reported problem: {CATEGORY_DESCRIPTIONS.get(category, category)}."
+        )])
+        length = rng.choice(list(LENGTHS))
+        low, high = LENGTHS[length]
+        extra = [_fill(rng.choice(FILLER_SENTENCES), rng) for _ in range(rng.randint(low, high))]
+        description = " ".join([description] + extra)
+
+        attachments = []
+        if rng.random() < attachment_rate:
+            kind = ATTACHMENT_KINDS[len(incidents) % len(ATTACHMENT_KINDS)]
+            attachments.append(make_attachment(kind, f"{title}. {description}", f"incident_{number}"))
+        incidents.append(SyntheticIncident(title, description, category, length, attachments))
+    return incidents
+
+
+def attachment_samples(seed: int = 0) -> List[Tuple[str, Attachment]]:
+    """One attachment of each kind, for timing document extraction on its own."""
+    incident = generate(1, seed=seed, attachment_rate=0.0)[0]
+    text = f"{incident.title}. {incident.description}"
+    return [(kind, make_attachment(kind, text, f"sample_{kind}")) for kind in ATTACHMENT_KINDS]
@@ -0,0 +1,128 @@
+"""Latency per priority lane when /incidents/analyze is driven past saturation.
+
+Usage:
+    python -m benchmarks.overload [--profile stub|default] [--requests 2000]
+        [--rate 400] [--urgent-rate 0.1] [--max-concurrent 0]
+        [--max-queue 64] [--output results.json]
+
+Runs the same mixed load twice against the in-process app, once with
+admission control off (every request queues in the micro-batchers) and
+once with it on. Requests arrive at a fixed ``--rate`` whatever the
+responses, as real traffic does, so a rate above capacity overloads the
+service. A share of requests is sent with ``priority=urgent`` and the rest
+``priority=normal``; per lane it reports latency percentiles of answered
+requests, how many were rejected with 503 and how quickly.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.suite import prepare_environment, summarize
+
+
+async def run_phase(incidents, args, enabled):
+    import httpx
+    from app import main
+    from app.config import settings
+
+    settings.admission_enabled = enabled
+    settings.admission_max_concurrent = args.max_concurrent
+    settings.admission_max_queue = args.max_queue
+    await main.app.router.startup()
+    try:
+        if not await main.inference_pool.wait_ready():
+            raise RuntimeError(f"Inference pool failed: {main.inference_pool.error}")
+        rng = random.Random(args.seed)
+        lanes = ["urgent" if rng.random() < args.urgent_rate else "normal" for _ in range(args.requests)]
+        latencies = {"urgent": [], "normal": []}
+        rejected = {"urgent": [], "normal": []}
+        errors = 0
+
+        async def send(client, position):
+            nonlocal errors
+            incident, lane = incidents[position % len(incidents)], lanes[position]
+            started = time.perf_counter()
+            try:
+                response = await client.post(
+                    "/incidents/analyze",
+                    params={"priority": lane},
+                    json={"title": incident.title, "description": incident.description}
+                )
+            except Exception:
+                errors += 1
+                return
+            elapsed = (time.perf_counter() - started) * 1000.0
+            if response.status_code == 503:
+                rejected[lane].append(elapsed)
+            elif response.status_code >= 400:
+                errors += 1
+            else:
+                latencies[lane].append(elapsed)
+
+        transport = httpx.ASGITransport(app=main.app)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=300) as client:
+            tasks = []
+            for position in range(args.requests):
+                # Open loop: the schedule does not wait for earlier responses
+                await asyncio.sleep(max(0.0, started + position / args.rate - loop.time()))
+                tasks.append(asyncio.ensure_future(send(client, position)))
+            await asyncio.gather(*tasks)
+        elapsed = loop.time() - started
+        return {
+            "admission": main.admission.stats() if enabled else None,
+            "offered_rps": args.rate,
+            "throughput_rps": sum(len(values) for values in latencies.values()) / elapsed,
+            "errors": errors,
+            "lanes": {
+                lane: {
+                    "answered": summarize(latencies[lane]),
+                    "rejected": summarize(rejected[lane])
+                }
+                for lane in latencies
+            }
+        }
+    finally:
+        await main.app.router.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=["stub", "default"], default="stub")
+    parser.add_argument("--incidents", type=int, default=66)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=400.0, help="requests per second offered")
+    parser.add_argument("--urgent-rate", type=float, default=0.1)
+    parser.add_argument("--max-concurrent", type=int, default=0, help="0 sizes it from the inference pool")
+    parser.add_argument("--max-queue", type=int, default=64)
+    parser.add_argument("--output")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="incident-overload-") as workdir:
+        prepare_environment(args, workdir)
+        # Not used by /incidents/analyze, and its startup task outlives a phase
+        os.environ.setdefault("SIMILARITY_ENABLED", "false")
+        from benchmarks.generator import generate
+
+        # Attachments play no part in /incidents/analyze
+        incidents = generate(args.incidents, seed=args.seed, attachment_rate=0.0)
+        report = {
+            "without_admission": asyncio.run(run_phase(incidents, args, enabled=False)),
+            "with_admission": asyncio.run(run_phase(incidents, args, enabled=True))
+        }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
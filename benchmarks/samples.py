@@ -0,0 +1,25 @@
+# Small hand-labelled incident set, one or more per classifier category
+LABELLED_INCIDENTS = [
+    ("Missing bill of lading", "The Bill of Lading for the cocoa consignment was never uploaded and the buyer cannot clear the goods.", "Documentation Issue"),
+    ("KYC check failed", "The new seller failed KYC screening and regulators flagged the account for review.", "Compliance Violation"),
+    ("Contract terms disputed", "The signed contract lists a different delivery incoterm than the one agreed with the buyer.", "Contract Issue"),
+    ("Vessel held at port", "Shipment ABC1234 is delayed by five days because the vessel is waiting for a berth.", "Shipment Delay"),
+    ("Cargo arrived damaged", "Several bags of sesame seed cargo arrived torn and water damaged at the warehouse.", "Damaged Goods"),
+    ("Moisture content too high", "Lab results show the maize moisture content is above the contracted specification.", "Quality Control"),
+    ("Warehouse flooding", "Heavy rain flooded the storage facility and stock had to be moved to pallets.", "Storage Issue"),
+    ("Truck breakdown", "The carrier's truck broke down on the highway and the driver is waiting for a replacement vehicle.", "Transportation Issue"),
+    ("Buyer payment overdue", "The buyer has not paid the second installment which was due last week.", "Payment Issue"),
+    ("Letter of credit rejected", "The bank refused to issue the letter of credit needed to finance the trade.", "Financing Problem"),
+    ("Naira devaluation", "The exchange rate moved sharply against us and the contract value in dollars has dropped.", "Currency Risk"),
+    ("Platform login outage", "Users cannot log in to the TRACE platform and the dashboard returns a server error.", "Platform Technical Issue"),
+    ("Bank API failing", "The integration with the partner bank API returns timeouts for every payment request.", "Integration Error"),
+    ("Inventory mismatch", "Stock levels in the warehouse system do not match the figures shown on the platform.", "Data Synchronization"),
+    ("Aggregation shortfall", "Smallholder lots could not be aggregated into a full container because volumes were recorded twice.", "Aggregation Issue"),
+    ("Seller verification failed", "The seller's identity documents could not be verified so the trade cannot proceed.", "Verification Failure"),
+    ("Wrong quantity executed", "The trade was executed for 50 tonnes instead of the 500 tonnes on the order.", "Trade Execution Error"),
+    ("No response from logistics", "The logistics partner has not responded to emails or calls for three days.", "Communication Breakdown"),
+    ("Buyer and seller disagree", "The buyer and seller are in a dispute over who should bear the inspection costs.", "Stakeholder Dispute"),
+    ("Cashew supply running out", "Suppliers cannot deliver enough cashew nuts to meet the contracted volume this month.", "Supply Shortage"),
+    ("Sampling procedure skipped", "Pre-shipment sampling procedures were not followed for the latest sesame batch.", "Quality Assurance"),
+    ("Origin of lot unknown", "We cannot trace which farms supplied the soybean lot shipped last week.", "Traceability Issue"),
+]
@@ -0,0 +1,111 @@
+"""Compare full zero-shot scoring against the embedding-shortlist cascade.
+
+Usage:
+    python -m benchmarks.shortlist_comparison [--k 5] [--min-confidence 0.5]
+        [--data incidents.jsonl] [--repeat 3]
+
+``--data`` is an optional JSONL file of {"title", "description", "category"}
+records; the built-in labelled sample is used otherwise.
+"""
+import argparse
+import json
+import statistics
+import time
+
+from app.config import settings
+from app.models.classifier import IncidentClassifier
+from app.models.embedder import TextEmbedder
+from benchmarks.samples import LABELLED_INCIDENTS
+
+
+def load_incidents(path):
+    if not path:
+        return LABELLED_INCIDENTS
+    incidents = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                incidents.append((record["title"], record["description"], record.get("category")))
+    return incidents
+
+
+def run(classifier, incidents, repeat):
+    latencies = []
+    predictions = []
+    confidences = []
+    for _ in range(repeat):
+        predictions = []
+        confidences = []
+        for title, description, _ in incidents:
+            started = time.perf_counter()
+            category, confidence = classifier.classify(title, description)
+            latencies.append((time.perf_counter() - started) * 1000.0)
+            predictions.append(category)
+            confidences.append(confidence)
+    latencies.sort()
+    return predictions, {
+        # Shortlist scores are normalised over k labels, not all of them
+        "mean_confidence": statistics.mean(confidences),
+        "mean_ms": statistics.mean(latencies),
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    }
+
+
+def accuracy(predictions, incidents):
+    labelled = [(p, gold) for p, (_, _, gold) in zip(predictions, incidents) if gold]
+    if not labelled:
+        return None
+    return sum(1 for p, gold in labelled if p == gold) / len(labelled)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--k", type=int, default=settings.classifier_shortlist_k or 5)
+    parser.add_argument("--min-confidence", type=float,
+                        default=settings.classifier_shortlist_min_confidence)
+    parser.add_argument("--data")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    incidents = load_incidents(args.data)
+    classifier = IncidentClassifier(
+        model_name=settings.classifier_model,
+        backend=settings.classifier_backend,
+        onnx_dir=settings.onnx_model_dir,
+        embedder=TextEmbedder(settings.embedding_model),
+        shortlist_k=args.k,
+        shortlist_min_confidence=args.min_confidence
+    )
+
+    # Same model weights, shortlist switched off for the baseline run
+    classifier.shortlist_k = 0
+    full_predictions, full_latency = run(classifier, incidents, args.repeat)
+
+    classifier.shortlist_k = args.k
+    classifier.shortlist_stats = {"shortlisted": 0, "fallbacks": 0}
+    short_predictions, short_latency = run(classifier, incidents, args.repeat)
+
+    agreement = sum(
+        1 for a, b in zip(full_predictions, short_predictions) if a == b
+    ) / len(incidents)
+    stats = classifier.shortlist_stats
+    report = {
+        "incidents": len(incidents),
+        "full": {"accuracy": accuracy(full_predictions, incidents), **full_latency},
+        "shortlist": {
+            "k": args.k,
+            "min_confidence": args.min_confidence,
+            "accuracy": accuracy(short_predictions, incidents),
+            "fallback_rate": stats["fallbacks"] / stats["shortlisted"] if stats["shortlisted"] else 0.0,
+            **short_latency
+        },
+        "agreement_with_full": agreement,
+        "speedup_mean": full_latency["mean_ms"] / short_latency["mean_ms"]
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
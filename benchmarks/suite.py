@@ -0,0 +1,259 @@
+"""Per-stage and end-to-end latency benchmark for the incident API.
+
+Usage:
+    python -m benchmarks.suite [--profile stub|default] [--incidents 66]
+        [--requests 200] [--concurrency 1,8,32] [--scenarios analyze,create,metrics]
+        [--output results.json] [--seed 0]
+
+Stage timings call the models and helpers directly, one synthetic incident
+at a time: classification, sentiment, entities, embedding, recommendation
+and document extraction for each attachment kind. Endpoint runs drive the
+ASGI app in-process through httpx at each concurrency level.
+
+Everything runs against a throwaway data directory. ``--profile stub`` uses
+the tiny offline stand-in models (MODEL_PROFILE=stub). Compare two result
+files with ``python -m benchmarks.compare``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+
+def summarize(latencies_ms):
+    if not latencies_ms:
+        return {"count": 0}
+    ordered = sorted(latencies_ms)
+
+    def percentile(q):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.mean(ordered),
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": ordered[-1]
+    }
+
+
+def prepare_environment(args, workdir):
+    # Must run before anything imports app.config
+    os.environ["MODEL_PROFILE"] = args.profile
+    os.environ.setdefault("DATABASE_PATH", os.path.join(workdir, "incidents.db"))
+    os.environ.setdefault("UPLOAD_DIR", os.path.join(workdir, "uploads"))
+    os.environ.setdefault("OCR_CACHE_DIR", os.path.join(workdir, "ocr_cache"))
+    os.environ.setdefault("SIMILARITY_INDEX_PATH", os.path.join(workdir, "vectors"))
+    # Repeated synthetic texts would otherwise be answered from the cache
+    os.environ.setdefault("ANALYSIS_CACHE_BACKEND", "none")
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - started) * 1000.0
+
+
+def run_stages(incidents, workdir, seed):
+    from app.config import settings
+    from app.models.entity_extractor import ANALYSIS_ENTITY_TYPES
+    from app.models.recommender import IncidentRecommender
+    from app.utils import inference_pool as pool
+    from app.utils.document_processor import DocumentProcessor
+    from benchmarks.generator import attachment_samples
+
+    pool.load_models(settings.inference_torch_threads)
+    (warmup, _, snapshot) = pool.warmup(settings.warmup_batch_sizes)
+    if warmup["failed"]:
+        raise RuntimeError(f"Models failed to load: {', '.join(warmup['failed'])}")
+
+    recommender = IncidentRecommender()
+    stages = {name: [] for name in ("classification", "sentiment", "entities", "embedding", "recommendation")}
+    for incident in incidents:
+        text = f"{incident.title} {incident.description}"
+        (classification, _, _), elapsed = timed(pool.classify_batch, [(incident.title, incident.description)])
+        stages["classification"].append(elapsed)
+        stages["sentiment"].append(timed(pool.sentiment_batch, [text])[1])
+        stages["entities"].append(timed(pool.extract_entities_batch, [text], ANALYSIS_ENTITY_TYPES)[1])
+        if "embedder" in snapshot["models"]:
+            stages["embedding"].append(timed(pool.embed_batch, [text])[1])
+        stages["recommendation"].append(timed(recommender.get_recommendations, classification[0][0], text)[1])
+
+    results = {name: summarize(latencies) for name, latencies in stages.items()}
+
+    # Document extraction without the OCR cache, once per attachment kind
+    processor = DocumentProcessor(
+        upload_dir=os.path.join(workdir, "stage_uploads"),
+        ocr_dpi=settings.ocr_dpi,
+        ocr_lang=settings.ocr_lang,
+        ocr_max_pages=settings.ocr_max_pages,
+        ocr_workers=settings.ocr_workers,
+        pdf_text_min_chars=settings.pdf_text_min_chars,
+        ocr_cache=None
+    )
+    os.makedirs(processor.upload_dir, exist_ok=True)
+    try:
+        for kind, attachment in attachment_samples(seed):
+            path = os.path.join(processor.upload_dir, attachment.filename)
+            with open(path, "wb") as f:
+                f.write(attachment.content)
+            latencies = []
+            for _ in range(3):
+                text, elapsed = timed(processor.extract_text, path)
+                latencies.append(elapsed)
+            results[f"ocr_{kind}"] = {"chars": len(text), **summarize(latencies)}
+            if not text.strip():
+                # Extraction errors come back as empty text; usually a missing
+                # tesseract or poppler binary, which makes the timing meaningless
+                results[f"ocr_{kind}"]["error"] = "no text extracted"
+    finally:
+        processor.shutdown()
+    return results
+
+
+async def drive(client, send, incidents, concurrency, requests):
+    """Issue ``requests`` calls from ``concurrency`` concurrent senders."""
+    latencies, errors = [], 0
+    next_request = 0
+
+    async def sender():
+        nonlocal next_request, errors
+        while next_request < requests:
+            incident = incidents[next_request % len(incidents)]
+            next_request += 1
+            started = time.perf_counter()
+            try:
+                response = await send(client, incident)
+                if response.status_code >= 400:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000.0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[sender() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    return {
+        "concurrency": concurrency,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "errors": errors,
+        **summarize(latencies)
+    }
+
+
+async def send_analyze(client, incident):
+    return await client.post(
+        "/incidents/analyze", json={"title": incident.title, "description": incident.description}
+    )
+
+
+async def send_create(client, incident):
+    files = [
+        ("documents", (attachment.filename, attachment.content, attachment.content_type))
+        for attachment in incident.attachments
+    ]
+    return await client.post(
+        "/incidents/create",
+        params={"title": incident.title, "description": incident.description},
+        files=files or None
+    )
+
+
+async def send_metrics(client, incident):
+    return await client.get("/incidents/metrics")
+
+
+SCENARIOS = {"analyze": send_analyze, "create": send_create, "metrics": send_metrics}
+
+
+async def run_endpoints(incidents, scenarios, concurrency_levels, requests):
+    import httpx
+    from app import main
+
+    # httpx's ASGI transport does not send lifespan events
+    await main.app.router.startup()
+    try:
+        if not await main.inference_pool.wait_ready():
+            raise RuntimeError(f"Inference pool failed: {main.inference_pool.error}")
+        transport = httpx.ASGITransport(app=main.app)
+        results = {}
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=300) as client:
+            for scenario in scenarios:
+                results[scenario] = {}
+                for concurrency in concurrency_levels:
+                    results[scenario][str(concurrency)] = await drive(
+                        client, SCENARIOS[scenario], incidents, concurrency, requests
+                    )
+        return results
+    finally:
+        await main.app.router.shutdown()
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=["stub", "default"], default="stub")
+    parser.add_argument("--incidents", type=int, default=66)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--skip-stages", action="store_true")
+    parser.add_argument("--output")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    scenarios = [name for name in args.scenarios.split(",") if name]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    concurrency_levels = [int(level) for level in args.concurrency.split(",") if level]
+
+    with tempfile.TemporaryDirectory(prefix="incident-bench-") as workdir:
+        prepare_environment(args, workdir)
+        from app.config import settings
+        from benchmarks.generator import generate
+
+        incidents = generate(args.incidents, seed=args.seed)
+        report = {
+            "meta": {
+                "timestamp": datetime.utcnow().isoformat(),
+                "commit": git_commit(),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "model_profile": settings.model_profile,
+                "model_fingerprint": settings.model_fingerprint(),
+                "inference_workers": settings.inference_workers,
+                "incidents": len(incidents),
+                "requests": args.requests,
+                "seed": args.seed
+            },
+            "stages": {} if args.skip_stages else run_stages(incidents, workdir, args.seed),
+            "endpoints": asyncio.run(run_endpoints(incidents, scenarios, concurrency_levels, args.requests))
+        }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
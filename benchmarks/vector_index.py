@@ -0,0 +1,117 @@
+"""Benchmark the similar-incident vector index.
+
+Usage:
+    python -m benchmarks.vector_index [--size 1000000] [--dimension 384]
+        [--batch 10000] [--queries 200] [--k 10] [--path data/bench_vectors]
+        [--nlist 1024] [--nprobe 8] [--train-threshold 50000]
+
+Fills an index in batches with unit vectors scattered around random topic
+centres (incident embeddings cluster by subject, which partitioning relies
+on), then reports build time, query latency percentiles, recall@k against
+an exact scan and memory footprint. ``--path`` uses a memory-mapped index
+at that location (files are removed afterwards); ``--nlist 0`` keeps every
+search exact.
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import time
+
+import numpy as np
+
+from app.config import settings
+from app.utils.vector_index import VectorIndex
+from benchmarks.backend_parity import rss_mb
+
+
+def normalise(vectors):
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def clustered_unit_vectors(rng, centres, count, spread=0.6):
+    picks = centres[rng.integers(len(centres), size=count)]
+    noise = rng.standard_normal(picks.shape, dtype=np.float32) * spread / np.sqrt(centres.shape[1])
+    return normalise(picks + noise)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--batch", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--path")
+    parser.add_argument("--nlist", type=int, default=settings.similarity_nlist)
+    parser.add_argument("--nprobe", type=int, default=settings.similarity_nprobe)
+    parser.add_argument("--train-threshold", type=int, default=settings.similarity_train_threshold)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centres = normalise(rng.standard_normal((2000, args.dimension), dtype=np.float32))
+    rss_before = rss_mb()
+    index = VectorIndex(
+        args.dimension,
+        path=args.path,
+        model_name="benchmark",
+        nlist=args.nlist,
+        nprobe=args.nprobe,
+        train_threshold=args.train_threshold
+    )
+
+    # Vector generation is excluded from the build time
+    generate_s = 0.0
+    build_started = time.perf_counter()
+    for start in range(0, args.size, args.batch):
+        count = min(args.batch, args.size - start)
+        started = time.perf_counter()
+        vectors = clustered_unit_vectors(rng, centres, count)
+        generate_s += time.perf_counter() - started
+        index.add(list(range(start + 1, start + count + 1)), vectors)
+
+    # Partitioning runs in the background once the threshold is crossed
+    while index.stats()["training"]:
+        time.sleep(0.1)
+    build_s = time.perf_counter() - build_started - generate_s
+
+    queries = clustered_unit_vectors(rng, centres, args.queries)
+    latencies = []
+    hits = 0
+    for query in queries:
+        started = time.perf_counter()
+        found = index.search(query, k=args.k)
+        latencies.append((time.perf_counter() - started) * 1000.0)
+        expected = index.search(query, k=args.k, exact=True)
+        hits += len({i for i, _ in found} & {i for i, _ in expected})
+    latencies.sort()
+
+    report = {
+        "size": args.size,
+        "dimension": args.dimension,
+        "memory_mapped": bool(args.path),
+        "partitioned": index.stats()["partitioned"],
+        "nlist": args.nlist,
+        "nprobe": args.nprobe,
+        "build_s": build_s,
+        "adds_per_second": args.size / build_s if build_s else None,
+        "query_ms": {
+            "mean": statistics.mean(latencies),
+            "p50": latencies[len(latencies) // 2],
+            "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+            "max": latencies[-1]
+        },
+        "recall_at_k": hits / (len(queries) * args.k),
+        "matrix_mb": index.stats()["matrix_bytes"] / (1024 * 1024),
+        "rss_added_mb": rss_mb() - rss_before
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.path:
+        for path in glob.glob(f"{args.path}.*"):
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
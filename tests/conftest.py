@@ -0,0 +1,31 @@
+import os
+import tempfile
+import time
+
+import pytest
+
+# Must run before anything imports app.config: offline stand-in models and a
+# throwaway database, upload and index directory for the whole session
+_workdir = tempfile.mkdtemp(prefix="incident-tests-")
+os.environ["MODEL_PROFILE"] = "stub"
+os.environ["INFERENCE_WORKERS"] = "0"
+os.environ["DATABASE_PATH"] = os.path.join(_workdir, "incidents.db")
+os.environ["UPLOAD_DIR"] = os.path.join(_workdir, "uploads")
+os.environ["OCR_CACHE_DIR"] = os.path.join(_workdir, "ocr_cache")
+os.environ["SIMILARITY_INDEX_PATH"] = os.path.join(_workdir, "vectors")
+os.environ["ANALYSIS_CACHE_BACKEND"] = "none"
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as client:
+        # Models load in the background after startup
+        deadline = time.monotonic() + 60
+        while client.get("/health/ready").status_code != 200:
+            assert time.monotonic() < deadline, "stub models did not become ready"
+            time.sleep(0.05)
+        yield client
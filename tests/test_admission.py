@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from app.utils.admission import AdmissionController, AdmissionRejected
+
+
+def test_freed_slots_go_to_the_highest_lane_first():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=10)
+        await controller.acquire("normal")
+        granted = []
+
+        async def wait(lane):
+            await controller.acquire(lane)
+            granted.append(lane)
+
+        tasks = [asyncio.create_task(wait(lane)) for lane in ("bulk", "normal", "urgent", "normal")]
+        await asyncio.sleep(0)
+        assert controller.queued == 4
+        for _ in tasks:
+            controller.release()
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        return granted
+
+    assert asyncio.run(scenario()) == ["urgent", "normal", "normal", "bulk"]
+
+
+def test_full_queue_sheds_the_newest_lower_lane_waiter():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=2)
+        await controller.acquire("urgent")
+        first = asyncio.create_task(controller.acquire("bulk"))
+        newest = asyncio.create_task(controller.acquire("bulk"))
+        await asyncio.sleep(0)
+
+        # Nothing below bulk to displace
+        with pytest.raises(AdmissionRejected) as rejected:
+            controller.check("bulk")
+        assert rejected.value.reason == "full"
+        controller.check("urgent")
+
+        urgent = asyncio.create_task(controller.acquire("urgent"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as shed:
+            await newest
+        assert shed.value.reason == "shed"
+        assert shed.value.lane == "bulk"
+        assert controller.shed["bulk"] == 1
+
+        controller.release()
+        await urgent
+        assert not first.done()
+        controller.release()
+        await first
+
+    asyncio.run(scenario())
+
+
+def test_slot_granted_to_a_cancelled_waiter_passes_to_the_next():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=10)
+        await controller.acquire("normal")
+        cancelled = asyncio.create_task(controller.acquire("normal"))
+        following = asyncio.create_task(controller.acquire("normal"))
+        await asyncio.sleep(0)
+
+        # The slot is handed over and the caller goes away before it runs
+        controller.release()
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        await asyncio.wait_for(following, 1)
+        assert controller.running == 1
+        assert controller.queued == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=10)
+        await controller.acquire("normal")
+        waiter = asyncio.create_task(controller.acquire("bulk"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert controller.queued == 0
+        assert controller.running == 1
+
+    asyncio.run(scenario())
+
+
+def test_background_waiters_are_never_shed():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=2)
+        await controller.acquire("normal")
+        background = asyncio.create_task(controller.acquire("bulk", bounded=False))
+        queued = [asyncio.create_task(controller.acquire(lane)) for lane in ("urgent", "urgent")]
+        await asyncio.sleep(0)
+        # The background waiter does not take a place in the bounded queue
+        assert controller.queued == 2
+
+        for lane in ("urgent", "normal"):
+            with pytest.raises(AdmissionRejected) as rejected:
+                await asyncio.wait_for(controller.acquire(lane), 1)
+            assert rejected.value.reason == "full"
+        assert not background.done()
+        assert controller.shed["bulk"] == 0
+
+        for task in queued + [background]:
+            controller.release()
+            await asyncio.wait_for(task, 1)
+        assert controller.running == 1
+
+    asyncio.run(scenario())
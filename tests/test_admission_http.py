@@ -0,0 +1,45 @@
+import asyncio
+
+from app import main
+from app.utils.admission import AdmissionController
+
+
+def test_saturated_create_is_rejected_before_the_upload_is_handled(client, monkeypatch):
+    saturated = AdmissionController(max_concurrent=1, max_queue=0)
+    asyncio.run(saturated.acquire("urgent"))
+    monkeypatch.setattr(main, "admission", saturated)
+    allocated = []
+    monkeypatch.setattr(main.incident_store, "allocate_id", lambda: allocated.append(1))
+
+    response = client.post(
+        "/incidents/create",
+        params={"title": "Parcel late", "description": "Still not here", "priority": "normal"},
+        files={"documents": ("photo.png", b"\0" * 4000, "image/png")}
+    )
+
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+    assert response.json()["lane"] == "normal"
+    assert allocated == []
+
+
+def test_create_shed_after_the_check_leaves_nothing_behind(client, monkeypatch):
+    # The queue filled up between the middleware's check and the handler
+    saturated = AdmissionController(max_concurrent=1, max_queue=0)
+    asyncio.run(saturated.acquire("urgent"))
+    monkeypatch.setattr(saturated, "check", lambda lane: None)
+    monkeypatch.setattr(main, "admission", saturated)
+    allocated, saved = [], []
+    monkeypatch.setattr(main.incident_store, "allocate_id", lambda: allocated.append(1))
+    monkeypatch.setattr(main, "_save_documents", lambda *args: saved.append(args))
+
+    response = client.post(
+        "/incidents/create",
+        params={"title": "Parcel late", "description": "Still not here", "priority": "normal"},
+        files={"documents": ("photo.png", b"\0" * 4000, "image/png")}
+    )
+
+    assert response.status_code == 503
+    assert response.json()["lane"] == "normal"
+    assert allocated == []
+    assert saved == []
@@ -0,0 +1,50 @@
+import asyncio
+
+from app.schemas.combined_analysis import CombinedAnalysis
+from app.utils.analysis_cache import AnalysisCache, InMemoryCacheBackend
+
+
+def test_keys_ignore_whitespace_but_not_case():
+    cache = AnalysisCache(InMemoryCacheBackend(), model_version="v1")
+    key = cache.key_for("Parcel late", "Held at customs")
+
+    assert cache.key_for("  Parcel\tlate ", "Held  at\ncustoms") == key
+    assert cache.key_for("PARCEL LATE", "Held at customs") != key
+    assert AnalysisCache(InMemoryCacheBackend(), model_version="v2").key_for(
+        "Parcel late", "Held at customs"
+    ) != key
+
+
+def test_entries_expire_and_are_evicted():
+    backend = InMemoryCacheBackend(max_entries=2)
+    backend.set("a", "1")
+    backend.set("b", "2")
+    assert backend.get("a") == "1"
+    backend.set("c", "3")
+    # "b" was the least recently used
+    assert backend.get("b") is None
+    assert backend.evictions == 1
+
+    backend.set("d", "4", ttl=-1)
+    assert backend.get("d") is None
+    assert backend.expirations == 1
+
+
+def test_analysis_round_trips():
+    cache = AnalysisCache(InMemoryCacheBackend(), model_version="v1")
+    analysis = CombinedAnalysis(
+        category="Shipment Delay",
+        confidence=0.9,
+        sentiment="Negative",
+        urgency_level="High",
+        recommended_actions=["Contact the carrier"],
+        estimated_resolution_time="24 hours"
+    )
+
+    async def scenario():
+        assert await cache.get("Parcel late", "Held") is None
+        await cache.set("Parcel late", "Held", analysis)
+        return await cache.get("Parcel  late", "Held ")
+
+    assert asyncio.run(scenario()) == analysis
+    assert (cache.hits, cache.misses) == (1, 1)
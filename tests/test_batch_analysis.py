@@ -0,0 +1,36 @@
+import json
+
+from app.config import settings
+
+
+def _incidents(count: int) -> list:
+    return [{"title": f"Payment {i} failed", "description": "Card charged twice for one order"} for i in range(count)]
+
+
+def test_json_list_is_analyzed(client):
+    response = client.post("/incidents/analyze/batch", json=_incidents(3))
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["index"] for line in lines] == [0, 1, 2]
+
+
+def test_oversized_json_list_points_to_ndjson(client, monkeypatch):
+    monkeypatch.setattr(settings, "analysis_batch_max_json_bytes", 500)
+
+    response = client.post("/incidents/analyze/batch", json=_incidents(20))
+
+    assert response.status_code == 413
+    assert "application/x-ndjson" in response.json()["detail"]
+
+
+def test_oversized_batch_streams_as_ndjson(client, monkeypatch):
+    monkeypatch.setattr(settings, "analysis_batch_max_json_bytes", 500)
+    body = "".join(json.dumps(item) + "\n" for item in _incidents(20))
+
+    response = client.post(
+        "/incidents/analyze/batch", content=body, headers={"content-type": "application/x-ndjson"}
+    )
+
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == 20
@@ -0,0 +1,41 @@
+import numpy as np
+
+from app.models.chunking import TokenWindower, Window, aggregate
+
+
+def test_short_texts_stay_whole():
+    windower = TokenWindower(window_tokens=8, overlap_tokens=2)
+    lengths = []
+    assert windower.split(["Parcel late", ""], token_lengths=lengths) == [
+        Window(0, "Parcel late", 2), Window(1, "", 0)
+    ]
+    assert lengths == [2, 0]
+
+
+def test_long_texts_are_cut_into_overlapping_windows():
+    windower = TokenWindower(window_tokens=4, overlap_tokens=1, max_tokens=0)
+    windows = windower.split(["a b c d e f g", "x y"])
+    assert windows == [
+        Window(0, "a b c d", 4), Window(0, "d e f g", 4), Window(1, "x y", 2)
+    ]
+    assert windower.stats()["windows"] == 3
+    # Overlap is at most half a window
+    assert TokenWindower(window_tokens=4, overlap_tokens=3).overlap_tokens == 2
+
+
+def test_texts_are_capped_at_max_tokens():
+    windower = TokenWindower(window_tokens=10, max_tokens=5)
+    lengths = []
+    assert windower.split(["a b c d e f g"], token_lengths=lengths) == [Window(0, "a b c d e", 5)]
+    assert lengths == [7]
+    assert windower.capped == 1
+
+
+def test_aggregate_weights_windows_by_tokens():
+    windows = [Window(0, "", 3), Window(0, "", 1), Window(1, "", 2)]
+    scores = [[1.0, 0.0], [0.0, 1.0], [0.5, 0.5]]
+
+    mean = aggregate(windows, scores, 2)
+    assert np.allclose(mean[0], [0.75, 0.25])
+    assert np.allclose(mean[1], [0.5, 0.5])
+    assert np.allclose(aggregate(windows, scores, 2, method="max")[0], [1.0, 1.0])
@@ -0,0 +1,12 @@
+from app.config import Settings
+
+
+def test_model_fingerprint_follows_urgency_keywords(tmp_path, monkeypatch):
+    lexicon = tmp_path / "urgency.json"
+    lexicon.write_text('{"outage": 3.0}')
+    monkeypatch.setenv("URGENCY_KEYWORDS_PATH", str(lexicon))
+    before = Settings().model_fingerprint()
+
+    lexicon.write_text('{"outage": 1.0}')
+
+    assert Settings().model_fingerprint() != before
@@ -0,0 +1,72 @@
+import os
+import time
+
+import pytest
+
+from app import main
+
+
+@pytest.fixture
+def similarity_index(client):
+    deadline = time.monotonic() + 30
+    while main.similarity_index is None:
+        assert time.monotonic() < deadline, "similarity index was not built"
+        time.sleep(0.05)
+    return main.similarity_index
+
+
+def test_create_survives_similarity_index_failure(client, similarity_index, monkeypatch):
+    def broken(*args, **kwargs):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(similarity_index, "search", broken)
+    monkeypatch.setattr(similarity_index, "add", broken)
+
+    response = client.post(
+        "/incidents/create",
+        params={"title": "Refund not received", "description": "Refund for order ORD123 is two weeks late"}
+    )
+
+    assert response.status_code == 200
+    created = response.json()
+    assert created["possible_duplicates"] is None
+    assert client.get(f"/incidents/{created['id']}").status_code == 200
+
+
+def test_create_flags_a_resubmitted_incident_as_duplicate(client, similarity_index):
+    params = {"title": "Container held at customs", "description": "Shipment ORD555 held at Apapa port since Monday"}
+    first = client.post("/incidents/create", params=params).json()
+
+    second = client.post("/incidents/create", params=params).json()
+
+    assert first["id"] in [duplicate["id"] for duplicate in second["possible_duplicates"]]
+
+
+def test_failed_insert_discards_the_document_job(client, monkeypatch):
+    async def failing(incident):
+        raise RuntimeError("database is locked")
+
+    dispatched = []
+    monkeypatch.setattr(main.incident_writer, "submit", failing)
+    monkeypatch.setattr(main.document_jobs, "dispatch", dispatched.append)
+    enqueued = []
+    enqueue = main.document_jobs.enqueue
+
+    async def recording(*args, **kwargs):
+        job_id = await enqueue(*args, **kwargs)
+        enqueued.append((job_id, [document.path for document in args[1]]))
+        return job_id
+
+    monkeypatch.setattr(main.document_jobs, "enqueue", recording)
+
+    with pytest.raises(RuntimeError):
+        client.post(
+            "/incidents/create",
+            params={"title": "Invoice missing", "description": "No invoice for order ORD777"},
+            files={"documents": ("invoice.png", b"\x89PNG\r\n\x1a\n" + b"\0" * 100, "image/png")}
+        )
+
+    assert dispatched == []
+    ((job_id, paths),) = enqueued
+    assert client.get(f"/jobs/{job_id}").status_code == 404
+    assert not any(os.path.exists(path) for path in paths)
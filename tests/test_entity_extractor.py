@@ -0,0 +1,24 @@
+from types import SimpleNamespace
+
+from app.models.entity_extractor import ANALYSIS_ENTITY_TYPES, EntityExtractor
+
+PIPE_NAMES = ["tok2vec", "tagger", "attribute_ruler", "entity_ruler", "ner"]
+
+
+def _extractor():
+    extractor = EntityExtractor.__new__(EntityExtractor)
+    extractor.nlp = SimpleNamespace(pipe_names=PIPE_NAMES)
+    return extractor
+
+
+def test_ner_runs_whenever_products_are_wanted():
+    # The statistical NER emits PRODUCT too, not only the entity ruler
+    extractor = _extractor()
+    assert extractor._unneeded_components(set(ANALYSIS_ENTITY_TYPES)) == []
+    assert extractor._unneeded_components({"Product"}) == []
+
+
+def test_ner_is_skipped_for_ruler_only_types():
+    extractor = _extractor()
+    assert extractor._unneeded_components({"Tracking ID", "Status"}) == ["ner"]
+    assert extractor._unneeded_components(None) == []
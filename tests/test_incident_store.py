@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.utils.incident_store import IncidentStore, search_expression
+
+
+@pytest.mark.parametrize("query, expression", [
+    ("port delay", '"port" "delay"'),
+    ('"late fee" invoice', '"late fee" "invoice"'),
+    ("ship*", '"ship"*'),
+    ("customs -cleared", '"customs" NOT "cleared"'),
+    ('invoice -"late fee"', '"invoice" NOT "late fee"'),
+    ('NEAR(a b) OR c"d', '"NEAR(a" "b)" "OR" "c""d"'),
+    ("delay - *", '"delay"'),
+])
+def test_search_expression(query, expression):
+    assert search_expression(query) == expression
+
+
+@pytest.mark.parametrize("query", ["", "  ", "-delay", "* - ()"])
+def test_search_expression_needs_a_word_to_include(query):
+    with pytest.raises(ValueError):
+        search_expression(query)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = IncidentStore(str(tmp_path / "incidents.db"))
+    yield store
+    store.close()
+
+
+def _incident(incident_id, title, description, category="Shipment Delay", urgency="Low", at=None):
+    at = at or datetime(2024, 5, 1, 12, 0) + timedelta(minutes=incident_id)
+    return {
+        "id": incident_id,
+        "title": title,
+        "description": description,
+        "category": category,
+        "urgency_level": urgency,
+        "status": "open",
+        "created_at": at,
+        "updated_at": at,
+        "document_count": 0,
+        "document_job_id": None
+    }
+
+
+def test_ids_are_allocated_in_sequence(store, tmp_path):
+    assert store.allocate_ids_sync(3) == [1, 2, 3]
+    assert store.allocate_ids_sync() == [4]
+    # The sequence lives in the database, so other processes continue it
+    other = IncidentStore(str(tmp_path / "incidents.db"))
+    assert other.allocate_ids_sync(2) == [5, 6]
+    other.close()
+
+
+def test_counters_follow_creates_and_status_changes(store):
+    store.add_many_sync([
+        _incident(1, "Late", "Truck late", urgency="High"),
+        _incident(2, "Late", "Ship late"),
+        _incident(3, "Fee", "Wrong fee", category="Payment Issue")
+    ])
+    store.update_status_sync(2, "resolved")
+    store.update_status_sync(2, "resolved")
+
+    counters = store.counters_sync()
+    assert counters["category"] == {"Shipment Delay": 2, "Payment Issue": 1}
+    assert counters["urgency_level"] == {"High": 1, "Low": 2}
+    assert counters["status"] == {"open": 2, "resolved": 1}
+    assert store.update_status_sync(99, "closed") is None
+
+
+def test_listing_pages_newest_first(store):
+    store.add_many_sync([_incident(n, f"Incident {n}", "Details") for n in range(1, 6)])
+
+    first = store.list_sync(limit=2)
+    assert [item["id"] for item in first["items"]] == [5, 4]
+    second = store.list_sync(cursor=first["next_cursor"], limit=2)
+    assert [item["id"] for item in second["items"]] == [3, 2]
+    last = store.list_sync(cursor=second["next_cursor"], limit=2)
+    assert [item["id"] for item in last["items"]] == [1]
+    assert last["next_cursor"] is None
+
+    filtered = store.list_sync(limit=10, created_after=datetime(2024, 5, 1, 12, 3))
+    assert [item["id"] for item in filtered["items"]] == [5, 4, 3]
+
+
+def test_search_matches_prefixes_and_exclusions(store):
+    incidents = [
+        _incident(1, "Shipment held", "Held at customs in Lagos"),
+        _incident(2, "Shipping delay", "Vessel delayed, customs cleared"),
+        _incident(3, "Payment failed", "Invoice rejected by the bank")
+    ]
+    store.add_many_sync(incidents)
+    assert store.backfill_search_sync() == 3
+    store.index_sync([{"id": 3, "documents": "customs duty receipt"}])
+
+    def ids(query, **kwargs):
+        return [item["id"] for item in store.search_sync(query, **kwargs)["items"]]
+
+    assert ids("customs") == [3, 2, 1]
+    assert ids("ship*") == [2, 1]
+    assert ids("customs -cleared") == [3, 1]
+    assert ids('"held at customs"') == [1]
+    page = store.search_sync("customs", limit=2)
+    assert page["next_cursor"] == 2
+    assert ids("customs", cursor=page["next_cursor"]) == [1]
+    assert ids("customs", created_before=datetime(2024, 5, 1, 12, 2)) == [1]
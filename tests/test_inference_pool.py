@@ -0,0 +1,33 @@
+import asyncio
+import os
+import signal
+
+from app.utils.inference_pool import InferencePool, sentiment_batch
+
+
+def test_pool_is_rebuilt_after_a_worker_dies():
+    async def scenario():
+        pool = InferencePool(workers=1)
+        try:
+            await pool.start([1])
+            assert pool.ready
+            await pool.run(sentiment_batch, ["Parcel is late"])
+            for pid in list(pool.worker_stats):
+                os.kill(pid, signal.SIGKILL)
+
+            failed = None
+            try:
+                await pool.run(sentiment_batch, ["Parcel is late"])
+            except RuntimeError as e:
+                failed = e
+            assert failed is not None
+            assert pool.state == "restarting"
+            assert pool.health()["restarts"] == 1
+
+            # Later requests wait for the rebuilt pool instead of failing
+            assert await pool.run(sentiment_batch, ["Parcel is late"])
+            assert pool.ready
+        finally:
+            pool.shutdown()
+
+    asyncio.run(scenario())
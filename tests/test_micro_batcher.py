@@ -0,0 +1,50 @@
+import asyncio
+
+from app.utils.micro_batcher import MicroBatcher
+
+
+def _doubling(batches):
+    def batch_fn(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+    return batch_fn
+
+
+def test_full_batch_is_flushed_without_waiting():
+    batches = []
+    batcher = MicroBatcher("double", _doubling(batches), max_batch_size=3, max_wait_ms=60000)
+
+    async def scenario():
+        return await asyncio.wait_for(asyncio.gather(*[batcher.submit(n) for n in range(3)]), 5)
+
+    assert asyncio.run(scenario()) == [0, 2, 4]
+    assert batches == [[0, 1, 2]]
+    assert batcher.size_flushes == 1
+    assert batcher.wait_flushes == 0
+
+
+def test_partial_batch_is_flushed_after_max_wait():
+    batches = []
+    batcher = MicroBatcher("double", _doubling(batches), max_batch_size=10, max_wait_ms=20)
+
+    async def scenario():
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2))
+
+    assert asyncio.run(scenario()) == [2, 4]
+    assert batches == [[1, 2]]
+    assert batcher.wait_flushes == 1
+    assert batcher.stats()["batch_size_histogram"] == {2: 1}
+
+
+def test_batch_errors_reach_every_caller():
+    def failing(items):
+        raise ValueError("model crashed")
+
+    batcher = MicroBatcher("fail", failing, max_batch_size=2, max_wait_ms=5)
+
+    async def scenario():
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert batcher.errors == 1
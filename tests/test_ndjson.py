@@ -0,0 +1,34 @@
+import asyncio
+
+from app.utils.ndjson import iter_lines
+
+
+def _lines(chunks, max_line_bytes=100):
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+
+    async def collect():
+        return [line async for line in iter_lines(stream(), max_line_bytes)]
+
+    return asyncio.run(collect())
+
+
+def test_lines_are_split_across_chunk_boundaries():
+    assert _lines([b'{"a": 1}\n{"b"', b': 2}\n\n  \n{"c": 3}']) == [b'{"a": 1}', b'{"b": 2}', b'{"c": 3}']
+    assert _lines([b"x\ny\n"]) == [b"x", b"y"]
+
+
+def test_oversized_lines_are_reported_in_place():
+    lines = _lines([b"first\n", b"x" * 60, b"x" * 60, b"\nlast\n"], max_line_bytes=100)
+    assert lines[0] == b"first"
+    assert isinstance(lines[1], ValueError)
+    assert lines[2] == b"last"
+    assert isinstance(_lines([b"y" * 200], max_line_bytes=100)[0], ValueError)
+
+
+def test_many_lines_in_one_chunk():
+    body = b"".join(b'{"n": %d}\n' % n for n in range(20000))
+    lines = _lines([body], max_line_bytes=64)
+    assert len(lines) == 20000
+    assert lines[-1] == b'{"n": 19999}'
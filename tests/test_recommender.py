@@ -0,0 +1,18 @@
+from app.models.recommender import KeywordMatcher
+
+
+def test_keyword_matcher_finds_whole_words_and_phrases():
+    matcher = KeywordMatcher({"customs hold": 2.0, "late": 1.0, "Urgent!": 0.5})
+
+    found = matcher.matches("URGENT: customs   hold, late and late again")
+    assert found == {("customs", "hold"), ("late",), ("urgent",)}
+    # Each term counts once however often it appears
+    assert matcher.score("URGENT: customs   hold, late and late again") == 3.5
+    assert matcher.score("customs cleared, lately on hold") == 0.0
+
+
+def test_keyword_matcher_stops_once_the_weight_is_reached():
+    matcher = KeywordMatcher({"late": 1.0, "urgent": 1.0})
+    assert matcher.matches("late urgent", stop_at=1.0) == {("late",)}
+    assert matcher.score("late urgent") == 2.0
+    assert KeywordMatcher({}).score("late") == 0.0
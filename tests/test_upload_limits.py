@@ -0,0 +1,38 @@
+import json
+
+from app.config import settings
+
+
+def _ndjson(count: int) -> bytes:
+    return "".join(
+        json.dumps({"title": f"Parcel {i} not delivered", "description": "Tracking shows delivered, nothing arrived"}) + "\n"
+        for i in range(count)
+    ).encode()
+
+
+def test_batch_multipart_upload_is_not_limited_by_document_budget(client, monkeypatch):
+    body = _ndjson(100)
+    monkeypatch.setattr(settings, "upload_max_request_bytes", 2000)
+    assert len(body) > settings.upload_max_request_bytes
+
+    response = client.post(
+        "/incidents/analyze/batch",
+        files={"file": ("incidents.ndjson", body, "application/x-ndjson")}
+    )
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["index"] for line in lines] == list(range(100))
+    assert all("analysis" in line for line in lines)
+
+
+def test_create_rejects_oversized_multipart_upload(client, monkeypatch):
+    monkeypatch.setattr(settings, "upload_max_request_bytes", 2000)
+
+    response = client.post(
+        "/incidents/create",
+        params={"title": "Damaged parcel", "description": "Photos attached"},
+        files={"documents": ("photo.png", b"\0" * 4000, "image/png")}
+    )
+
+    assert response.status_code == 413
@@ -0,0 +1,72 @@
+import numpy as np
+
+from app.utils.vector_index import VectorIndex
+
+
+def _unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+VECTORS = np.stack([_unit(1, 0, 0, 0), _unit(1, 1, 0, 0), _unit(0, 0, 1, 0)])
+
+
+def test_add_skips_ids_already_indexed():
+    index = VectorIndex(4)
+    index.add([1, 2], VECTORS[:2])
+    index.add([2, 3, 3], VECTORS)
+
+    assert len(index) == 3
+    assert index.ids().tolist() == [1, 2, 3]
+    # The first vector given for an id is kept
+    assert np.allclose(index.get(2), VECTORS[1])
+    assert np.allclose(index.get(3), VECTORS[1])
+    assert index.missing([1, 3, 4, 5]) == [4, 5]
+
+
+def test_search_returns_the_closest_first():
+    index = VectorIndex(4)
+    index.add([1, 2, 3], VECTORS)
+
+    results = index.search(_unit(1, 0.2, 0, 0), k=2)
+    assert [item_id for item_id, _ in results] == [1, 2]
+    assert results[0][1] > results[1][1]
+    assert [item_id for item_id, _ in index.search(VECTORS[0], k=5, exclude_id=1, min_score=0.5)] == [2]
+    assert VectorIndex(4).search(VECTORS[0]) == []
+
+
+def test_files_are_reopened_and_shared(tmp_path):
+    path = str(tmp_path / "similarity")
+    index = VectorIndex(4, path=path, model_name="test", initial_capacity=2)
+    index.add([1, 2, 3], VECTORS)
+
+    reopened = VectorIndex(4, path=path, model_name="test")
+    assert reopened.ids().tolist() == [1, 2, 3]
+    assert np.allclose(reopened.get(3), VECTORS[2])
+
+    # Rows appended by one instance are seen by the other
+    reopened.add([4], _unit(0, 0, 0, 1))
+    assert index.search(_unit(0, 0, 0, 1), k=1)[0][0] == 4
+    index.add([4, 5], np.stack([_unit(0, 0, 0, 1), _unit(0, 1, 0, 0)]))
+    assert VectorIndex(4, path=path, model_name="test").ids().tolist() == [1, 2, 3, 4, 5]
+
+    # Vectors from another model are not reused
+    assert len(VectorIndex(4, path=path, model_name="other")) == 0
+
+
+def test_get_finds_rows_on_both_sides_of_the_sorted_ids(monkeypatch):
+    monkeypatch.setattr("app.utils.vector_index.SORTED_TAIL_ROWS", 8)
+    rng = np.random.default_rng(0)
+    ids = rng.permutation(100) * 3
+    vectors = rng.normal(size=(100, 4)).astype(np.float32)
+    index = VectorIndex(4, initial_capacity=4)
+    for start in range(0, 100, 10):
+        index.add(ids[start:start + 10], vectors[start:start + 10])
+
+    # Most rows are in the sorted copy by now, the last few in the tail
+    assert 0 < index._sorted_count < len(index)
+    for row in rng.permutation(100):
+        assert np.allclose(index.get(int(ids[row])), vectors[row])
+    assert index.get(1) is None
+    assert index.get(-3) is None
+    assert index.get(10 ** 6) is None